@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Static Image Analysis
+Instruction mix, reachability and dead code for whole memory images
+
+Every word of the image is decoded at once with NumPy bit-field
+operations (opcode, instruction size, 16-bit immediate of the following
+word). A control-flow walk then starts from the reset vector M[0] and the
+interrupt vectors M[1] (external INT), M[2] / M[3] (INT 0 / INT 1) and
+follows JMP/JZ/JN/JC/CALL/INT targets using the precomputed arrays.
+
+Words are classified as
+  vector  M[0]..M[3]
+  code    reachable instruction words and their immediate words
+  data    non-code words at an address used as the immediate of a
+          reachable LDM/IADD/LDD/STD, and the rest of the contiguous
+          non-code run that follows it (a table indexed from its start)
+  dead    non-zero words that are neither code nor data: unreachable
+          code, or data only addressed through computed registers
+  empty   zero words (NOP) that are never reached
+
+Inputs may be .mem / .bin images or .asm sources (assembled in memory),
+or directories containing them.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from assembler import RISCAssembler
+from memimage import open_image
+
+
+class ImageAnalyzer:
+    # Number of vector words at the bottom of memory
+    VECTOR_COUNT = 4
+
+    def __init__(self, max_nop_run: int = 8, assembler_class=RISCAssembler):
+        self.assembler = assembler_class()
+        # Fall-through into more than this many zero words is treated as
+        # running off the end of the program rather than executing NOPs
+        self.max_nop_run = max_nop_run
+
+        asm = self.assembler
+        self.mnemonics: Dict[int, str] = {int(code, 2): name for name, code in asm.opcodes.items()}
+        self.type_names = ['type1', 'type2', 'type3', 'type4']
+
+        def codes(names: List[str]) -> np.ndarray:
+            return np.array([int(asm.opcodes[n], 2) for n in names], dtype=np.uint32)
+
+        self.two_word = codes(asm.type2_imm + asm.type3_imm + asm.type3_offset
+                              + asm.type4_imm + asm.type4_index)
+        self.valid = codes(list(asm.opcodes))
+        self.op = {name: int(code, 2) for name, code in asm.opcodes.items()}
+        self.conditional = {self.op[n] for n in ('JZ', 'JN', 'JC')}
+        # Instructions whose immediate may be a data address
+        self.data_operand = codes(asm.type2_imm + asm.type3_imm + asm.type3_offset)
+
+    # ---------------------------------------------------------------- loading
+
+    def load(self, path: str) -> np.ndarray:
+        """Load an image (or assemble a source) into a uint32 array"""
+        if path.lower().endswith('.asm'):
+            with open(path, 'r') as f:
+                lines = f.readlines()
+            processed_lines = self.assembler.first_pass(lines)
+            encoded, errors = self.assembler.second_pass(processed_lines)
+            if errors:
+                line_num, line, message = errors[0]
+                raise ValueError(f"line {line_num}: {line}: {message}")
+            words = np.zeros(self.assembler.memory_size, dtype=np.uint32)
+            for address, item in encoded:
+                for i, word in enumerate(item):
+                    if address + i < len(words):
+                        words[address + i] = int(word, 2)
+            return words
+
+        with open_image(path) as image:
+            return np.array(image.as_numpy(), dtype=np.uint32)
+
+    # ---------------------------------------------------------------- analysis
+
+    def decode(self, words: np.ndarray) -> Dict[str, np.ndarray]:
+        """Bit-field decode of every word in the image"""
+        opcode = (words >> 27).astype(np.uint8)
+        size = np.where(np.isin(opcode, self.two_word), 2, 1).astype(np.uint8)
+        following = np.zeros_like(words)
+        following[:-1] = words[1:]
+        imm = following & 0xFFFF
+
+        # Index of the next non-zero word at or after each address
+        nonzero = words != 0
+        positions = np.where(nonzero, np.arange(len(words)), len(words))
+        next_nonzero = np.minimum.accumulate(positions[::-1])[::-1]
+
+        return {
+            'opcode': opcode,
+            'size': size,
+            'imm': imm,
+            'following': following,
+            'valid': np.isin(opcode, self.valid),
+            'nonzero': nonzero,
+            'next_nonzero': next_nonzero,
+        }
+
+    def roots(self, words: np.ndarray) -> List[Tuple[str, int]]:
+        """Entry points: reset plus every installed interrupt vector"""
+        roots = [('reset', int(words[0]) & 0x3FFFF)]
+        for index, name in ((1, 'external INT'), (2, 'INT 0'), (3, 'INT 1')):
+            if words[index]:
+                roots.append((name, int(words[index]) & 0x3FFFF))
+        return roots
+
+    def walk(self, words: np.ndarray, fields: Dict[str, np.ndarray]
+             ) -> Tuple[np.ndarray, np.ndarray, List[Tuple[int, int, str]], List[str]]:
+        """Follow control flow from all roots
+        Returns: (instruction-start mask, code-word mask, CFG edges, warnings)
+        """
+        length = len(words)
+        start_mask = np.zeros(length, dtype=bool)
+        code_mask = np.zeros(length, dtype=bool)
+        edges: List[Tuple[int, int, str]] = []
+        warnings: List[str] = []
+
+        opcode = fields['opcode']
+        size = fields['size']
+        imm = fields['imm']
+        following = fields['following']
+        valid = fields['valid']
+        next_nonzero = fields['next_nonzero']
+        op = self.op
+
+        worklist = [address for _, address in self.roots(words)]
+        while worklist:
+            address = worklist.pop()
+            while 0 <= address < length and not start_mask[address]:
+                if not words[address] and next_nonzero[address] - address > self.max_nop_run:
+                    warnings.append(f"execution runs into empty memory at 0x{address:05X}")
+                    break
+                code = int(opcode[address])
+                if not valid[address]:
+                    warnings.append(f"invalid opcode {code:05b} reached at 0x{address:05X}")
+                    break
+
+                start_mask[address] = True
+                width = int(size[address])
+                code_mask[address:address + width] = True
+                nxt = address + width
+
+                if code == op['JMP']:
+                    target = int(imm[address])
+                    edges.append((address, target, 'jump'))
+                    worklist.append(target)
+                    break
+                if code in self.conditional:
+                    target = int(imm[address])
+                    edges.append((address, target, 'branch'))
+                    edges.append((address, nxt, 'fallthrough'))
+                    worklist.append(target)
+                elif code == op['CALL']:
+                    target = int(imm[address])
+                    edges.append((address, target, 'call'))
+                    worklist.append(target)
+                elif code == op['INT']:
+                    vector = 2 + (int(following[address]) & 1)
+                    target = int(words[vector]) & 0x3FFFF
+                    edges.append((address, target, 'int'))
+                    worklist.append(target)
+                elif code in (op['RET'], op['RTI'], op['HLT']):
+                    break
+                address = nxt
+
+        return start_mask, code_mask, edges, warnings
+
+    @staticmethod
+    def ranges(mask: np.ndarray) -> List[Tuple[int, int]]:
+        """(start, end) runs of True in a boolean mask (end exclusive)"""
+        padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+        changes = np.flatnonzero(np.diff(padded))
+        return [(int(s), int(e)) for s, e in zip(changes[::2], changes[1::2])]
+
+    def data_words(self, fields: Dict[str, np.ndarray], start_mask: np.ndarray,
+                   candidate: np.ndarray) -> np.ndarray:
+        """Mask of the candidate (non-code) words referenced as data operands"""
+        operands = start_mask & np.isin(fields['opcode'], self.data_operand)
+        referenced = np.unique(fields['imm'][operands])
+        seed = np.zeros(len(candidate), dtype=bool)
+        seed[referenced[referenced < len(candidate)]] = True
+        seed &= candidate
+
+        data_mask = np.zeros(len(candidate), dtype=bool)
+        for start, end in self.ranges(candidate):
+            first = np.flatnonzero(seed[start:end])
+            if first.size:
+                data_mask[start + int(first[0]):end] = True
+        return data_mask
+
+    def analyze(self, words: np.ndarray) -> Dict:
+        """Full report for one image"""
+        fields = self.decode(words)
+        start_mask, code_mask, edges, warnings = self.walk(words, fields)
+
+        vector_mask = np.zeros(len(words), dtype=bool)
+        vector_mask[:self.VECTOR_COUNT] = True
+        candidate = fields['nonzero'] & ~code_mask & ~vector_mask
+        data_mask = self.data_words(fields, start_mask, candidate)
+        dead_mask = candidate & ~data_mask
+
+        counts = np.bincount(fields['opcode'][start_mask], minlength=32)
+        mix = {self.mnemonics[c]: int(n) for c, n in enumerate(counts) if n and c in self.mnemonics}
+        type_counts = counts.reshape(4, 8).sum(axis=1)
+        types = {name: int(n) for name, n in zip(self.type_names, type_counts)}
+
+        return {
+            'roots': [{'name': n, 'address': a} for n, a in self.roots(words)],
+            'defined_words': int(fields['nonzero'].sum()),
+            'instructions': int(start_mask.sum()),
+            'code_words': int(code_mask.sum()),
+            'data_words': int(data_mask.sum()),
+            'dead_words': int(dead_mask.sum()),
+            'types': types,
+            'mix': mix,
+            'code_ranges': self.ranges(code_mask),
+            'data_ranges': self.ranges(data_mask),
+            'dead_ranges': self.ranges(dead_mask),
+            'edges': len(edges),
+            'call_targets': sorted({t for _, t, kind in edges if kind == 'call'}),
+            'warnings': warnings,
+        }
+
+
+def collect(paths: List[str]) -> List[str]:
+    """Expand directories into the images/sources they contain"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(('.mem', '.bin', '.asm')):
+                    files.append(os.path.join(path, name))
+        else:
+            files.append(path)
+    return files
+
+
+def print_report(path: str, report: Dict):
+    """Human readable report for one image"""
+    print(f"\n{'='*60}")
+    print(f"{path}  ({report['elapsed_ms']:.1f} ms)")
+    print(f"{'='*60}")
+    for root in report['roots']:
+        print(f"  {root['name']:14s} -> 0x{root['address']:05X}")
+    print(f"  Defined words: {report['defined_words']}")
+    print(f"  Instructions:  {report['instructions']} reachable ({report['code_words']} words)")
+    print(f"  Data words:    {report['data_words']}")
+    print(f"  Dead words:    {report['dead_words']}")
+    print("  Mix:           " + ', '.join(f"{t}={n}" for t, n in report['types'].items()))
+    print("                 " + ', '.join(f"{m}={n}" for m, n in sorted(report['mix'].items(),
+                                                                        key=lambda x: -x[1])))
+    for start, end in report['data_ranges']:
+        print(f"  Data:          0x{start:05X}-0x{end - 1:05X} ({end - start} words)")
+    for start, end in report['dead_ranges']:
+        print(f"  Dead:          0x{start:05X}-0x{end - 1:05X} ({end - start} words)")
+    for warning in report['warnings']:
+        print(f"  Warning:       {warning}")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Static analysis of RISC memory images")
+    parser.add_argument('paths', nargs='+', help=".mem/.bin images, .asm sources or directories")
+    parser.add_argument('--json', action='store_true', help="print one JSON object per image")
+    parser.add_argument('--max-nop-run', type=int, default=8,
+                        help="zero words tolerated on fall-through before stopping (default 8)")
+    parser.add_argument('--variant', default='assembler',
+                        help="assembler module used for .asm inputs (assembler or assembler2)")
+    args = parser.parse_args()
+
+    assembler_class = __import__(args.variant).RISCAssembler
+    analyzer = ImageAnalyzer(args.max_nop_run, assembler_class)
+
+    total = 0.0
+    files = collect(args.paths)
+    for path in files:
+        try:
+            words = analyzer.load(path)
+            start = time.perf_counter()
+            report = analyzer.analyze(words)
+            report['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            print(f"ERROR: {path}: {e}", file=sys.stderr)
+            continue
+        total += report['elapsed_ms']
+        report['path'] = path
+        if args.json:
+            print(json.dumps(report))
+        else:
+            print_report(path, report)
+
+    if not args.json and files:
+        print(f"\nAnalyzed {len(files)} image(s) in {total:.1f} ms "
+              f"({total / len(files):.1f} ms per image)")
+
+
+if __name__ == "__main__":
+    main()
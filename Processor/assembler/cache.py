@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Cache Experiments
+Split instruction / data caches in front of the shared memory (model only)
+
+memory.vhd has a single port, so every MEM-stage access (LDD, STD, PUSH,
+POP, CALL, RET, INT) takes the port away from fetch and costs a
+mem_conflict stall. Here the pipeline model is given separate
+instruction and data ports, each optionally behind a cache:
+
+  size    cache size in words
+  assoc   ways per set (size // line // assoc sets)
+  line    words per line
+  policy  replacement within a set: lru or fifo
+
+Caches are write-allocate / write-through and only affect timing: data
+always comes from the model's memory. A miss freezes the whole pipeline
+for the miss penalty; an instruction and a data miss in the same cycle
+are served one after the other by the shared memory behind the caches.
+
+The experiment runs a program on the baseline model (one shared port),
+on ideal split memory (no misses) and on each cache configuration, and
+reports cycles, CPI, stalls by cause, hit rates and the CPI recovered
+relative to the baseline (CPI, so that programs that never reach HLT
+can be compared over a cycle budget).
+"""
+
+import argparse
+import sys
+from typing import Dict, List, Optional, Tuple
+
+REPLACEMENT_POLICIES = ('lru', 'fifo')
+
+
+class Cache:
+    def __init__(self, size: int, assoc: int = 1, line: int = 4, policy: str = 'lru',
+                 miss_penalty: int = 10):
+        if line <= 0 or assoc <= 0 or size <= 0 or size % (line * assoc):
+            raise ValueError(f"cache size {size} is not a multiple of line ({line}) x assoc ({assoc})")
+        if policy not in REPLACEMENT_POLICIES:
+            raise ValueError(f"unknown replacement policy '{policy}' "
+                             f"(expected {', '.join(REPLACEMENT_POLICIES)})")
+        self.size = size
+        self.assoc = assoc
+        self.line = line
+        self.policy = policy
+        self.miss_penalty = miss_penalty
+        self.set_count = size // (line * assoc)
+        # Tags per set, least recently used (LRU) / oldest (FIFO) first
+        self.sets: List[List[int]] = [[] for _ in range(self.set_count)]
+
+        self.accesses = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def parse(cls, spec: str, miss_penalty: int = 10) -> 'Cache':
+        """SIZE[,ASSOC[,LINE[,POLICY]]], e.g. '256,2,4,lru'"""
+        parts = [p.strip() for p in spec.split(',')]
+        try:
+            size = int(parts[0])
+            assoc = int(parts[1]) if len(parts) > 1 else 1
+            line = int(parts[2]) if len(parts) > 2 else 4
+        except ValueError:
+            raise ValueError(f"invalid cache '{spec}' (expected SIZE[,ASSOC[,LINE[,POLICY]]])")
+        policy = parts[3].lower() if len(parts) > 3 else 'lru'
+        return cls(size, assoc, line, policy, miss_penalty)
+
+    def access(self, address: int) -> bool:
+        """Look up one word, allocating its line on a miss. Returns True on a hit"""
+        self.accesses += 1
+        block = address // self.line
+        ways = self.sets[block % self.set_count]
+        if block in ways:
+            if self.policy == 'lru':
+                ways.remove(block)
+                ways.append(block)
+            return True
+        self.misses += 1
+        if len(ways) == self.assoc:
+            del ways[0]
+            self.evictions += 1
+        ways.append(block)
+        return False
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        """None until the cache has been accessed"""
+        return 1 - self.misses / self.accesses if self.accesses else None
+
+    def config(self) -> Dict:
+        return {'size': self.size, 'assoc': self.assoc, 'line': self.line,
+                'policy': self.policy, 'miss_penalty': self.miss_penalty}
+
+    def state(self) -> Dict:
+        """Contents and counters (saved in checkpoints)"""
+        return {'sets': [list(ways) for ways in self.sets], 'accesses': self.accesses,
+                'misses': self.misses, 'evictions': self.evictions}
+
+    def load_state(self, state: Dict):
+        self.sets = [list(ways) for ways in state['sets']]
+        self.accesses = state['accesses']
+        self.misses = state['misses']
+        self.evictions = state['evictions']
+
+    def stats(self) -> Dict:
+        return {'accesses': self.accesses, 'misses': self.misses,
+                'evictions': self.evictions, 'hit_rate': self.hit_rate}
+
+
+# -------------------------------------------------------------------- experiment
+
+def run_config(memory, max_cycles: int, split: bool = False, icache: Optional[str] = None,
+               dcache: Optional[str] = None, miss_penalty: int = 10, stimulus=None) -> Dict:
+    """Run a program on one memory configuration"""
+    from pipeline import PipelineSimulator
+    sim = PipelineSimulator(
+        memory, split=split,
+        icache=Cache.parse(icache, miss_penalty) if icache else None,
+        dcache=Cache.parse(dcache, miss_penalty) if dcache else None,
+    )
+    sim.reset()
+    sim.run(max_cycles, stimulus)
+    return {
+        'cycles': sim.cycle,
+        'instructions': sim.instructions,
+        'halted': sim.halted,
+        'stalls': dict(sim.stall_causes),
+        'icache': sim.icache.stats() if sim.icache else None,
+        'dcache': sim.dcache.stats() if sim.dcache else None,
+        'output': [value for _, value in sim.output_trace],
+    }
+
+
+def print_comparison(title: str, rows: List[Tuple[str, Dict]]):
+    """Cycles, stalls and hit rates per configuration, relative to the first row"""
+    def cpi(result: Dict) -> float:
+        return result['cycles'] / result['instructions'] if result['instructions'] else 0.0
+
+    baseline = rows[0][1]
+    causes = []
+    for _, result in rows:
+        causes.extend(c for c in result['stalls'] if c not in causes)
+
+    print(f"\n{'='*60}")
+    print(f"Memory hierarchy: {title}")
+    print(f"{'='*60}")
+    print(f"{'configuration':34s} {'cycles':>9s} {'CPI':>6s} {'saved':>7s}  "
+          + ' '.join(f"{c:>12s}" for c in causes) + "  hit rate I / D")
+    for name, result in rows:
+        saved = (cpi(baseline) - cpi(result)) / cpi(baseline) * 100 if cpi(baseline) else 0
+        rates = ' / '.join(f"{result[c]['hit_rate'] * 100:5.1f}%"
+                           if result[c] and result[c]['hit_rate'] is not None else '    -'
+                           for c in ('icache', 'dcache'))
+        print(f"{name:34s} {result['cycles']:9d} {cpi(result):6.3f} {saved:6.1f}%  "
+              + ' '.join(f"{result['stalls'].get(c, 0):12d}" for c in causes) + f"  {rates}")
+    print(f"{'='*60}")
+
+    for name, result in rows[1:]:
+        if result['halted'] and baseline['halted'] and result['output'] != baseline['output']:
+            print(f"  WARNING: {name}: OUT values differ from the shared-memory run")
+    if not all(result['halted'] for _, result in rows):
+        print("  Some runs did not reach HLT within --max-cycles; they are compared by CPI.")
+    print()
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Compare the shared memory with split / cached "
+                                                 "instruction and data ports")
+    parser.add_argument('image', help=".mem or .bin memory image")
+    parser.add_argument('--icache', action='append', default=[],
+                        help="instruction cache SIZE[,ASSOC[,LINE[,POLICY]]]; repeat to compare several")
+    parser.add_argument('--dcache', action='append', default=[],
+                        help="data cache SIZE[,ASSOC[,LINE[,POLICY]]]; paired with --icache in order")
+    parser.add_argument('--miss-penalty', type=int, default=10, help="cycles per miss (default 10)")
+    parser.add_argument('--max-cycles', type=int, default=100000)
+    parser.add_argument('--stimulus', help="stimulus schedule (.stim)")
+    args = parser.parse_args()
+
+    from memimage import open_image
+    try:
+        with open_image(args.image) as image:
+            memory = image.as_array()
+        configs = [(args.icache[i] if i < len(args.icache) else None,
+                    args.dcache[i] if i < len(args.dcache) else None)
+                   for i in range(max(len(args.icache), len(args.dcache)))]
+        for icache, dcache in configs:
+            for spec in (icache, dcache):
+                if spec:
+                    Cache.parse(spec)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    stimulus = None
+    if args.stimulus:
+        from stimulus import StimulusSchedule
+        stimulus = StimulusSchedule.load(args.stimulus)
+
+    rows = [
+        ('shared memory (memory.vhd)', run_config(memory, args.max_cycles, stimulus=stimulus)),
+        ('split I/D, no misses', run_config(memory, args.max_cycles, split=True, stimulus=stimulus)),
+    ]
+    for icache, dcache in configs:
+        name = f"I {icache or 'ideal'} / D {dcache or 'ideal'}"
+        rows.append((name, run_config(memory, args.max_cycles, True, icache, dcache,
+                                      args.miss_penalty, stimulus)))
+    print_comparison(args.image, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Simulation Checkpoints
+Snapshot/restore of the pipeline and functional models
+
+A checkpoint holds the complete model state: PC, SP, flags, registers,
+pipeline registers (pipeline model), I/O state, counters and the output
+trace, cache contents and per-address profile counters when present,
+plus the memory words that differ from the loaded image. The
+simulators record every address they write (copy-on-write tracking), so a
+snapshot only compares those addresses and restoring is one copy of the
+image plus the diff.
+
+File format (.ckpt): b'RCKP' followed by a zlib-compressed payload
+    uint32 header length, uint32 number of changed words
+    JSON header (model, version, image digest, state)
+    uint32[n] addresses, uint32[n] values            (little endian)
+
+A checkpoint can only be restored over the image it was taken from; the
+image is identified by the SHA-1 of its words. It also records the model
+configuration (checkpoint_config(): forwarding policy, split ports and
+cache geometry of the pipeline model) and is only restored into a
+simulator configured the same way, since the timing would differ.
+"""
+
+import argparse
+import dataclasses
+import hashlib
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, List, Optional
+
+from assembler import RISCAssembler
+
+
+def working_copy(words) -> array:
+    """Writable array('I') copy of an image; arrays and memoryviews of 32-bit words
+    (e.g. runner.py's shared memory) are copied in one memcpy"""
+    if (isinstance(words, array) and words.typecode == 'I') or \
+            (isinstance(words, memoryview) and words.format == 'I'):
+        copy = array('I')
+        copy.frombytes(memoryview(words).cast('B'))
+        return copy
+    return array('I', words)
+
+
+def image_digest(words) -> str:
+    """SHA-1 of a memory image (sequence of 32-bit words)"""
+    data = words if isinstance(words, array) and words.typecode == 'I' else working_copy(words)
+    if sys.byteorder != 'little':
+        data = array('I', data)
+        data.byteswap()
+    return hashlib.sha1(data.tobytes()).hexdigest()
+
+
+class Checkpoint:
+    MAGIC = b'RCKP'
+    VERSION = 2
+    # Version 1 files have no configuration and were taken with the defaults
+    DEFAULT_CONFIG = {
+        'pipeline': {'policy': {'forwarding': 'full', 'load_to_store': False, 'swap': 'xor'},
+                     'split': False, 'icache': None, 'dcache': None},
+        'functional': {},
+    }
+    CACHES = ('icache', 'dcache')
+    PROFILE_COUNTERS = ('exec_counts', 'cycle_counts')
+
+    def __init__(self, model: str, digest: str, state: Dict, memory: Dict[int, int],
+                 config: Optional[Dict] = None):
+        self.model = model
+        self.digest = digest
+        self.state = state
+        self.memory = memory
+        self.config = self.DEFAULT_CONFIG[model] if config is None else config
+
+    # ---------------------------------------------------------------- capture
+
+    @classmethod
+    def capture(cls, sim, model: str) -> 'Checkpoint':
+        """Snapshot a simulator that defines CHECKPOINT_FIELDS / CHECKPOINT_REGISTERS"""
+        state = {}
+        for name in sim.CHECKPOINT_FIELDS:
+            value = getattr(sim, name)
+            if name == 'output_trace' and not isinstance(value, list):
+                value = []  # OUT values are going to a trace log, not kept in memory
+            state[name] = list(value) if isinstance(value, list) else \
+                dict(value) if isinstance(value, dict) else value
+        for name in sim.CHECKPOINT_REGISTERS:
+            state[name] = dataclasses.asdict(getattr(sim, name))
+        for name in cls.CACHES:
+            cache = getattr(sim, name, None)
+            if cache is not None:
+                state[name] = cache.state()
+        for name in cls.PROFILE_COUNTERS:
+            counts = getattr(sim, name, None)
+            if counts is not None:
+                state[name] = [[address, n] for address, n in enumerate(counts) if n]
+
+        image = sim.image
+        memory = {address: sim.memory[address] for address in sorted(sim.dirty)
+                  if sim.memory[address] != image[address]}
+        return cls(model, sim.image_digest(), state, memory, sim.checkpoint_config())
+
+    def restore(self, sim, model: str):
+        """Load this checkpoint into a simulator built from the same image"""
+        if self.model != model:
+            raise ValueError(f"checkpoint is for the {self.model} model, not the {model} model")
+        if self.digest != sim.image_digest():
+            raise ValueError("checkpoint was taken from a different memory image")
+        config = sim.checkpoint_config()
+        if self.config != config:
+            differ = [key for key in sorted(set(config) | set(self.config))
+                      if config.get(key) != self.config.get(key)]
+            raise ValueError("checkpoint was taken with a different configuration: " + '; '.join(
+                f"{key} {self.config.get(key)}, simulator {config.get(key)}" for key in differ))
+
+        for name in sim.CHECKPOINT_FIELDS:
+            value = self.state.get(name, getattr(sim, name))  # fields newer than the file keep their reset value
+            if name == 'output_trace':
+                value = [tuple(entry) for entry in value]
+            setattr(sim, name, list(value) if isinstance(value, list) else
+                    dict(value) if isinstance(value, dict) else value)
+        for name, register_class in sim.CHECKPOINT_REGISTERS.items():
+            setattr(sim, name, register_class(**self.state[name]))
+        for name in self.CACHES:
+            if name in self.state:
+                getattr(sim, name).load_state(self.state[name])
+        for name in self.PROFILE_COUNTERS:
+            if name in self.state:
+                if getattr(sim, name, None) is None:
+                    sim.enable_profile()
+                counts = getattr(sim, name)
+                for address in range(len(counts)):
+                    counts[address] = 0
+                for address, n in self.state[name]:
+                    counts[address] = n
+
+        memory = working_copy(sim.image)
+        for address, value in self.memory.items():
+            memory[address] = value
+        sim.memory = memory
+        sim.dirty = set(self.memory)
+
+    # ---------------------------------------------------------------- file format
+
+    def save(self, path: str):
+        header = json.dumps({
+            'model': self.model,
+            'version': self.VERSION,
+            'digest': self.digest,
+            'config': self.config,
+            'state': self.state,
+        }, separators=(',', ':')).encode()
+        addresses = array('I', self.memory.keys())
+        values = array('I', self.memory.values())
+        if sys.byteorder != 'little':
+            addresses.byteswap()
+            values.byteswap()
+        payload = struct.pack('<II', len(header), len(addresses)) + header \
+            + addresses.tobytes() + values.tobytes()
+        with open(path, 'wb') as f:
+            f.write(self.MAGIC + zlib.compress(payload, 6))
+
+    @classmethod
+    def load(cls, path: str) -> 'Checkpoint':
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] != cls.MAGIC:
+            raise ValueError(f"{path}: not a checkpoint file")
+        payload = zlib.decompress(data[4:])
+        header_length, count = struct.unpack_from('<II', payload)
+        offset = 8 + header_length
+        header = json.loads(payload[8:offset])
+        if header.get('version') not in (1, cls.VERSION):
+            raise ValueError(f"{path}: unsupported checkpoint version {header.get('version')}")
+
+        addresses = array('I', payload[offset:offset + 4 * count])
+        values = array('I', payload[offset + 4 * count:offset + 8 * count])
+        if sys.byteorder != 'little':
+            addresses.byteswap()
+            values.byteswap()
+        return cls(header['model'], header['digest'], header['state'], dict(zip(addresses, values)),
+                   header.get('config'))
+
+    # ---------------------------------------------------------------- ModelSim export
+
+    # Pipeline register fields that have an effect once the instruction moves on
+    ACTIVE_FIELDS = ('wb', 'mem', 'sp', 'out', 'call', 'int_', 'flag_en', 'flag_reset')
+
+    def is_drained(self) -> bool:
+        """True when no instruction is in flight (always true for the functional model)"""
+        if 'if_id' not in self.state:
+            return True
+        if self.state['if_id']['instr']:
+            return False
+        return not any(self.state[name].get(field)
+                       for name in ('id_ex', 'ex_mem', 'mem_wb') for field in self.ACTIVE_FIELDS)
+
+    def to_modelsim(self, image_path: str, prefix: str) -> List[str]:
+        """Write <prefix>.mem, <prefix>_reg.mem and <prefix>.do that start ModelSim from
+        this checkpoint instead of from reset. Returns the written paths."""
+        if not self.is_drained():
+            raise ValueError("pipeline registers are not empty; ModelSim can only be started "
+                             "from a functional checkpoint or a drained pipeline")
+
+        from memimage import open_image
+        with open_image(image_path) as image:
+            words = image.as_array()
+        if image_digest(words) != self.digest:
+            raise ValueError(f"{image_path} is not the image this checkpoint was taken from")
+        for address, value in self.memory.items():
+            words[address] = value
+
+        asm = RISCAssembler()
+        mem_file, reg_file, do_file = prefix + '.mem', prefix + '_reg.mem', prefix + '.do'
+        asm.write_memory([format(w, '032b') for w in words], mem_file)
+        asm.write_memory([format(r, '032b') for r in self.state['regs']], reg_file)
+
+        state = self.state
+        lines = [
+            "vsim -gui work.processor",
+            "add wave -position insertpoint sim:/processor/*",
+            f"mem load -i {{{os.path.abspath(reg_file)}}} /processor/DEC_Stage_inst/regfile_inst/register_file",
+            f"mem load -i {{{os.path.abspath(mem_file)}}} /processor/MEM_Fetch_Stage_inst/memory_inst/ram",
+            "",
+            f"force -deposit sim:/processor/MEM_Fetch_Stage_inst/PC_inst/PC {state['pc']:018b} 0",
+            f"force -deposit sim:/processor/MEM_Fetch_Stage_inst/SP_inst/SP_reg {state['sp']:018b} 0",
+            f"force -deposit sim:/processor/EX_stage_inst/NZC/Flags {state['flags']:03b} 0",
+            "",
+            "force -freeze sim:/processor/clk 1 0, 0 {100000 ps} -r 200ns",
+            "force -freeze sim:/processor/rst 0 0",
+            "force -freeze sim:/processor/external_INT 0 0",
+            f"force -freeze sim:/processor/input_port {state['input_port']:032b} 0",
+            "run",
+        ]
+        with open(do_file, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        return [mem_file, reg_file, do_file]
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Inspect and export simulation checkpoints")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    show = sub.add_parser('show', help="print the state stored in a checkpoint")
+    show.add_argument('checkpoint')
+
+    export = sub.add_parser('export', help="write .mem files and a do script that resume ModelSim")
+    export.add_argument('checkpoint')
+    export.add_argument('image', help="image the checkpoint was taken from")
+    export.add_argument('prefix', help="output prefix (writes <prefix>.mem, <prefix>_reg.mem, <prefix>.do)")
+
+    args = parser.parse_args()
+    try:
+        checkpoint = Checkpoint.load(args.checkpoint)
+        if args.command == 'export':
+            for path in checkpoint.to_modelsim(args.image, args.prefix):
+                print(f"Wrote {path}")
+            return
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    state = checkpoint.state
+    counter = 'cycle' if 'cycle' in state else 'instructions'
+    print(f"\n{'='*60}")
+    print(f"Checkpoint: {args.checkpoint} ({checkpoint.model} model)")
+    print(f"{'='*60}")
+    print(f"{counter.capitalize() + ':':15s}{state[counter]}")
+    print(f"PC:            0x{state['pc']:05X}")
+    print(f"SP:            0x{state['sp']:05X}")
+    print(f"Flags (NZC):   {state['flags']:03b}")
+    for i, value in enumerate(state['regs']):
+        print(f"R{i}:            0x{value:08X}")
+    print(f"Changed words: {len(checkpoint.memory)}")
+    for key, value in checkpoint.config.items():
+        print(f"{key.capitalize() + ':':15s}{value if value is not None else '-'}")
+    print(f"Drained:       {'yes' if checkpoint.is_drained() else 'no'}")
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Assembler - Daemon Mode
+Keeps an assembler warm behind a Unix socket; this file is also its client
+
+A do script that runs `python assembler.py program.asm` once per file pays
+interpreter startup, module imports and, above all, writing the full
+2^18-word image every time. The daemon (`python assembler.py --daemon`)
+runs the assembler command line in-process for each request and keeps the
+last image it wrote per output file: when that file is unchanged on disk
+(same size and mtime), only the words that differ are rewritten in place,
+as in watch mode. Everything else (.map, .lst, .obj, messages, exit
+status) is what `python assembler.py <args>` produces, except that file
+names are resolved against the client's directory and appear as absolute
+paths.
+
+The client (`python daemon.py <args>`) only imports os, socket, sys and
+typing, not the assembler. Without a running daemon it assembles
+in-process instead.
+
+Protocol, one request per connection:
+  request   the client's working directory and the arguments, separated
+            by tabs, ending with a newline
+  reply     a status line (the exit code, or 'stale') then the output
+
+The daemon stops when asked (`python daemon.py --stop`) and when one of
+the assembler modules it loaded has changed on disk, so a request never
+runs stale code; the client then runs that request in-process.
+"""
+
+import os
+import socket
+import sys
+from typing import Dict, List, Optional, Tuple
+
+
+def default_socket(variant: str = 'assembler') -> str:
+    """$RISC_ASM_SOCKET, else a per-user socket in $XDG_RUNTIME_DIR or /tmp"""
+    if os.environ.get('RISC_ASM_SOCKET'):
+        return os.environ['RISC_ASM_SOCKET']
+    directory = os.environ.get('XDG_RUNTIME_DIR') or '/tmp'
+    return os.path.join(directory, f"risc-{variant}-{os.getuid()}.sock")
+
+
+def option(args: List[str], name: str) -> Tuple[Optional[str], List[str]]:
+    """Remove '<name> <value>' from the arguments: (value, remaining arguments)"""
+    if name not in args:
+        return None, args
+    i = args.index(name)
+    if i + 1 >= len(args):
+        print(f"ERROR: {name} needs a value")
+        sys.exit(1)
+    return args[i + 1], args[:i] + args[i + 2:]
+
+
+# -------------------------------------------------------------------- server
+
+class AssemblerDaemon:
+    def __init__(self, socket_path: str, assembler_class, entry):
+        self.socket_path = socket_path
+        self.entry = entry  # assembler.main
+        self.images: Dict[str, Tuple[Tuple[int, int], Dict[int, int]]] = {}  # path -> (stat, words)
+
+        # The modules whose code the requests run; a change to any of them stops the daemon
+        import watch  # write_image patches through it (and it imports the linker)
+        self.modules = {sys.modules[c.__module__].__file__ for c in assembler_class.__mro__
+                        if c is not object}
+        self.modules.update(sys.modules[name].__file__ for name in (entry.__module__, 'watch', 'linker'))
+        self.modules = {os.path.abspath(path) for path in self.modules}
+        self.modules.add(os.path.abspath(__file__))
+        self.loaded = {path: os.stat(path).st_mtime_ns for path in self.modules}
+
+        daemon = self
+
+        class WarmAssembler(assembler_class):
+            def build_image(self, encoded):
+                self.placed = {address + i for address, words in encoded for i in range(len(words))
+                               if address + i < self.memory_size}
+                return super().build_image(encoded)
+
+            def write_output(self, memory, output_file):
+                daemon.write_image(self, memory, output_file, super().write_output)
+
+        WarmAssembler.__name__ = assembler_class.__name__
+        self.assembler_class = WarmAssembler
+
+    def write_image(self, assembler, memory: List[str], output_file: str, write_output):
+        """Patch the changed words when the file is still the image we last wrote"""
+        from watch import image_file_size, patch_image
+
+        path = os.path.abspath(output_file)
+        words = {address: int(memory[address], 2) for address in assembler.placed}
+        fill = int(assembler.opcodes['NOP'] + '0' * 27, 2)
+        cached = self.images.pop(path, None)
+        try:
+            st = os.stat(path)
+            current = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            current = None
+
+        if cached and cached[0] == current and current[1] == image_file_size(assembler, path):
+            previous = cached[1]
+            changes = {address: words.get(address, fill) for address in set(previous) | set(words)
+                       if previous.get(address, fill) != words.get(address, fill)}
+            patch_image(assembler, path, changes)
+        else:
+            write_output(memory, output_file)
+
+        st = os.stat(path)
+        self.images[path] = ((st.st_mtime_ns, st.st_size), words)
+
+    def stale(self) -> bool:
+        for path, mtime in self.loaded.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def run_request(self, cwd: str, args: List[str]) -> Tuple[int, str]:
+        """Run one assembler command line in-process: (exit status, output)"""
+        import contextlib
+        import io
+
+        if '--watch' in args or '--daemon' in args:
+            return 1, "ERROR: --watch and --daemon cannot be sent to the daemon\n"
+        # File arguments are relative to the client; the daemon's own directory never changes
+        args = [arg if arg.startswith('-') else os.path.join(cwd, arg) for arg in args]
+        output = io.StringIO()
+        status = 0
+        try:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                self.entry(self.assembler_class, args)
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else 1
+        except OSError as e:
+            output.write(f"ERROR: {e}\n")
+            status = 1
+        return status, output.getvalue()
+
+    def handle(self, connection: socket.socket) -> bool:
+        """Serve one connection; returns False when the daemon should stop"""
+        import time
+
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = connection.recv(65536)
+            if not chunk:
+                return True
+            data += chunk
+        cwd, *args = data[:-1].decode().split('\t')
+
+        if self.stale():
+            connection.sendall(b'stale\n')
+            print(f"[{time.strftime('%H:%M:%S')}] assembler source changed, stopping")
+            return False
+        if args == ['--stop']:
+            connection.sendall(b'0\nDaemon stopped\n')
+            print(f"[{time.strftime('%H:%M:%S')}] stop requested")
+            return False
+
+        start = time.perf_counter()
+        status, output = self.run_request(cwd, args)
+        connection.sendall(f"{status}\n".encode() + output.encode())
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"[{time.strftime('%H:%M:%S')}] {' '.join(args)}: "
+              f"{'ok' if status == 0 else f'exit {status}'} in {elapsed:.1f} ms")
+        return True
+
+    def serve(self):
+        """Accept requests one at a time until stopped (Ctrl+C to stop)"""
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+            raise OSError(f"a daemon is already listening on {self.socket_path}")
+        except (FileNotFoundError, ConnectionRefusedError):
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)  # left behind by a daemon that was killed
+        finally:
+            probe.close()
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        mask = os.umask(0o077)  # only this user may send requests
+        try:
+            server.bind(self.socket_path)
+        finally:
+            os.umask(mask)
+        server.listen(16)
+        print(f"Assembler daemon listening on {self.socket_path} (Ctrl+C to stop)")
+        try:
+            running = True
+            while running:
+                connection, _ = server.accept()
+                with connection:
+                    running = self.handle(connection)
+        except KeyboardInterrupt:
+            print("\nDaemon stopped")
+        finally:
+            server.close()
+            os.unlink(self.socket_path)
+
+
+def serve(assembler_class, entry, args: List[str]):
+    """assembler.py --daemon [--socket <path>]"""
+    module = sys.modules[assembler_class.__module__].__file__
+    path, args = option(args, '--socket')
+    path = path or default_socket(os.path.splitext(os.path.basename(module))[0])
+    try:
+        AssemblerDaemon(path, assembler_class, entry).serve()
+    except OSError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+# -------------------------------------------------------------------- client
+
+def request(path: str, args: List[str]) -> Optional[Tuple[str, bytes]]:
+    """Send one command line: (status, output), or None when no daemon is listening"""
+    if any('\t' in arg or '\n' in arg for arg in args) or '\t' in os.getcwd():
+        return None  # not representable in the protocol; run in-process
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        client.close()
+        return None
+    with client:
+        client.sendall('\t'.join([os.getcwd()] + args).encode() + b'\n')
+        chunks = []
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    status, _, output = b''.join(chunks).partition(b'\n')
+    return status.decode(), output
+
+
+def main():
+    """Client: python daemon.py [--socket <path>] [--variant <module>] <assembler arguments> | --stop"""
+    args = sys.argv[1:]
+    variant, args = option(args, '--variant')
+    variant = variant or 'assembler'
+    path, args = option(args, '--socket')
+    path = path or default_socket(variant)
+
+    reply = request(path, args)
+    if reply is None and args == ['--stop']:
+        print(f"No daemon listening on {path}")
+        sys.exit(1)
+    if reply is not None and reply[0] != 'stale':
+        sys.stdout.buffer.write(reply[1])
+        sys.stdout.flush()
+        sys.exit(int(reply[0]))
+
+    # No daemon (or it just stopped for a changed assembler): assemble in-process
+    import assembler
+    assembler.main(__import__(variant).RISCAssembler, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,613 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Differential Fuzzer
+Constrained-random programs run on the pipeline and functional models
+
+Programs are generated from the assembler's opcode/operand classes and
+biased towards the hazard pairs the pipeline has to get right:
+  - a source register written by one of the previous two instructions
+  - load-use after POP / LDD
+  - SWAP back-to-back with a shared register (--include-known only)
+  - STD right after LDD (and LDD right after STD) on the same word
+  - JZ/JN/JC right after a flag-setting instruction
+Control flow only goes forward (branch targets lie ahead, CALL/INT go to
+short leaf routines), so every program terminates.
+
+Each program is assembled in memory and run to HLT on both models in a
+process pool; registers, flags, SP, memory and the OUT value sequence are
+compared. A mismatching program is shrunk by delta debugging (removing
+chunks of lines while the same state still differs) and the minimal
+reproducer is written as a .asm file.
+
+Every instruction is generated, but the generator steers around the
+adjacency patterns behind the documented hardware differences
+(AVOIDED_PATTERNS: STD right before INT, SWAP Rx, Rx, two SWAPs within two
+slots, IN within two slots of an R0 writer); --include-known generates
+them too. A mismatch counts as a known difference (KNOWN_DIFFERENCES) only
+when the program contains the pattern and the models agree once the
+pattern's instructions are removed; every other mismatch is unexplained
+and fails the run.
+
+Layout of a generated program:
+    M[0]        reset vector -> 0x100
+    M[2], M[3]  INT 0 / INT 1 vectors -> handlers at 0x300 / 0x340
+    0x100       register setup, random body, HLT
+    0x200+      subroutines (ending in RET)
+    0x8000      data words addressed as offset(R7); R7 is never written
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from assembler import RISCAssembler
+from pipeline import PipelineSimulator
+from simulator import FunctionalSimulator
+
+CODE_BASE = 0x100
+SUBROUTINE_BASE = 0x200
+SUBROUTINE_STRIDE = 0x10
+HANDLER_BASE = 0x300
+HANDLER_STRIDE = 0x40
+DATA_BASE = 0x8000
+DATA_WORDS = 16
+
+# R7 holds DATA_BASE for the whole program
+BASE_REGISTER = 7
+REGISTERS = list(range(7))
+
+FLAG_SETTERS = ['NOT', 'INC', 'ADD', 'SUB', 'AND', 'IADD']
+
+# Documented differences between the hardware and the specification
+KNOWN_DIFFERENCES = {
+    'setc': "SETC clears C (set_carry is wired into the N bit)",
+    'int': "INT pushes and vectors through the wrong words",
+    'std-int': "an STD right before INT stores into the vector word M[2]/M[3]",
+    'call-ret': "RET/RTI right after CALL/INT lose the return address",
+    'swap-self': "SWAP Rx, Rx clears Rx (XOR swap)",
+    'swap-swap': "a SWAP within two instructions of another SWAP does one pass",
+    'in': "IN within two instructions of one that writes R0 forwards that value",
+}
+# Known differences the generator steers around unless include_known is set
+# (SETC and INT are wrong on every execution; routines are never empty, so
+# call-ret does not occur)
+AVOIDED_PATTERNS = ('std-int', 'swap-self', 'swap-swap', 'in')
+# Instructions back within which the hazard patterns apply
+HAZARD_WINDOW = 2
+
+# A program line: (text, fixed). Fixed lines are part of the skeleton and
+# are never removed by the shrinker.
+Program = List[Tuple[str, bool]]
+
+
+class ProgramGenerator:
+    def __init__(self, length: int = 40, ops: Optional[List[str]] = None,
+                 hazard_rate: float = 0.6, assembler_class=RISCAssembler,
+                 include_known: bool = False):
+        asm = assembler_class()
+        self.asm = asm
+        self.length = length
+        self.hazard_rate = hazard_rate
+        self.include_known = include_known
+        # HLT only ends the program; RET/RTI only end subroutines/handlers
+        generated = [op for op in asm.opcodes if op not in ('HLT', 'RET', 'RTI')]
+        self.ops = [op for op in (ops or generated) if op in generated]
+        if not self.ops:
+            raise ValueError("No instructions left to generate")
+
+    # ---------------------------------------------------------------- operands
+
+    def source(self, rng: random.Random, recent: List[int]) -> int:
+        """Source register, usually one written by a recent instruction"""
+        if recent and rng.random() < self.hazard_rate:
+            return rng.choice(recent[-2:])
+        return rng.choice(REGISTERS)
+
+    @staticmethod
+    def hex(value: int) -> str:
+        return format(value, 'X')
+
+    def instruction(self, rng: random.Random, op: str, recent: List[int],
+                    state: Dict) -> Tuple[List[str], Optional[int]]:
+        """Lines for one instruction and the register it writes (or None)"""
+        asm = self.asm
+        src = self.source(rng, recent)
+        dst = rng.choice(REGISTERS)
+        offset = self.hex(rng.randrange(DATA_WORDS))
+
+        if op in asm.type1_no_op:
+            return [op], None
+        if op in asm.type1_one_op:
+            return [f"{op} R{src if op != 'IN' else dst}"], src if op != 'IN' else dst
+        if op in asm.type1_one_op_special:
+            return [f"{op} R{src}"], None
+        if op == 'MOV':
+            return [f"MOV R{src}, R{dst}"], dst
+        if op == 'SWAP':
+            other = rng.choice(REGISTERS)
+            return [f"SWAP R{src}, R{other}"], other
+        if op in asm.type2_three_op:
+            return [f"{op} R{dst}, R{src}, R{self.source(rng, recent)}"], dst
+        if op in asm.type2_imm:
+            return [f"{op} R{dst}, R{src}, {self.hex(rng.getrandbits(16))}"], dst
+        if op == 'PUSH':
+            state['depth'] += 1
+            return [f"PUSH R{src}"], None
+        if op == 'POP':
+            if not state['depth']:
+                return [], None
+            state['depth'] -= 1
+            return [f"POP R{dst}"], dst
+        if op in asm.type3_imm:
+            return [f"{op} R{dst}, {self.hex(rng.getrandbits(16))}"], dst
+        if op == 'LDD':
+            return [f"LDD R{dst}, {offset}(R{BASE_REGISTER})"], dst
+        if op == 'STD':
+            return [f"STD R{src}, {offset}(R{BASE_REGISTER})"], None
+        if op == 'CALL':
+            state['calls'] = max(state['calls'], 1)
+            index = rng.randrange(state['subroutines'])
+            return [f"CALL s{index}"], None
+        if op == 'INT':
+            return [f"INT {rng.randrange(2)}"], None
+        if op in asm.type4_imm:
+            state['labels'] += 1
+            label = f"L{state['labels']}"
+            state['pending'].append([rng.randint(1, 4), label])
+            return [f"{op} {label}"], None
+        raise ValueError(f"Cannot generate {op}")
+
+    def pattern(self, rng: random.Random, state: Dict) -> List[str]:
+        """Instructions of one hazard pair (operands are chosen later)"""
+        ops = self.ops
+        choices = []
+        if 'POP' in ops:
+            choices.append('pop-use')
+        if 'SWAP' in ops and self.include_known:
+            choices.append('swap-swap')
+        if 'LDD' in ops and 'STD' in ops:
+            choices.append('ldd-std')
+        if any(j in ops for j in ('JZ', 'JN', 'JC')) and any(f in ops for f in FLAG_SETTERS):
+            choices.append('flags-branch')
+        if not choices:
+            return []
+        kind = rng.choice(choices)
+        users = [op for op in ops if op in FLAG_SETTERS + ['MOV', 'OUT', 'PUSH', 'STD']] or ops
+        if kind == 'pop-use':
+            steps = [] if state['depth'] or 'PUSH' not in ops else ['PUSH']
+            return steps + ['POP', rng.choice(users)]
+        if kind == 'swap-swap':
+            return ['SWAP', 'SWAP']
+        if kind == 'ldd-std':
+            return rng.choice([['LDD', 'STD'], ['STD', 'LDD']])
+        setter = rng.choice([f for f in FLAG_SETTERS if f in ops])
+        branch = rng.choice([j for j in ('JZ', 'JN', 'JC') if j in ops])
+        return [setter, branch]
+
+    # ---------------------------------------------------------------- programs
+
+    def routine(self, rng: random.Random, name: str, ending: str) -> Program:
+        """A short leaf routine (ALU work only)"""
+        alu_ops = [op for op in self.ops if op in FLAG_SETTERS + ['MOV', 'OUT', 'LDM']] or ['NOP']
+        lines: Program = [(f"{name}:", True)]
+        recent: List[int] = []
+        state = {'depth': 0, 'labels': 0, 'pending': [], 'calls': 0, 'subroutines': 0}
+        for _ in range(rng.randint(1, 4)):
+            text, written = self.instruction(rng, rng.choice(alu_ops), recent, state)
+            lines += [(t, False) for t in text]
+            if written is not None:
+                recent.append(written)
+        lines.append((ending, True))
+        return lines
+
+    def generate(self, seed: int) -> Tuple[Program, int]:
+        """Program lines and the input-port value for one seed"""
+        rng = random.Random(seed)
+        state = {'depth': 0, 'labels': 0, 'pending': [], 'calls': 0, 'subroutines': 3}
+
+        program: Program = [("# generated program, seed %d" % seed, True),
+                            (".ORG 0", True), (self.hex(CODE_BASE), True)]
+        if 'INT' in self.ops:
+            for index in range(2):
+                program += [(f".ORG {index + 2}", True),
+                            (self.hex(HANDLER_BASE + index * HANDLER_STRIDE), True)]
+        for word in range(DATA_WORDS):
+            program += [(f".ORG {self.hex(DATA_BASE + word)}", True),
+                        (self.hex(rng.getrandbits(32)), True)]
+
+        program += [(f".ORG {self.hex(CODE_BASE)}", True),
+                    (f"LDM R{BASE_REGISTER}, {self.hex(DATA_BASE)}", True)]
+        for reg in REGISTERS:
+            program.append((f"LDM R{reg}, {self.hex(rng.getrandbits(16))}", False))
+
+        recent: List[int] = []
+        body: List[List[str]] = []
+        queue: List[str] = []
+        emitted = 0
+        while emitted < self.length:
+            if not queue:
+                if rng.random() < 0.3:
+                    queue = self.pattern(rng, state)
+                if not queue:
+                    queue = [rng.choice(self.ops)]
+            op = queue.pop(0)
+            text, written = self.instruction(rng, op, recent, state)
+            if not text:
+                continue
+            # SWAP, IN and INT are the only instructions that complete an
+            # avoided pattern, and they leave state untouched, so dropping
+            # them here is safe
+            body.append(operands(text[0]))
+            if not self.include_known and set(patterns_at(body, len(body) - 1)) & set(AVOIDED_PATTERNS):
+                body.pop()
+                continue
+            program += [(t, False) for t in text]
+            emitted += 1
+            if written is not None:
+                recent.append(written)
+            # Place branch labels once their distance has elapsed
+            for entry in list(state['pending']):
+                entry[0] -= 1
+                if entry[0] <= 0:
+                    program.append((f"{entry[1]}:", False))
+                    state['pending'].remove(entry)
+        for _, label in state['pending']:
+            program.append((f"{label}:", False))
+        program.append(("HLT", True))
+
+        if state['calls']:
+            for index in range(state['subroutines']):
+                program.append((f".ORG {self.hex(SUBROUTINE_BASE + index * SUBROUTINE_STRIDE)}", True))
+                program += self.routine(rng, f"s{index}", "RET")
+        if 'INT' in self.ops:
+            for index in range(2):
+                program.append((f".ORG {self.hex(HANDLER_BASE + index * HANDLER_STRIDE)}", True))
+                program += self.routine(rng, f"h{index}", "RTI")
+        return program, rng.getrandbits(32)
+
+
+def operands(text: str) -> List[str]:
+    """Mnemonic and operands of one line, upper case ('SWAP R1, R2' -> ['SWAP', 'R1', 'R2'])"""
+    return text.replace(',', ' ').upper().split()
+
+
+def written_registers(parts: List[str]) -> List[str]:
+    """Registers an instruction writes"""
+    name = parts[0]
+    if name in ('OUT', 'PUSH', 'STD') or len(parts) < 2 or not parts[1].startswith('R'):
+        return []
+    if name == 'MOV':
+        return parts[2:3]
+    if name == 'SWAP':
+        return parts[1:3]
+    return parts[1:2]
+
+
+def patterns_at(body: List[List[str]], index: int) -> List[str]:
+    """KNOWN_DIFFERENCES patterns completed by instruction index of a straight-line body"""
+    parts = body[index]
+    name = parts[0]
+    before = body[max(0, index - HAZARD_WINDOW):index]
+    found = []
+    if name == 'SETC':
+        found.append('setc')
+    if name == 'INT':
+        found.append('int')
+        if before and before[-1][0] == 'STD':
+            found.append('std-int')
+    if name == 'SWAP':
+        if len(parts) > 2 and parts[1] == parts[2]:
+            found.append('swap-self')
+        if any(other[0] == 'SWAP' for other in before):
+            found.append('swap-swap')
+    if name == 'IN' and any(other[0] != 'IN' and 'R0' in written_registers(other) for other in before):
+        found.append('in')
+    return found
+
+
+def known_differences(program: Program) -> Dict[str, List[int]]:
+    """KNOWN_DIFFERENCES patterns in a program: {name: indexes of the lines that complete them}
+
+    Instructions are adjacent in program order; a CALL label / INT n (which
+    enters handler hn) matches call-ret when the routine starts with RET/RTI.
+    """
+    mnemonics = RISCAssembler().opcodes
+    body: List[List[str]] = []
+    lines: List[int] = []
+    entries: Dict[str, List[str]] = {}
+    labels: List[str] = []
+    for line, (text, _) in enumerate(program):
+        parts = operands(text)
+        if parts and parts[0].endswith(':'):
+            labels.append(parts[0][:-1])
+        elif parts and parts[0] in mnemonics:
+            for label in labels:
+                entries[label] = parts
+            labels = []
+            body.append(parts)
+            lines.append(line)
+
+    found: Dict[str, List[int]] = {}
+    for index, parts in enumerate(body):
+        names = patterns_at(body, index)
+        if parts[0] in ('CALL', 'INT') and len(parts) > 1:
+            target = parts[1] if parts[0] == 'CALL' else 'H' + parts[1]
+            if target in entries and entries[target][0] in ('RET', 'RTI'):
+                names.append('call-ret')
+        for name in names:
+            found.setdefault(name, []).append(lines[index])
+    return found
+
+
+def explain(program: Program, input_value: int, max_cycles: int,
+            assembler_class=RISCAssembler) -> List[str]:
+    """Known differences that account for every mismatch of a program, or []
+
+    The mismatches are explained when the models agree once the instructions
+    completing the matched patterns are replaced by NOPs (which keeps every
+    other instruction the same distance apart).
+    """
+    found = known_differences(program)
+    patched = {line for lines in found.values() for line in lines}
+    if not patched:
+        return []
+    rest = [("NOP", fixed) if i in patched else (text, fixed) for i, (text, fixed) in enumerate(program)]
+    return sorted(found) if mismatches(rest, input_value, max_cycles, assembler_class) == {} else []
+
+
+# -------------------------------------------------------------------- execution
+
+def assemble(program: Program, assembler_class=RISCAssembler) -> List[int]:
+    """Assemble program lines into a full memory image of integers"""
+    asm = assembler_class()
+    processed = asm.first_pass([text + '\n' for text, _ in program])
+    encoded, errors = asm.second_pass(processed)
+    if errors:
+        line_num, line, message = errors[0]
+        raise ValueError(f"line {line_num}: {line}: {message}")
+    memory = [0] * asm.memory_size
+    for address, words in encoded:
+        for i, word in enumerate(words):
+            memory[address + i] = int(word, 2)
+    return memory
+
+
+def compare(memory: List[int], input_value: int, max_cycles: int,
+            assembler_class=RISCAssembler) -> Tuple[Dict[str, str], int]:
+    """Run both models; returns ({field: description} of differences, pipeline cycles)"""
+    pipe = PipelineSimulator(memory)
+    pipe.input_port = input_value
+    pipe.reset()
+    cycles = pipe.run(max_cycles)
+
+    func = FunctionalSimulator(memory, assembler_class)
+    func.input_port = input_value
+    func.reset()
+    func.run(max_cycles)
+
+    diffs: Dict[str, str] = {}
+    if not pipe.halted:
+        diffs['halt'] = f"pipeline did not halt within {max_cycles} cycles"
+    if not func.halted:
+        diffs['halt'] = f"functional model did not halt within {max_cycles} instructions"
+    for reg in range(8):
+        if pipe.regs[reg] != func.regs[reg]:
+            diffs[f"R{reg}"] = f"pipeline 0x{pipe.regs[reg]:X}, functional 0x{func.regs[reg]:X}"
+    if pipe.flags != func.flags:
+        diffs['flags'] = f"pipeline {pipe.flags:03b}, functional {func.flags:03b} (NZC)"
+    if pipe.sp != func.sp:
+        diffs['SP'] = f"pipeline 0x{pipe.sp:05X}, functional 0x{func.sp:05X}"
+    pipe_out = [value for _, value in pipe.output_trace]
+    func_out = [value for _, value in func.output_trace]
+    if pipe_out != func_out:
+        diffs['OUT'] = (f"pipeline [{', '.join(f'{v:X}' for v in pipe_out)}], "
+                        f"functional [{', '.join(f'{v:X}' for v in func_out)}]")
+    if pipe.memory != func.memory:
+        for address, (a, b) in enumerate(zip(pipe.memory, func.memory)):
+            if a != b:
+                diffs[f"M[{address:05X}]"] = f"pipeline 0x{a:X}, functional 0x{b:X}"
+    return diffs, cycles
+
+
+def mismatches(program: Program, input_value: int, max_cycles: int,
+               assembler_class=RISCAssembler) -> Optional[Dict[str, str]]:
+    """Differences for a program, or None when it does not assemble"""
+    try:
+        memory = assemble(program, assembler_class)
+    except ValueError:
+        return None
+    return compare(memory, input_value, max_cycles, assembler_class)[0]
+
+
+def shrink(program: Program, input_value: int, max_cycles: int,
+           assembler_class=RISCAssembler) -> Tuple[Program, Dict[str, str]]:
+    """Delta debugging over the removable lines, keeping a shared difference"""
+    target = set(mismatches(program, input_value, max_cycles, assembler_class) or {})
+
+    def interesting(candidate: Program) -> Optional[Dict[str, str]]:
+        diffs = mismatches(candidate, input_value, max_cycles, assembler_class)
+        return diffs if diffs and target & set(diffs) else None
+
+    removable = [i for i, (_, fixed) in enumerate(program) if not fixed]
+    chunks = 2
+    while len(removable) >= 2:
+        size = max(1, len(removable) // chunks)
+        reduced = False
+        for start in range(0, len(removable), size):
+            drop = set(removable[start:start + size])
+            candidate = [line for i, line in enumerate(program) if i not in drop]
+            if interesting(candidate):
+                program = candidate
+                removable = [i for i, (_, fixed) in enumerate(program) if not fixed]
+                chunks = max(chunks - 1, 2)
+                reduced = True
+                break
+        if not reduced:
+            if size == 1:
+                break
+            chunks = min(chunks * 2, len(removable))
+    return program, mismatches(program, input_value, max_cycles, assembler_class) or {}
+
+
+# -------------------------------------------------------------------- worker pool
+
+_generator: Optional[ProgramGenerator] = None
+_settings: Dict = {}
+
+
+def init_worker(settings: Dict):
+    global _generator, _settings
+    _settings = settings
+    _generator = ProgramGenerator(settings['length'], settings['ops'], settings['hazard_rate'],
+                                  settings['assembler_class'], settings['include_known'])
+
+
+def run_seed(seed: int) -> Tuple[int, Optional[Dict[str, str]], int, List[str]]:
+    """Generate and check one program: (seed, differences or None, cycles, known differences)"""
+    program, input_value = _generator.generate(seed)
+    memory = assemble(program, _settings['assembler_class'])
+    diffs, cycles = compare(memory, input_value, _settings['max_cycles'], _settings['assembler_class'])
+    known = explain(program, input_value, _settings['max_cycles'], _settings['assembler_class']) if diffs else []
+    return seed, diffs or None, cycles, known
+
+
+def shrink_seed(seed: int) -> Tuple[int, Program, Dict[str, str]]:
+    program, input_value = _generator.generate(seed)
+    program, diffs = shrink(program, input_value, _settings['max_cycles'], _settings['assembler_class'])
+    return seed, program, diffs
+
+
+def field_kind(field: str) -> str:
+    """'registers' for R0..R7, 'memory' for M[...], otherwise the field itself"""
+    if field.startswith('M['):
+        return 'memory'
+    if field[0] == 'R' and field[1:].isdigit():
+        return 'registers'
+    return field
+
+
+def write_reproducer(path: str, seed: int, program: Program, diffs: Dict[str, str], input_value: int):
+    with open(path, 'w') as f:
+        f.write(f"# Minimal reproducer for fuzz seed {seed} (input port 0x{input_value:X})\n")
+        for field, description in diffs.items():
+            f.write(f"# {field}: {description}\n")
+        mnemonics = RISCAssembler().opcodes
+        for text, _ in program:
+            indent = "    " if text.split()[0].upper() in mnemonics else ""
+            f.write(indent + text + "\n")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Differential fuzzing of the pipeline model")
+    parser.add_argument('--programs', type=int, default=1000, help="programs to run (default 1000)")
+    parser.add_argument('--seed', type=int, default=0, help="first seed (program i uses seed+i)")
+    parser.add_argument('--length', type=int, default=40, help="instructions per program (default 40)")
+    parser.add_argument('--hazard-rate', type=float, default=0.6,
+                        help="probability of reading a recently written register (default 0.6)")
+    parser.add_argument('--ops', help="comma separated instructions to generate (default: all)")
+    parser.add_argument('--exclude', help="comma separated instructions not to generate")
+    parser.add_argument('--include-known', action='store_true',
+                        help="also generate the adjacency patterns of the documented hardware "
+                             f"differences ({', '.join(AVOIDED_PATTERNS)})")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--max-cycles', type=int, default=5000)
+    parser.add_argument('--shrink', type=int, default=5, help="mismatches to shrink (default 5)")
+    parser.add_argument('--out', default='fuzz_failures', help="directory for reproducers")
+    parser.add_argument('--replay', type=int, help="print the program for one seed and compare it")
+    parser.add_argument('--variant', default='assembler',
+                        help="assembler module used to build programs (assembler or assembler2)")
+    args = parser.parse_args()
+
+    assembler_class = __import__(args.variant).RISCAssembler
+    if args.ops:
+        ops = [op.strip().upper() for op in args.ops.split(',')]
+    else:
+        ops = list(assembler_class().opcodes)
+    if args.exclude:
+        excluded = {op.strip().upper() for op in args.exclude.split(',')}
+        ops = [op for op in ops if op not in excluded]
+    settings = {'length': args.length, 'ops': ops, 'hazard_rate': args.hazard_rate,
+                'max_cycles': args.max_cycles, 'assembler_class': assembler_class,
+                'include_known': args.include_known}
+
+    try:
+        init_worker(settings)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    if args.replay is not None:
+        program, input_value = _generator.generate(args.replay)
+        for text, _ in program:
+            print(text)
+        _, diffs, cycles, known = run_seed(args.replay)
+        print(f"\n# input port 0x{input_value:X}, {cycles} cycles")
+        for field, description in (diffs or {}).items():
+            print(f"# {field}: {description}")
+        for name in known:
+            print(f"# known difference: {KNOWN_DIFFERENCES[name]}")
+        print("# models agree" if not diffs else "")
+        return
+
+    print(f"\n{'='*60}")
+    print(f"Fuzzing {args.programs} programs with {args.jobs} worker(s)")
+    print(f"{'='*60}")
+
+    start = time.perf_counter()
+    failures: List[Tuple[int, Dict[str, str]]] = []
+    explained: List[Tuple[int, Dict[str, str]]] = []
+    known_counts: Dict[str, int] = {}
+    total_cycles = 0
+    seeds = range(args.seed, args.seed + args.programs)
+    with multiprocessing.Pool(args.jobs, init_worker, (settings,)) as pool:
+        for seed, diffs, cycles, known in pool.imap_unordered(run_seed, seeds, chunksize=16):
+            total_cycles += cycles
+            if diffs and known:
+                explained.append((seed, diffs))
+                for name in known:
+                    known_counts[name] = known_counts.get(name, 0) + 1
+            elif diffs:
+                failures.append((seed, diffs))
+        elapsed = time.perf_counter() - start
+
+        print(f"Programs:      {args.programs} in {elapsed:.1f} s "
+              f"({args.programs / elapsed * 60:.0f} programs/minute)")
+        print(f"Cycles:        {total_cycles} simulated")
+        if explained:
+            print(f"Known:         {len(explained)} mismatch(es) explained by a known hardware difference")
+            for name, count in sorted(known_counts.items(), key=lambda k: -k[1]):
+                print(f"  {count:5d}  {KNOWN_DIFFERENCES[name]}")
+        print(f"Mismatches:    {len(failures)}" + (" unexplained" if explained else ""))
+
+        # Group by the kinds of state that differ
+        groups: Dict[str, List[int]] = {}
+        for seed, diffs in sorted(failures):
+            key = ', '.join(sorted({field_kind(field) for field in diffs}))
+            groups.setdefault(key, []).append(seed)
+        for key, group in sorted(groups.items(), key=lambda g: -len(g[1])):
+            print(f"  {len(group):5d}  {key}  (e.g. seed {group[0]})")
+
+        # Reproducers for known differences only when nothing new turned up
+        to_shrink = [seed for seed, _ in sorted(failures or explained)[:args.shrink]]
+        if to_shrink:
+            os.makedirs(args.out, exist_ok=True)
+            print(f"\nShrinking {len(to_shrink)} mismatch(es)...")
+            for seed, program, diffs in pool.imap_unordered(shrink_seed, to_shrink):
+                input_value = _generator.generate(seed)[1]
+                path = os.path.join(args.out, f"seed_{seed}.asm")
+                write_reproducer(path, seed, program, diffs, input_value)
+                size = sum(1 for _, fixed in program if not fixed)
+                print(f"  seed {seed}: {size} line(s) -> {path}")
+                for field, description in diffs.items():
+                    print(f"      {field}: {description}")
+    print(f"{'='*60}\n")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Source Coverage and Hot Spots
+Execution counts of a simulation mapped back to the assembly source
+
+The assembler writes an address -> source line map (.map) next to every
+image. A program is run on the pipeline or functional model with
+per-address counters enabled (enable_profile()); the counts are folded
+onto source lines through the map and reported as
+  - an annotated listing: executions (and cycles on the pipeline model)
+    per line, '#####' marking instructions that never ran
+  - line coverage of the instructions in the source
+  - the hottest lines and loops; a loop is a backward JMP/JZ/JN/JC and
+    the contiguous code up to its target, its iterations counted at the
+    target line
+
+Inputs are .asm sources (assembled in memory) or images with their .map.
+"""
+
+import argparse
+import json
+import os
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from assembler import RISCAssembler
+
+MODELS = ('pipeline', 'functional')
+
+
+@dataclass
+class LineProfile:
+    line_num: int
+    text: str
+    addresses: List[int]
+    executions: int = 0
+    cycles: int = 0
+
+    @property
+    def executed(self) -> bool:
+        # HLT is never issued by the pipeline model but holds decode
+        return bool(self.executions or self.cycles)
+
+
+class SourceMap:
+    def __init__(self, source: str, lines: List[List[int]]):
+        self.source = source
+        self.lines = lines  # [address, line_num, words, is_data_value]
+
+    @classmethod
+    def load(cls, path: str) -> 'SourceMap':
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.get('format') != RISCAssembler.LINE_MAP_FORMAT:
+            raise ValueError(f"{path}: not a line map")
+        source = data['source']
+        if not os.path.isabs(source) and not os.path.exists(source):
+            # Relative to the directory the assembler ran in; try next to the map
+            candidate = os.path.join(os.path.dirname(path), os.path.basename(source))
+            source = candidate if os.path.exists(candidate) else source
+        return cls(source, data['lines'])
+
+    @classmethod
+    def assemble(cls, path: str, assembler_class=RISCAssembler) -> Tuple['SourceMap', List[int]]:
+        """Assemble a source in memory: (line map, image words)"""
+        asm = assembler_class()
+        with open(path, 'r') as f:
+            lines = f.readlines()
+        processed_lines = asm.first_pass(lines)
+        encoded, errors = asm.second_pass(processed_lines)
+        if errors:
+            line_num, line, message = errors[0]
+            raise ValueError(f"line {line_num}: {line}: {message}")
+        words = [int(word, 2) for word in asm.build_image(encoded)]
+        return cls(path, asm.line_map(processed_lines, encoded)), words
+
+
+# -------------------------------------------------------------------- profiling
+
+def run_profile(memory, model: str, limit: int, stimulus=None,
+                assembler_class=RISCAssembler) -> Tuple[object, array, Optional[array]]:
+    """Run a program with counters enabled: (simulator, exec_counts, cycle_counts)"""
+    if model == 'pipeline':
+        from pipeline import PipelineSimulator
+        sim = PipelineSimulator(memory)
+        sim.reset()
+        sim.enable_profile()
+        sim.run(limit, stimulus)
+        return sim, sim.exec_counts, sim.cycle_counts
+
+    from simulator import FunctionalSimulator
+    sim = FunctionalSimulator(memory, assembler_class)
+    sim.reset()
+    sim.enable_profile()
+    sim.run(limit, stimulus)
+    return sim, sim.exec_counts, None
+
+
+def fold(source_map: SourceMap, exec_counts: array,
+         cycle_counts: Optional[array]) -> List[LineProfile]:
+    """Per-line counts; lines of the source that hold no instruction are omitted"""
+    with open(source_map.source, 'r') as f:
+        text = [line.rstrip('\r\n') for line in f]
+
+    profiles: Dict[int, LineProfile] = {}
+    for address, line_num, words, is_data_value in source_map.lines:
+        if is_data_value:
+            continue
+        profile = profiles.get(line_num)
+        if profile is None:
+            line = text[line_num - 1] if line_num <= len(text) else ''
+            profile = profiles[line_num] = LineProfile(line_num, line, [])
+        profile.addresses.append(address)
+        if address < len(exec_counts):
+            # Only the first word is executed; the second holds the immediate
+            profile.executions += exec_counts[address]
+            if cycle_counts is not None:
+                profile.cycles += sum(cycle_counts[address:address + words])
+    return sorted(profiles.values(), key=lambda p: p.line_num)
+
+
+def find_loops(source_map: SourceMap, memory, profiles: List[LineProfile],
+               assembler_class=RISCAssembler) -> List[Dict]:
+    """Backward jumps and branches, with the counts of the lines they enclose"""
+    asm = assembler_class()
+    jumps = {int(asm.opcodes[name], 2) for name in ('JMP', 'JZ', 'JN', 'JC')}
+    code = [item for item in source_map.lines if not item[3]]
+    by_address = {address: line_num for address, line_num, _, _ in code}
+    by_line = {p.line_num: p for p in profiles}
+    covered = {address + i for address, _, words, _ in code for i in range(words)}
+
+    loops = []
+    for address, line_num, words, _ in code:
+        if words != 2 or (memory[address] >> 27) not in jumps:
+            continue
+        target = memory[address + 1] & 0xFFFF
+        if target > address or target not in by_address:
+            continue
+        if any(a not in covered for a in range(target, address)):
+            continue  # a jump back to another .ORG block, not a loop
+        body = [by_line[by_address[a]] for a in range(target, address + 1) if a in by_address]
+        loops.append({
+            'first_line': by_address[target],
+            'last_line': line_num,
+            'iterations': by_line[by_address[target]].executions,
+            'executions': sum(p.executions for p in body),
+            'cycles': sum(p.cycles for p in body),
+        })
+    return loops
+
+
+# -------------------------------------------------------------------- reports
+
+def write_annotated(profiles: List[LineProfile], source: str, path: str, with_cycles: bool):
+    """Listing of the whole source: count columns, '#####' for unexecuted instructions"""
+    by_line = {p.line_num: p for p in profiles}
+    with open(source, 'r') as f:
+        text = [line.rstrip('\r\n') for line in f]
+    with open(path, 'w') as out:
+        for line_num, line in enumerate(text, 1):
+            profile = by_line.get(line_num)
+            if profile is None:
+                count = cycles = '-'
+            elif not profile.executed:
+                count, cycles = '#####', ''
+            else:
+                count, cycles = str(profile.executions), str(profile.cycles)
+            prefix = f"{count:>10s}:" + (f"{cycles:>10s}:" if with_cycles else "")
+            out.write(f"{prefix}{line_num:5d}: {line}\n")
+
+
+def print_report(title: str, profiles: List[LineProfile], loops: List[Dict],
+                 weight: str, total: int, top: int):
+    """Coverage summary, hottest lines and loops, ranked by 'cycles' or 'executions'"""
+    executed = [p for p in profiles if p.executed]
+    total = total or 1
+
+    print(f"\n{'='*60}")
+    print(f"Coverage: {title}")
+    print(f"{'='*60}")
+    print(f"Instruction lines: {len(profiles)}")
+    if profiles:
+        print(f"Executed:          {len(executed)} ({len(executed) / len(profiles) * 100:.1f}%)")
+    outside = total - sum(getattr(p, weight) for p in profiles)
+    if outside:
+        print(f"Outside the source: {outside} {weight} ({outside / total * 100:.1f}%, e.g. NOP fill)")
+
+    print(f"\nHottest lines (by {weight}):")
+    ranked = sorted(executed, key=lambda p: getattr(p, weight), reverse=True)[:top]
+    for p in ranked:
+        value = getattr(p, weight)
+        print(f"  line {p.line_num:5d}  {value:10d}  {value / total * 100:5.1f}%  {p.text.strip()}")
+
+    if loops:
+        print(f"\nHottest loops (by {weight}):")
+        for loop in sorted(loops, key=lambda l: l[weight], reverse=True)[:top]:
+            print(f"  lines {loop['first_line']:4d}-{loop['last_line']:<4d}  {loop[weight]:10d}  "
+                  f"{loop[weight] / total * 100:5.1f}%  {loop['iterations']} iteration(s)")
+
+    missed = [p for p in profiles if not p.executed]
+    if missed:
+        print(f"\nNever executed ({len(missed)} line(s)):")
+        for p in missed[:top]:
+            print(f"  line {p.line_num:5d}  {p.text.strip()}")
+        if len(missed) > top:
+            print(f"  ... {len(missed) - top} more")
+    print(f"{'='*60}\n")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Source line coverage and hot spots of a simulation run")
+    parser.add_argument('program', help=".asm source, or .mem/.bin image with its .map next to it")
+    parser.add_argument('--map', help="line map (default: the image name with .map)")
+    parser.add_argument('--model', default='pipeline', choices=MODELS)
+    parser.add_argument('--max-cycles', type=int, default=100000,
+                        help="cycle (pipeline) / instruction (functional) limit")
+    parser.add_argument('--stimulus', help="stimulus schedule (.stim)")
+    parser.add_argument('--annotate', help="write the annotated source to this file")
+    parser.add_argument('--top', type=int, default=10, help="entries per list (default 10)")
+    parser.add_argument('--variant', default='assembler', help="assembler module (assembler / assembler2)")
+    args = parser.parse_args()
+
+    assembler_class = __import__(args.variant).RISCAssembler
+    try:
+        if args.program.lower().endswith('.asm'):
+            source_map, memory = SourceMap.assemble(args.program, assembler_class)
+        else:
+            from memimage import open_image
+            source_map = SourceMap.load(args.map or os.path.splitext(args.program)[0] + '.map')
+            with open_image(args.program) as image:
+                memory = list(image.as_array())
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    stimulus = None
+    if args.stimulus:
+        from stimulus import StimulusSchedule
+        stimulus = StimulusSchedule.load(args.stimulus)
+
+    sim, exec_counts, cycle_counts = run_profile(memory, args.model, args.max_cycles, stimulus,
+                                                 assembler_class)
+    try:
+        profiles = fold(source_map, exec_counts, cycle_counts)
+    except OSError as e:
+        print(f"ERROR: source of the line map: {e}")
+        sys.exit(1)
+    loops = find_loops(source_map, memory, profiles, assembler_class)
+
+    if args.model == 'pipeline':
+        weight, total = 'cycles', sim.cycle
+        title = f"{sim.cycle} cycles, {sim.instructions} instructions"
+    else:
+        weight, total = 'executions', sim.instructions
+        title = f"{sim.instructions} instructions"
+    print_report(f"{source_map.source} ({args.model} model, {title}{', halted' if sim.halted else ''})",
+                 profiles, loops, weight, total, args.top)
+    if args.annotate:
+        write_annotated(profiles, source_map.source, args.annotate, cycle_counts is not None)
+        print(f"Wrote {args.annotate}")
+
+
+if __name__ == "__main__":
+    main()
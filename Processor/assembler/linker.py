@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Linker
+Combines relocatable objects produced by `assembler.py -c` into a single
+memory image (.mem format)
+
+Sections placed with .ORG keep their absolute addresses; relocatable
+sections (.SECTION) are packed first-fit into the free space of the
+2^18-word address space, after which every relocation against the 16-bit
+immediate word of JMP/CALL/LDM/IADD/branches is patched.
+"""
+
+import json
+import sys
+from typing import Dict, List, Tuple
+
+from assembler import RISCAssembler
+
+
+class RISCLinker:
+    def __init__(self, base_address: int = 4):
+        self.assembler = RISCAssembler()
+        self.memory_size = self.assembler.memory_size
+        # Relocatable sections are never placed below this address
+        # (M[0]..M[3] hold the reset and interrupt vectors)
+        self.base_address = base_address
+        self.objects: List[Tuple[str, Dict]] = []
+        self.section_bases: Dict[Tuple[int, str], int] = {}
+        self.global_symbols: Dict[str, int] = {}
+    
+    def load(self, object_file: str):
+        """Read one object file"""
+        with open(object_file, 'r') as f:
+            obj = json.load(f)
+        self.add_object(object_file, obj)
+    
+    def add_object(self, name: str, obj: Dict):
+        """Add an already parsed object (as built by RISCAssembler.build_object)"""
+        if obj.get('format') != RISCAssembler.OBJECT_FORMAT:
+            raise ValueError(f"{name}: not a RISC object file")
+        if obj.get('version') != RISCAssembler.OBJECT_VERSION:
+            raise ValueError(f"{name}: unsupported object version {obj.get('version')}")
+        self.objects.append((name, obj))
+    
+    def place_sections(self):
+        """Assign a base address to every section"""
+        used: List[Tuple[int, int]] = []  # (start, end) intervals, end exclusive
+        occupied: Dict[int, str] = {}
+        
+        # Absolute sections occupy exactly the words they define
+        for index, (name, obj) in enumerate(self.objects):
+            for section_name, section in obj['sections'].items():
+                if section['org'] is None:
+                    continue
+                self.section_bases[(index, section_name)] = section['org']
+                for offset, _ in section['words']:
+                    address = section['org'] + offset
+                    if address in occupied:
+                        raise ValueError(f"{name} overlaps {occupied[address]} at address 0x{address:05X}")
+                    occupied[address] = name
+                    used.append((address, address + 1))
+        used = self.merge_intervals(used)
+        
+        # Relocatable sections go into the first gap that fits them
+        for index, (name, obj) in enumerate(self.objects):
+            for section_name, section in obj['sections'].items():
+                if section['org'] is not None:
+                    continue
+                base = self.find_gap(used, section['size'])
+                self.section_bases[(index, section_name)] = base
+                used = self.merge_intervals(used + [(base, base + section['size'])])
+    
+    @staticmethod
+    def merge_intervals(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Sort and coalesce adjacent/overlapping intervals"""
+        merged: List[Tuple[int, int]] = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+    
+    def find_gap(self, used: List[Tuple[int, int]], size: int) -> int:
+        """First-fit search for `size` free words at or above base_address"""
+        candidate = self.base_address
+        for start, end in used:
+            if end <= candidate:
+                continue
+            if start - candidate >= size:
+                break
+            candidate = max(candidate, end)
+        if candidate + size > self.memory_size:
+            raise ValueError(f"No room for a {size}-word section")
+        return candidate
+    
+    def section_base(self, index: int, section_name: str) -> int:
+        """Load address of a section (.ORG labels are already absolute addresses)"""
+        if section_name == RISCAssembler.ABS_SECTION:
+            return 0
+        return self.section_bases[(index, section_name)]
+    
+    def resolve_symbols(self):
+        """Build the global symbol table"""
+        for index, (name, obj) in enumerate(self.objects):
+            for symbol, info in obj['symbols'].items():
+                if not info['global']:
+                    continue
+                if symbol in self.global_symbols:
+                    raise ValueError(f"{name}: duplicate global symbol '{symbol}'")
+                self.global_symbols[symbol] = self.section_base(index, info['section']) + info['value']
+    
+    def check_literals(self):
+        """Reject hex literals that are spelled like another module's global symbol"""
+        for name, obj in self.objects:
+            for literal in obj.get('literals', []):
+                if literal['token'] in self.global_symbols and literal['token'] not in obj['symbols']:
+                    raise ValueError(f"{name}: line {literal['line']}: '{literal['token']}' was assembled as "
+                                     f"a hex number but is a global symbol of another module "
+                                     f"(declare it with .EXTERN)")
+    
+    def symbol_address(self, index: int, symbol: str) -> int:
+        """Address of a symbol as seen from object `index` (local symbols first)"""
+        name, obj = self.objects[index]
+        info = obj['symbols'].get(symbol)
+        if info is not None:
+            return self.section_base(index, info['section']) + info['value']
+        if symbol in self.global_symbols:
+            return self.global_symbols[symbol]
+        raise ValueError(f"{name}: undefined symbol '{symbol}'")
+    
+    def link_words(self) -> Dict[int, int]:
+        """Place, relocate and merge all loaded objects
+        Returns: Dict of address -> 32-bit word for every defined word
+        """
+        self.section_bases = {}
+        self.global_symbols = {}
+        self.place_sections()
+        self.resolve_symbols()
+        self.check_literals()
+        
+        placed: Dict[int, int] = {}
+        for index, (name, obj) in enumerate(self.objects):
+            words: Dict[Tuple[str, int], int] = {}
+            for section_name, section in obj['sections'].items():
+                for offset, word in section['words']:
+                    words[(section_name, offset)] = int(word, 16)
+            
+            for reloc in obj['relocations']:
+                if reloc['target_type'] == 'section':
+                    target = self.section_bases[(index, reloc['target'])]
+                else:
+                    target = self.symbol_address(index, reloc['target'])
+                key = (reloc['section'], reloc['offset'])
+                value = (words[key] & 0xFFFF) + target
+                if value > 0xFFFF:
+                    raise ValueError(f"{name}: line {reloc['line']}: relocation to "
+                                     f"'{reloc['target']}' (0x{value:05X}) does not fit in 16 bits")
+                words[key] = (words[key] & 0xFFFF0000) | value
+            
+            for (section_name, offset), word in words.items():
+                address = self.section_bases[(index, section_name)] + offset
+                if address >= self.memory_size:
+                    raise ValueError(f"{name}: address 0x{address:05X} exceeds memory size")
+                placed[address] = word
+        
+        return placed
+    
+    def link(self) -> List[str]:
+        """Link all loaded objects into a full memory image"""
+        memory = [self.assembler.opcodes['NOP'] + '0' * 27] * self.memory_size
+        for address, word in self.link_words().items():
+            memory[address] = format(word, '032b')
+        return memory
+    
+    def run(self, object_files: List[str], output_file: str):
+        """Main link process"""
+        try:
+            print(f"\n{'='*60}")
+            print(f"RISC Processor Linker")
+            print(f"{'='*60}")
+            
+            for object_file in object_files:
+                print(f"Reading: {object_file}")
+                self.load(object_file)
+            
+            memory = self.link()
+            
+            print("\nSection Map:")
+            for (index, section_name), base in sorted(self.section_bases.items(), key=lambda x: x[1]):
+                name, obj = self.objects[index]
+                size = obj['sections'][section_name]['size']
+                print(f"  0x{base:05X}  {size:6d} words  {name}:{section_name}")
+            
+            if self.global_symbols:
+                print("\nGlobal Symbols:")
+                for symbol, addr in sorted(self.global_symbols.items(), key=lambda x: x[1]):
+                    print(f"  {symbol:20s} = {addr:5d} (0x{addr:04X})")
+            
+            print(f"\nWriting output: {output_file}")
+            self.assembler.write_output(memory, output_file)
+            
+            print(f"\n{'='*60}")
+            print(f"Link Successful!")
+            print(f"{'='*60}\n")
+            
+        except FileNotFoundError as e:
+            print(f"ERROR: Object file '{e.filename}' not found")
+            sys.exit(1)
+        except Exception as e:
+            print(f"ERROR: Link error: {str(e)}")
+            sys.exit(1)
+
+
+def main():
+    """Main entry point"""
+    args = sys.argv[1:]
+    output_file = None
+    base_address = 4
+    object_files = []
+    
+    i = 0
+    while i < len(args):
+        if args[i] == '-o' and i + 1 < len(args):
+            output_file = args[i + 1]
+            i += 2
+        elif args[i] == '--base' and i + 1 < len(args):
+            base_address = int(args[i + 1], 16)
+            i += 2
+        else:
+            object_files.append(args[i])
+            i += 1
+    
+    if not object_files or output_file is None:
+        print("\nUsage: python linker.py -o <output.mem|output.bin> [--base <hex>] <a.obj> [b.obj ...]")
+        print("\nExample:")
+        print("  python assembler.py -c main.asm && python assembler.py -c lib.asm")
+        print("  python linker.py -o program.mem main.obj lib.obj")
+        sys.exit(1)
+    
+    linker = RISCLinker(base_address)
+    linker.run(object_files, output_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Memory Image Access
+Memory-mapped, read-only access to assembler output for the Python tools
+
+Two formats are supported:
+  .bin  raw little-endian 32-bit words (assembler.py program.asm program.bin).
+        Words are exposed as a memoryview over the mapping, so opening an
+        image and slicing it never copies; as_numpy() is zero-copy as well.
+  .mem  ModelSim text. Lines written by the assembler are fixed width, so
+        word i is located arithmetically. Other .mem files (e.g. saved from
+        ModelSim) get a sidecar index (<file>.idx, array('Q') of the data
+        offset of every address, 0 where the file has no line for it) that is
+        built once and reused while it is newer than the .mem file. Lines are
+        placed by their address field, so gaps and any line order work.
+
+Because both formats are mapped rather than read, several processes
+analysing the same image share a single copy in the page cache.
+"""
+
+import mmap
+import os
+import sys
+from array import array
+from typing import List, Optional, Union
+
+from assembler import RISCAssembler
+
+
+class MemoryImage:
+    # 32-bit binary digits of one word inside a .mem line
+    WORD_DIGITS = 32
+    # First entry of a .idx sidecar (older sidecars indexed lines, not addresses)
+    INDEX_MAGIC = int.from_bytes(b'RISCIDX2', 'little')
+
+    def __init__(self, path: str, memory_size: int = 2**18):
+        self.path = path
+        self.memory_size = memory_size
+        self.is_binary = path.lower().endswith('.bin')
+        self.index: Optional[array] = None
+        self.fixed_width = False
+        self.header_length = len(RISCAssembler.MEM_HEADER)
+        self.line_length = RISCAssembler.MEM_LINE_LENGTH
+
+        self.file = open(path, 'rb')
+        # An empty file cannot be mapped; it is an image of no words
+        size = os.fstat(self.file.fileno()).st_size
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.words: Optional[memoryview] = None
+
+        if self.is_binary:
+            if len(self.mmap) % 4:
+                self.close()
+                raise ValueError(f"{path}: size is not a multiple of 4 bytes")
+            if sys.byteorder == 'little':
+                self.words = memoryview(self.mmap).cast('I')
+            else:
+                # Big-endian host: fall back to a byte-swapped copy
+                words = array('I', self.mmap)
+                words.byteswap()
+                self.words = memoryview(words)
+            self.length = len(self.words)
+        else:
+            expected = self.header_length + memory_size * self.line_length
+            self.fixed_width = len(self.mmap) == expected and self.mmap[:self.header_length] == \
+                RISCAssembler.MEM_HEADER.encode()
+            if not self.fixed_width:
+                try:
+                    self.index = self.load_index()
+                except ValueError:
+                    self.close()
+                    raise
+            self.length = memory_size if self.fixed_width else len(self.index)
+
+    # ---------------------------------------------------------------- .mem index
+
+    def index_path(self) -> str:
+        return self.path + '.idx'
+
+    def load_index(self) -> array:
+        """Data offset per address of a free-form .mem file (cached in a sidecar)"""
+        index_path = self.index_path()
+        try:
+            if os.path.getmtime(index_path) >= os.path.getmtime(self.path):
+                index = array('Q')
+                with open(index_path, 'rb') as f:
+                    index.frombytes(f.read())
+                if index[:1] == array('Q', [self.INDEX_MAGIC]):
+                    return index[1:]
+        except (OSError, ValueError):
+            pass
+
+        radix = 16
+        index = array('Q')
+        position = 0
+        size = len(self.mmap)
+        while position < size:
+            end = self.mmap.find(b'\n', position)
+            if end < 0:
+                end = size
+            line = self.mmap[position:end]
+            if line.lstrip().startswith(b'//'):
+                if b'addressradix=d' in line:
+                    radix = 10
+            elif line.strip():
+                colon = line.find(b':')
+                try:
+                    address = int(line[:colon], radix) if colon >= 0 else -1
+                except ValueError:
+                    address = -1
+                if not 0 <= address < self.memory_size:
+                    raise ValueError(f"{self.path}: malformed line at byte {position}")
+                if address >= len(index):
+                    index.extend(bytes(address + 1 - len(index)))
+                # Store the offset of the data field rather than the line start
+                data = colon + 1
+                while line[data:data + 1] == b' ':
+                    data += 1
+                if len(line) - data < self.WORD_DIGITS:
+                    raise ValueError(f"{self.path}: truncated line at byte {position}")
+                index[address] = position + data
+            position = end + 1
+
+        try:
+            with open(index_path, 'wb') as f:
+                array('Q', [self.INDEX_MAGIC]).tofile(f)
+                index.tofile(f)
+        except OSError:
+            pass  # read-only directory: keep the index in memory only
+        return index
+
+    def offset(self, address: int) -> int:
+        """Byte offset of the data field of a .mem word"""
+        if self.fixed_width:
+            # Skip the right-aligned address and ': '
+            return self.header_length + address * self.line_length + 10
+        return self.index[address]
+
+    # ---------------------------------------------------------------- access
+
+    def __len__(self) -> int:
+        return self.length
+
+    def word(self, address: int) -> int:
+        """Read one 32-bit word"""
+        if self.words is not None:
+            return self.words[address]
+        if not 0 <= address < self.length:
+            raise IndexError(f"address {address} out of range")
+        offset = self.offset(address)
+        if not offset:
+            return 0  # no line for this address
+        return int(self.mmap[offset:offset + self.WORD_DIGITS], 2)
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            if self.words is not None:
+                return self.words[key]
+            return array('I', (self.word(a) for a in range(*key.indices(self.length))))
+        if key < 0:
+            key += self.length
+        return self.word(key)
+
+    def as_array(self) -> array:
+        """All words as array('I') (a copy)"""
+        if self.words is not None:
+            return array('I', self.words)
+        if self.fixed_width:
+            try:
+                return array('I', self.as_numpy().tobytes())
+            except ImportError:
+                pass
+        return self[:]
+
+    def as_numpy(self):
+        """All words as a NumPy uint32 array (zero-copy for .bin images;
+        the image must stay open while the array is in use)"""
+        import numpy as np
+
+        if self.is_binary:
+            return np.frombuffer(self.mmap, dtype='<u4')
+        if not self.fixed_width:
+            return np.array(self[:], dtype=np.uint32)
+
+        # Fixed-width text: decode every line at once from the digit columns
+        text = np.frombuffer(self.mmap, dtype=np.uint8, offset=self.header_length,
+                             count=self.length * self.line_length)
+        digits = text.reshape(self.length, self.line_length)[:, 10:10 + self.WORD_DIGITS] - ord('0')
+        return np.packbits(digits, axis=1, bitorder='big').view('>u4').ravel().astype(np.uint32)
+
+    def nonzero_ranges(self) -> List[tuple]:
+        """(start, end) ranges of words that are not 0 (end exclusive)"""
+        ranges = []
+        start = None
+        for address in range(self.length):
+            if self.word(address):
+                if start is None:
+                    start = address
+            elif start is not None:
+                ranges.append((start, address))
+                start = None
+        if start is not None:
+            ranges.append((start, self.length))
+        return ranges
+
+    # ---------------------------------------------------------------- lifetime
+
+    def close(self):
+        if self.words is not None:
+            self.words.release()
+            self.words = None
+        if isinstance(self.mmap, mmap.mmap):
+            self.mmap.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_image(path: str) -> MemoryImage:
+    """Open a .bin or .mem image for reading"""
+    return MemoryImage(path)
+
+
+def convert(input_file: str, output_file: str):
+    """Convert between .mem and .bin images"""
+    with open_image(input_file) as image:
+        words = image.as_array()
+    assembler = RISCAssembler()
+    assembler.write_output([format(w, '032b') for w in words], output_file)
+
+
+def main():
+    """Main entry point"""
+    if len(sys.argv) < 2:
+        print("\nUsage: python memimage.py <image.mem|image.bin> [converted.bin|converted.mem]")
+        print("\nExample:")
+        print("  python memimage.py program.mem program.bin")
+        sys.exit(1)
+
+    if len(sys.argv) > 2:
+        convert(sys.argv[1], sys.argv[2])
+        print(f"Converted {sys.argv[1]} -> {sys.argv[2]}")
+        return
+
+    with open_image(sys.argv[1]) as image:
+        layout = 'binary' if image.is_binary else 'fixed-width text' if image.fixed_width else 'indexed text'
+        print(f"{sys.argv[1]}: {len(image)} words ({layout})")
+        for start, end in image.nonzero_ranges():
+            print(f"  0x{start:05X}-0x{end - 1:05X}  {end - start:6d} words")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Output-Port Traces
+Cycle-stamped OUT logs and streaming comparison against expected values
+
+Trace log format (.otr), append-only:
+    b'ROTR' uint32 version                       (once, at file creation)
+    { uint64 cycle, uint32 value }*              (little endian, 12 bytes each)
+
+TraceWriter can be assigned to a simulator's `output_trace` (it has the
+same append((cycle, value)) interface as the list it replaces), so OUT
+values go straight to disk in buffered blocks instead of accumulating in
+memory. read_trace() streams a log back in blocks.
+
+Expected sequences are written in the program source as comments, so
+the assembler and ModelSim ignore them:
+
+    # expect: 4, 8, 10, 20      (hexadecimal, like the rest of the source)
+    # expect: FFFF*3             (value repeated 3 times)
+
+Several expect lines are concatenated in source order. An expected
+sequence can also come from another trace log (e.g. a golden run) or a
+text file of hexadecimal values.
+"""
+
+import argparse
+import itertools
+import os
+import re
+import struct
+import sys
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b'ROTR'
+VERSION = 1
+HEADER = struct.Struct('<4sI')
+RECORD = struct.Struct('<QI')
+
+EXPECT_PATTERN = re.compile(r'^\s*#\s*expect\s*:(.*)$', re.IGNORECASE)
+
+
+class TraceWriter:
+    def __init__(self, path: str, buffer_records: int = 4096):
+        self.path = path
+        self.count = 0
+        self.buffer = bytearray()
+        self.buffer_size = buffer_records * RECORD.size
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(HEADER.pack(MAGIC, VERSION))
+        else:
+            with open(path, 'rb') as f:
+                check_header(f, path)
+
+    def append(self, entry: Tuple[int, int]):
+        """Record one (cycle, value) OUT event"""
+        self.buffer += RECORD.pack(entry[0], entry[1] & 0xFFFFFFFF)
+        self.count += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def check_header(f, path: str):
+    data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path}: truncated trace header")
+    magic, version = HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not an output trace")
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported trace version {version}")
+
+
+def read_trace(path: str, chunk_records: int = 65536) -> Iterator[Tuple[int, int]]:
+    """Stream (cycle, value) records from a trace log"""
+    with open(path, 'rb') as f:
+        check_header(f, path)
+        while True:
+            data = f.read(chunk_records * RECORD.size)
+            if not data:
+                return
+            # A partial record at the end (interrupted writer) is ignored
+            usable = len(data) - len(data) % RECORD.size
+            yield from RECORD.iter_unpack(data[:usable])
+            if usable < len(data):
+                return
+
+
+# -------------------------------------------------------------------- expectations
+
+def parse_values(text: str) -> List[int]:
+    """Hexadecimal values separated by commas/whitespace; 'value*count' repeats"""
+    values = []
+    for token in re.split(r'[,\s]+', text.strip()):
+        if not token:
+            continue
+        value, _, count = token.partition('*')
+        values.extend([int(value, 16)] * (int(count, 10) if count else 1))
+    return values
+
+
+def parse_expectations(path: str) -> Optional[List[int]]:
+    """Expected OUT values from '# expect:' comments, or None when there are none"""
+    values = None
+    with open(path, 'r') as f:
+        for line in f:
+            match = EXPECT_PATTERN.match(line)
+            if match:
+                values = (values or []) + parse_values(match.group(1))
+    return values
+
+
+def expected_stream(path: str) -> Iterator[int]:
+    """Expected values from a source (# expect:), a trace log or a text file of values"""
+    if path.lower().endswith('.otr'):
+        return (value for _, value in read_trace(path))
+    if path.lower().endswith('.asm'):
+        values = parse_expectations(path)
+        if values is None:
+            raise ValueError(f"{path}: no '# expect:' lines")
+        return iter(values)
+
+    def text_values() -> Iterator[int]:
+        with open(path, 'r') as f:
+            for line in f:
+                yield from parse_values(line.split('#')[0])
+    return text_values()
+
+
+# -------------------------------------------------------------------- comparison
+
+@dataclass
+class TraceComparison:
+    matched: int = 0
+    expected_count: int = 0
+    actual_count: int = 0
+    mismatch_count: int = 0
+    value_mismatches: int = 0  # positions where both have a value and they differ
+    # First mismatches: (index, expected, actual); None marks a missing value
+    mismatches: List[Tuple[int, Optional[object], Optional[object]]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatch_count
+
+    @property
+    def prefix_ok(self) -> bool:
+        """No value differs where both sequences have one (one may be longer)"""
+        return not self.value_mismatches
+
+
+def compare_streams(expected: Iterable, actual: Iterable, keep: int = 10) -> TraceComparison:
+    """Compare two sequences item by item without holding either in memory"""
+    result = TraceComparison()
+    missing = object()
+    for index, (e, a) in enumerate(itertools.zip_longest(expected, actual, fillvalue=missing)):
+        if e is not missing:
+            result.expected_count += 1
+        if a is not missing:
+            result.actual_count += 1
+        if e == a:
+            result.matched += 1
+            continue
+        result.mismatch_count += 1
+        if e is not missing and a is not missing:
+            result.value_mismatches += 1
+        if len(result.mismatches) < keep:
+            result.mismatches.append((index, None if e is missing else e, None if a is missing else a))
+    return result
+
+
+def describe(item) -> str:
+    if item is None:
+        return "(none)"
+    if isinstance(item, tuple):
+        return f"0x{item[1]:X} @ cycle {item[0]}"
+    return f"0x{item:X}"
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Inspect and compare OUT trace logs")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    show = sub.add_parser('show', help="print the records of a trace log")
+    show.add_argument('trace')
+    show.add_argument('--limit', type=int, help="print at most this many records")
+
+    compare = sub.add_parser('compare', help="compare a trace log with expected values")
+    compare.add_argument('trace')
+    compare.add_argument('expected', help=".asm with '# expect:' lines, .otr golden log or value file")
+    compare.add_argument('--cycles', action='store_true',
+                         help="also compare cycle stamps (expected must be a .otr log)")
+    compare.add_argument('--prefix', action='store_true',
+                         help="accept when one sequence is a prefix of the other")
+
+    args = parser.parse_args()
+    try:
+        if args.command == 'show':
+            records = read_trace(args.trace)
+            for cycle, value in itertools.islice(records, args.limit):
+                print(f"  cycle {cycle:10d}: 0x{value:X}")
+            return
+
+        if args.cycles:
+            if not args.expected.lower().endswith('.otr'):
+                raise ValueError("--cycles needs a .otr log as the expected sequence")
+            result = compare_streams(read_trace(args.expected), read_trace(args.trace))
+        else:
+            result = compare_streams(expected_stream(args.expected),
+                                     (value for _, value in read_trace(args.trace)))
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    ok = result.prefix_ok if args.prefix else result.ok
+    print(f"\n{'='*60}")
+    print(f"{os.path.basename(args.trace)} vs {os.path.basename(args.expected)}: {'MATCH' if ok else 'MISMATCH'}")
+    print(f"{'='*60}")
+    print(f"Expected values: {result.expected_count}")
+    print(f"Actual values:   {result.actual_count}")
+    print(f"Matching:        {result.matched}")
+    for index, expected, actual in result.mismatches:
+        print(f"  #{index}: expected {describe(expected)}, got {describe(actual)}")
+    if result.mismatch_count > len(result.mismatches):
+        print(f"  ... {result.mismatch_count - len(result.mismatches)} more")
+    print(f"{'='*60}\n")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
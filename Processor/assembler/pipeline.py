@@ -0,0 +1,756 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Pipeline Model
+Cycle-accurate Python model of processor.vhd
+
+Each call to step() simulates one clock period, from just after a rising
+edge to the next rising edge, in the same order as the VHDL:
+  1. signals that only depend on registers (decode control, memory
+     address/write enable, execute stage with forwarding)
+  2. falling edge: memory read/write (registered dataout), register file
+     write from MEM/WB, flag register update
+  3. signals that depend on the falling-edge results (register reads,
+     branch decision, hazard unit, next PC/SP)
+  4. rising edge: PC, SP, saved PC/flags and all pipeline registers
+
+The model mirrors the hardware, including its quirks, so that it can be
+compared against the functional model and against ModelSim waveforms.
+
+enable_profile() turns on per-address counters (array('Q'), one entry per
+memory word): exec_counts counts instructions issued from each address,
+cycle_counts charges every cycle to the instruction in decode, or, while
+decode holds a bubble, to the last instruction issued (the branch, load
+or stack operation that caused it). Used by hotspot.py.
+
+split=True (or an icache / dcache from cache.py) replaces the single
+memory port by separate instruction and data ports: fetch no longer
+waits for MEM, so the mem_conflict stall disappears, and cache misses
+freeze the pipeline for their penalty instead. This is an experiment,
+not a model of the hardware.
+
+A Policy selects the forwarding and hazard behaviour for what-if runs
+(policies.py compares them): no forwarding, forwarding of a loaded value
+straight into a following STD/PUSH, and SWAP as one pass writing both
+registers. The default policy is the hardware (forward_unit.vhd,
+Hazard.vhd) and takes the same code path as before.
+"""
+
+import argparse
+from array import array
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+from checkpoint import Checkpoint, image_digest, working_copy
+
+MASK32 = 0xFFFFFFFF
+MASK18 = 0x3FFFF
+
+# Flag register bit positions (Flags(2 downto 0) = N, Z, C)
+FLAG_N = 4
+FLAG_Z = 2
+FLAG_C = 1
+
+
+@dataclass
+class Control:
+    """Outputs of controlUnit.vhd for one opcode"""
+    alu: int = 0b111
+    imm_flush: int = 0
+    call: int = 0
+    ret: int = 0
+    hlt: int = 0
+    int_: int = 0
+    imm: int = 0
+    setc: int = 0
+    in_p: int = 0
+    swap: int = 0
+    inc_not: int = 0
+    branch: int = 0
+    buff: int = 0
+    out_p: int = 0
+    sp: int = 0
+    wb: int = 0
+    mem: int = 0
+    jump_type: int = 0
+    flag_en: int = 0
+    flag_reset: int = 0
+
+
+def control_signals(opcode: int) -> Control:
+    """Transcription of the `with opcode select` statements in controlUnit.vhd"""
+    c = Control()
+    c.hlt = int(opcode == 0b00001)
+    c.imm_flush = int(opcode in (0b00001, 0b01101, 0b10010, 0b10011, 0b10100,
+                                 0b11000, 0b11001, 0b11010, 0b11011, 0b11100, 0b11110))
+    c.call = int(opcode in (0b11100, 0b11110))
+    c.ret = int(opcode in (0b11101, 0b11111))
+    c.int_ = int(opcode == 0b11110)
+    c.imm = int(opcode in (0b00100, 0b01101, 0b10010, 0b10011, 0b10100))
+    c.setc = int(opcode == 0b00010)
+    c.in_p = int(opcode == 0b00110)
+    c.out_p = int(opcode == 0b00101)
+    c.swap = int(opcode == 0b01001)
+    c.inc_not = int(opcode in (0b00011, 0b00100))
+    c.buff = int(opcode in (0b00101, 0b00110, 0b01000, 0b10000, 0b10010))
+    c.branch = int(opcode in (0b11000, 0b11001, 0b11010, 0b11011, 0b11100))
+
+    # SP: "01"=push, "10"=pop
+    c.sp = 0b01 if opcode in (0b10000, 0b11100, 0b11110) else 0b10 if opcode == 0b10001 else 0
+    # WB: "10"=RegWrite, "11"=RegWrite+MemToReg
+    if opcode in (0b00011, 0b00100, 0b00110, 0b01000, 0b01001, 0b01010, 0b01011, 0b01100, 0b01101, 0b10010):
+        c.wb = 0b10
+    elif opcode in (0b10001, 0b10011):
+        c.wb = 0b11
+    # M: "10"=MemRead, "01"=MemWrite
+    c.mem = 0b10 if opcode == 0b10011 else 0b01 if opcode == 0b10100 else 0
+    c.jump_type = {0b11000: 0b01, 0b11001: 0b10, 0b11010: 0b11}.get(opcode, 0)
+
+    if opcode == 0b00011:
+        c.alu = 0b011
+    elif opcode in (0b00100, 0b00101, 0b00110, 0b01000, 0b01010, 0b01101, 0b10000, 0b10010, 0b10011, 0b10100):
+        c.alu = 0b000
+    elif opcode == 0b01011:
+        c.alu = 0b001
+    elif opcode == 0b01100:
+        c.alu = 0b010
+    elif opcode == 0b01001:
+        c.alu = 0b100
+
+    if opcode == 0b00010:
+        c.flag_en = 0b001
+    elif opcode in (0b00011, 0b01100):
+        c.flag_en = 0b110
+    elif opcode in (0b00100, 0b01010, 0b01011, 0b01101, 0b11111):
+        c.flag_en = 0b111
+
+    c.flag_reset = {0b11000: 0b010, 0b11001: 0b100, 0b11010: 0b001}.get(opcode, 0)
+    return c
+
+
+CONTROL = [control_signals(opcode) for opcode in range(32)]
+
+# Opcodes that really read the rs1 / rs2 register fields (decode reads both)
+READS_RS1 = {0b00101, 0b01000, 0b01001, 0b01010, 0b01011, 0b01100, 0b10000, 0b10100}
+READS_RS2 = {0b00011, 0b00100, 0b01001, 0b01010, 0b01011, 0b01100, 0b01101, 0b10011, 0b10100}
+OP_PUSH = 0b10000
+OP_STD = 0b10100
+
+
+@dataclass(frozen=True)
+class Policy:
+    """Forwarding and hazard behaviour of the model"""
+    forwarding: str = 'full'      # 'full' (forward_unit.vhd) or 'none' (stall until write back)
+    load_to_store: bool = False   # STD/PUSH of a just-loaded register: forward in MEM, no stall
+    swap: str = 'xor'             # 'xor' (three passes, Hazard.vhd) or 'dual' (one pass, two writes)
+
+    @property
+    def hardware(self) -> bool:
+        return self == Policy()
+
+
+POLICIES = {
+    'hardware': Policy(),
+    'no-forwarding': Policy(forwarding='none'),
+    'load-to-store': Policy(load_to_store=True),
+    'swap-dual': Policy(swap='dual'),
+    'combined': Policy(load_to_store=True, swap='dual'),
+}
+
+
+@dataclass
+class IFID:
+    instr: int = 0
+    imm: int = 0
+    valid: int = 0  # model only: instr was fetched (not a flush bubble)
+    pc: int = 0     # model only: address instr was fetched from
+    swap_pass: int = 0  # model only: SWAP passes issued (non-hardware policies)
+
+
+@dataclass
+class IDEX:
+    swap: int = 0
+    out: int = 0
+    call: int = 0
+    imm: int = 0
+    buff: int = 0
+    flag_en: int = 0
+    flag_reset: int = 0
+    setc: int = 0
+    inc: int = 0
+    sp: int = 0
+    wb: int = 0
+    mem: int = 0
+    alu: int = 0
+    rd: int = 0
+    data1: int = 0
+    data2: int = 0
+    rs1: int = 0
+    rs2: int = 0
+    flags: int = 0
+    int_: int = 0
+    dual: int = 0   # model only: SWAP writing rd and rs1 in one pass
+
+
+@dataclass
+class EXMEM:
+    swap: int = 0
+    out: int = 0
+    call: int = 0
+    sp: int = 0
+    wb: int = 0
+    mem: int = 0
+    rd: int = 0
+    alu: int = 0
+    write_data: int = 0
+    int_: int = 0
+    load_data: int = 0  # model only: store data comes from the load in MEM/WB
+    dual: int = 0       # model only: second register write (rd2 <- alu2)
+    rd2: int = 0
+    alu2: int = 0
+
+
+@dataclass
+class MEMWB:
+    out: int = 0
+    wb: int = 0
+    rd: int = 0
+    alu: int = 0
+    mem_data: int = 0
+    dual: int = 0       # model only: second register write (rd2 <- alu2)
+    rd2: int = 0
+    alu2: int = 0
+
+
+def alu(data1: int, data2: int, signal: int) -> Tuple[int, int]:
+    """alu.vhd: returns (result, flags) with flags = N,Z,C bits"""
+    carry = 0
+    if signal == 0b000:
+        total = data1 + data2
+        result, carry = total & MASK32, total >> 32
+    elif signal == 0b001:
+        result = (data1 - data2) & MASK32
+        carry = int(data1 < data2)  # bit 32 of the 33-bit difference
+    elif signal == 0b011:
+        result = ~data2 & MASK32
+    elif signal == 0b100:
+        result = data1 ^ data2
+    elif signal == 0b010:
+        result = data1 & data2
+    else:
+        result = 0
+    flags = (FLAG_N if result >> 31 else 0) | (FLAG_Z if result == 0 else 0) | (FLAG_C if carry else 0)
+    return result, flags
+
+
+class PipelineSimulator:
+    # State saved in checkpoints (besides memory and the pipeline registers)
+    CHECKPOINT_FIELDS = ('pc', 'sp', 'prev_pc', 'prev_flags', 'flags', 'dout', 'regs',
+                         'rst', 'external_int', 'input_port',
+                         'cycle', 'instructions', 'output_port', 'output_trace',
+                         'stall_cycles', 'stall_causes', 'last_issued', 'freeze')
+    CHECKPOINT_REGISTERS = {'if_id': IFID, 'id_ex': IDEX, 'ex_mem': EXMEM, 'mem_wb': MEMWB}
+
+    def __init__(self, memory, split: bool = False, icache=None, dcache=None,
+                 policy: Policy = Policy()):
+        # The loaded image is kept (not copied) as the base of checkpoint diffs
+        self.image = memory
+        self.memory = working_copy(memory)
+        self.memory_size = len(self.memory)
+        self.dirty = set()
+        self._digest: Optional[str] = None
+
+        # Architectural and pipeline state (VHDL initial values)
+        self.pc = 0
+        self.sp = MASK18
+        self.prev_pc = 0
+        self.prev_flags = 0
+        self.flags = 0
+        self.dout = 0
+        self.regs = [0] * 8
+        self.if_id = IFID()
+        self.id_ex = IDEX()
+        self.ex_mem = EXMEM()
+        self.mem_wb = MEMWB()
+
+        # Inputs
+        self.rst = 0
+        self.external_int = 0
+        self.input_port = 0
+
+        self.cycle = 0
+        self.instructions = 0  # instructions issued from decode into execute
+        self.output_port = 0
+        self.output_trace: List[Tuple[int, int]] = []
+        self.stall_cycles = 0
+        self.stall_causes = {'load_use': 0, 'swap': 0, 'mem_conflict': 0}
+        self.exec_counts: Optional[array] = None
+        self.cycle_counts: Optional[array] = None
+        self.last_issued = 0
+
+        # Memory hierarchy experiment (cache.py)
+        self.split = split or icache is not None or dcache is not None
+        self.icache = icache
+        self.dcache = dcache
+        if icache is not None:
+            self.stall_causes['icache_miss'] = 0
+        if dcache is not None:
+            self.stall_causes['dcache_miss'] = 0
+        self.freeze: Dict[str, int] = {}  # miss penalty cycles still to wait, per cause
+
+        self.policy = policy
+        self.hardware_policy = policy.hardware
+        if policy.forwarding == 'none':
+            self.stall_causes['data_hazard'] = 0
+
+    @classmethod
+    def from_image(cls, path: str, policy: Policy = Policy()) -> 'PipelineSimulator':
+        """Create a simulator from a .mem/.bin image"""
+        from memimage import open_image
+        with open_image(path) as image:
+            return cls(image.as_array(), policy=policy)
+
+    def enable_profile(self):
+        """Count issues and cycles per instruction address from now on"""
+        self.exec_counts = array('Q', bytes(8 * self.memory_size))
+        self.cycle_counts = array('Q', bytes(8 * self.memory_size))
+
+    # ---------------------------------------------------------------- one cycle
+
+    def step(self):
+        """Simulate one clock period (rising edge to rising edge)"""
+        if_id, id_ex, ex_mem, mem_wb = self.if_id, self.id_ex, self.ex_mem, self.mem_wb
+        rst, ext = self.rst, self.external_int
+        if self.freeze:
+            if not rst:
+                # Frozen by a cache miss: one cycle of the penalty passes
+                cause = next(iter(self.freeze))
+                self.freeze[cause] -= 1
+                if not self.freeze[cause]:
+                    del self.freeze[cause]
+                self.stall_causes[cause] += 1
+                self.stall_cycles += 1
+                self.cycle += 1
+                if self.cycle_counts is not None:
+                    counted = if_id.pc if if_id.valid else self.last_issued
+                    if counted < self.memory_size:
+                        self.cycle_counts[counted] += 1
+                return
+            self.freeze = {}
+
+        instr = if_id.instr
+        ctrl = CONTROL[instr >> 27]
+        dec_int = ctrl.int_ | ext
+        dec_call = ctrl.call | ext
+        dec_imm_flush = ctrl.imm_flush | ext
+        dec_ret = ctrl.ret
+
+        # ---- memory address / write (MEM_Stage.vhd), uses dataout before the falling edge
+        first_or = dec_int | rst | (1 if ex_mem.mem else 0)
+        second_or = rst | dec_int | (1 if ex_mem.sp else 0) | dec_ret
+        if first_or and second_or:
+            if rst:
+                mem_addr = 0
+            elif ext:
+                mem_addr = 1
+            else:
+                mem_addr = 3 if self.dout & 1 else 2
+        elif first_or:
+            mem_addr = ex_mem.alu & MASK18
+        elif second_or:
+            mem_addr = (self.sp + 1) & MASK18 if (ex_mem.sp & 0b10 or dec_ret) else self.sp
+        else:
+            mem_addr = self.pc
+        data_access = first_or or second_or
+        addr_select_fetch = self.split or not data_access
+
+        mem_we = (ex_mem.mem & 0b01) | (ex_mem.sp & 0b01)
+        if ex_mem.int_:
+            mem_datain = (self.prev_flags << 18) | self.prev_pc
+        elif ex_mem.call:
+            mem_datain = self.prev_pc
+        elif ex_mem.load_data:
+            mem_datain = mem_wb.mem_data
+        else:
+            mem_datain = ex_mem.write_data
+
+        # ---- execute stage (EX_Stage.vhd) with forwarding
+        memwb_write_data = mem_wb.mem_data if mem_wb.wb & 0b01 else mem_wb.alu
+        ex_mem_write = ex_mem.wb & 0b10
+        mem_wb_write = mem_wb.wb & 0b10
+
+        store = (id_ex.mem & 0b01) or (id_ex.sp & 0b01)
+        policy = self.policy
+        hardware = self.hardware_policy
+        if hardware:
+            fwd1 = 2 if ex_mem_write and ex_mem.rd == id_ex.rs1 else 1 if mem_wb_write and mem_wb.rd == id_ex.rs1 else 0
+            fwd2 = 2 if ex_mem_write and ex_mem.rd == id_ex.rs2 else 1 if mem_wb_write and mem_wb.rd == id_ex.rs2 else 0
+            fwd_store = fwd1 if store else 0
+            write_data = (id_ex.data1, memwb_write_data, ex_mem.alu)[fwd_store]
+            value1 = (id_ex.data1, memwb_write_data, ex_mem.alu)[fwd1]
+            value2 = (id_ex.data2, memwb_write_data, ex_mem.alu)[fwd2]
+        else:
+            value1 = self.forward(id_ex.rs1, id_ex.data1, memwb_write_data)
+            value2 = self.forward(id_ex.rs2, id_ex.data2, memwb_write_data)
+            write_data = value1 if store else id_ex.data1
+        if id_ex.imm:
+            data1 = 1 if id_ex.inc else if_id.imm
+        else:
+            data1 = value1
+        data2 = 0 if id_ex.buff else value2
+        alu_result, alu_flags = alu(data1, data2, id_ex.alu)
+        if id_ex.dual:
+            alu_result = data1  # rd <- rs1; rs1 <- rd goes through alu2 = data2
+
+        # ---- falling edge: memory, register file, flags
+        if mem_we:
+            if mem_addr < self.memory_size:
+                self.memory[mem_addr] = mem_datain
+                self.dirty.add(mem_addr)
+            data_out = mem_datain
+        else:
+            data_out = self.memory[mem_addr] if mem_addr < self.memory_size else 0
+        fetch_address = self.pc
+        if self.split:
+            # Separate instruction port: dout always holds the word at PC
+            self.dout = self.memory[fetch_address] if fetch_address < self.memory_size else 0
+        else:
+            self.dout = data_out
+
+        if mem_wb_write:
+            self.regs[mem_wb.rd] = memwb_write_data
+        if mem_wb.dual:
+            self.regs[mem_wb.rd2] = mem_wb.alu2
+
+        flags = self.flags
+        for bit in (FLAG_C, FLAG_Z):
+            if id_ex.flag_reset & bit:
+                flags &= ~bit
+            elif id_ex.flag_en & bit:
+                flags = (flags & ~bit) | ((alu_flags | id_ex.flags) & bit)
+        if id_ex.flag_reset & FLAG_N:
+            flags &= ~FLAG_N
+        elif id_ex.flag_en & FLAG_N:
+            # set_carry is wired into the N bit in Flags_Reg.vhd
+            value = (alu_flags | id_ex.flags) & FLAG_N or (FLAG_N if id_ex.setc else 0)
+            flags = (flags & ~FLAG_N) | value
+        self.flags = flags
+
+        # ---- decode stage (DEC_Stage.vhd), after the falling edge
+        rs1 = (instr >> 21) & 7
+        rd_field = (instr >> 24) & 7
+        rs2 = rd_field if (ctrl.inc_not or ctrl.swap) else (instr >> 18) & 7
+        read1 = self.input_port if ctrl.in_p else self.regs[rs1]
+        read2 = self.regs[rs2]
+        if hardware:
+            rd = rs1 if (ctrl.swap and id_ex.swap and not ex_mem.swap) else rd_field
+        else:
+            rd = rs1 if (ctrl.swap and if_id.swap_pass == 1) else rd_field
+
+        jump_type = ctrl.jump_type
+        if jump_type == 0b10:
+            flag_ok = flags & FLAG_N
+        elif jump_type == 0b01:
+            flag_ok = flags & FLAG_Z
+        elif jump_type == 0b11:
+            flag_ok = flags & FLAG_C
+        else:
+            flag_ok = 1
+        jump = 1 if (flag_ok and ctrl.branch) else 0
+        dec_flags = (data_out >> 18) & 7 if (ctrl.ret and ctrl.flag_en == 0b111) else 0
+
+        # Output port is driven while OUT is in write back
+        self.output_port = memwb_write_data if mem_wb.out else 0
+        if mem_wb.out:
+            self.output_trace.append((self.cycle, memwb_write_data))
+
+        # ---- hazard unit (Hazard.vhd)
+        if hardware:
+            load_use = (id_ex.rd == rs1 or id_ex.rd == rs2) and ((id_ex.mem & 0b10) or (id_ex.sp & 0b10))
+            swap_hazard = not ex_mem.swap and ctrl.swap
+            data_hazard = False
+        else:
+            load_use, data_hazard, swap_hazard = self.hazards(instr >> 27, rs1, rs2)
+        mem_conflict = bool(ex_mem.mem or ex_mem.sp) and not self.split
+        bubble = load_use or data_hazard
+        pc_stall = bubble or swap_hazard or mem_conflict
+        if_id_flush = mem_conflict and not dec_imm_flush
+        if_id_stall = bubble or swap_hazard or (mem_conflict and dec_imm_flush)
+        id_ex_flush = bubble or (mem_conflict and dec_imm_flush)
+        if pc_stall:
+            self.stall_cycles += 1
+            causes = self.stall_causes
+            if load_use:
+                causes['load_use'] += 1
+            elif data_hazard:
+                causes['data_hazard'] += 1
+            elif swap_hazard:
+                causes['swap'] += 1
+            else:
+                causes['mem_conflict'] += 1
+
+        # ---- fetch outputs and next PC / SP
+        fetch_valid = addr_select_fetch and not (if_id_flush or dec_ret or dec_imm_flush or dec_int or rst)
+        fetched = self.dout if fetch_valid else 0
+        imm_value = self.dout & 0xFFFF
+
+        if rst or ext or dec_ret or dec_int:
+            pc_next = data_out & MASK18
+        elif jump:
+            pc_next = imm_value
+        else:
+            pc_next = (self.pc + 1) & MASK18
+
+        if ex_mem.sp & 0b01:
+            sp_next = (self.sp - 1) & MASK18
+        elif (ex_mem.sp & 0b10) or dec_ret:
+            sp_next = (self.sp + 1) & MASK18
+        else:
+            sp_next = self.sp
+
+        # ---- rising edge
+        if dec_int or dec_call:
+            self.prev_pc = self.pc if ext else (self.pc + 1) & MASK18
+            self.prev_flags = dec_flags
+        if not ctrl.hlt and not pc_stall:
+            self.pc = pc_next
+        self.sp = MASK18 if rst else sp_next
+
+        counts = self.cycle_counts
+        if counts is not None and not rst:
+            counted = if_id.pc if if_id.valid else self.last_issued
+            if counted < self.memory_size:
+                counts[counted] += 1
+
+        if not hardware and ctrl.swap and not id_ex_flush:
+            if_id.swap_pass += 1
+        if rst or not (if_id_stall or ctrl.hlt or (mem_conflict and not if_id_flush)):
+            # The instruction in decode moves on into execute
+            if if_id.valid and not id_ex_flush and not rst:
+                self.instructions += 1
+                self.last_issued = if_id.pc
+                if self.exec_counts is not None and if_id.pc < self.memory_size:
+                    self.exec_counts[if_id.pc] += 1
+            if_id.instr = fetched
+            if_id.valid = int(fetch_valid)
+            if_id.pc = fetch_address
+            if_id.swap_pass = 0
+        if_id.imm = imm_value
+
+        if id_ex_flush:
+            self.id_ex = IDEX()
+        else:
+            self.id_ex = IDEX(
+                swap=ctrl.swap, out=ctrl.out_p, call=dec_call, imm=ctrl.imm, buff=ctrl.buff,
+                flag_en=ctrl.flag_en, flag_reset=ctrl.flag_reset, setc=ctrl.setc, inc=ctrl.inc_not,
+                sp=ctrl.sp | ext, wb=ctrl.wb, mem=ctrl.mem, alu=ctrl.alu, rd=rd,
+                data1=read1, data2=read2, rs1=rs1, rs2=rs2, flags=dec_flags, int_=dec_int,
+            )
+            if ctrl.swap and policy.swap == 'dual':
+                self.id_ex.dual = 1
+
+        self.ex_mem = EXMEM(
+            swap=id_ex.swap, out=id_ex.out, call=id_ex.call, sp=id_ex.sp, wb=id_ex.wb,
+            mem=id_ex.mem, rd=id_ex.rd, alu=alu_result, write_data=write_data, int_=id_ex.int_,
+        )
+        self.mem_wb = MEMWB(out=ex_mem.out, wb=ex_mem.wb, rd=ex_mem.rd,
+                            alu=ex_mem.alu, mem_data=data_out)
+        if not hardware:
+            if policy.load_to_store and store and ex_mem.wb == 0b11 and ex_mem.rd == id_ex.rs1:
+                self.ex_mem.load_data = 1
+            if id_ex.dual:
+                self.ex_mem.dual, self.ex_mem.rd2, self.ex_mem.alu2 = 1, id_ex.rs1, data2
+            if ex_mem.dual:
+                self.mem_wb.dual, self.mem_wb.rd2, self.mem_wb.alu2 = 1, ex_mem.rd2, ex_mem.alu2
+
+        if not rst:
+            self.cycle += 1
+            if self.icache is not None or self.dcache is not None:
+                fetch_used = not (pc_stall or ctrl.hlt or dec_ret or dec_int)
+                self.cache_misses(fetch_address if fetch_used else None,
+                                  mem_addr if data_access else None)
+
+    # ---------------------------------------------------------------- policies
+
+    def forward(self, reg: int, value: int, memwb_write_data: int) -> int:
+        """Source operand after forwarding (non-hardware policies; EX/MEM first)"""
+        if self.policy.forwarding == 'none':
+            return value
+        ex_mem, mem_wb = self.ex_mem, self.mem_wb
+        if ex_mem.wb & 0b10 and ex_mem.rd == reg:
+            return ex_mem.alu
+        if ex_mem.dual and ex_mem.rd2 == reg:
+            return ex_mem.alu2
+        if mem_wb.wb & 0b10 and mem_wb.rd == reg:
+            return memwb_write_data
+        if mem_wb.dual and mem_wb.rd2 == reg:
+            return mem_wb.alu2
+        return value
+
+    def hazards(self, opcode: int, rs1: int, rs2: int) -> Tuple[bool, bool, bool]:
+        """Hazard unit for non-hardware policies: (load_use, data_hazard, swap_hazard)"""
+        policy, id_ex, ex_mem = self.policy, self.id_ex, self.ex_mem
+        swap_hazard = opcode == 0b01001 and policy.swap == 'xor' and self.if_id.swap_pass < 2
+
+        if policy.forwarding == 'none':
+            # Wait until every producer of a source register has reached write back
+            def pending(reg: int) -> bool:
+                return bool((id_ex.wb & 0b10 and id_ex.rd == reg) or (id_ex.dual and id_ex.rs1 == reg)
+                            or (ex_mem.wb & 0b10 and ex_mem.rd == reg) or (ex_mem.dual and ex_mem.rd2 == reg))
+            data_hazard = (opcode in READS_RS1 and pending(rs1)) or (opcode in READS_RS2 and pending(rs2))
+            return False, data_hazard, swap_hazard
+
+        load_use = bool((id_ex.rd == rs1 or id_ex.rd == rs2) and ((id_ex.mem & 0b10) or (id_ex.sp & 0b10)))
+        if load_use and policy.load_to_store and opcode in (OP_STD, OP_PUSH) and id_ex.rd == rs1 \
+                and (opcode == OP_PUSH or id_ex.rd != rs2):
+            load_use = False  # only the store data depends on the load: forwarded in MEM
+        return load_use, False, swap_hazard
+
+    def cache_misses(self, fetch_address: Optional[int], data_address: Optional[int]):
+        """Look up this cycle's accesses; misses freeze the pipeline for their penalty
+        (spent one cycle per step(), so a run never goes past its cycle budget)
+        """
+        if fetch_address is not None and self.icache is not None and not self.icache.access(fetch_address):
+            self.freeze['icache_miss'] = self.icache.miss_penalty
+        if data_address is not None and self.dcache is not None and not self.dcache.access(data_address):
+            self.freeze['dcache_miss'] = self.dcache.miss_penalty
+        self.freeze = {cause: n for cause, n in self.freeze.items() if n > 0}
+
+    # ---------------------------------------------------------------- driving
+
+    def reset(self, cycles: int = 1):
+        """Hold reset for a number of cycles (PC <- M[0], SP <- 2^18-1)"""
+        self.rst = 1
+        for _ in range(cycles):
+            self.step()
+        self.rst = 0
+
+    @property
+    def halted(self) -> bool:
+        """HLT is in decode and everything behind it has drained"""
+        id_ex, ex_mem, mem_wb = self.id_ex, self.ex_mem, self.mem_wb
+        return not self.freeze and (self.if_id.instr >> 27) == 0b00001 \
+            and not (id_ex.sp or id_ex.mem or id_ex.wb or id_ex.out or id_ex.flag_en or id_ex.flag_reset) \
+            and not (ex_mem.sp or ex_mem.mem or ex_mem.wb or ex_mem.out) \
+            and not (mem_wb.wb or mem_wb.out)
+
+    def run(self, max_cycles: int, stimulus=None) -> int:
+        """Run until HLT or max_cycles, applying a StimulusSchedule if given
+        Returns: number of cycles simulated
+        """
+        queue = stimulus.queue() if stimulus is not None else None
+        pulse_end = None
+        if queue is not None:
+            # Events before the current cycle (e.g. a restored checkpoint) already happened
+            for _ in queue.pop_due(self.cycle - 1):
+                pass
+        start = self.cycle
+        while self.cycle - start < max_cycles:
+            if pulse_end is not None and self.cycle >= pulse_end:
+                self.external_int = 0
+                pulse_end = None
+            if queue is not None:
+                for event in queue.pop_due(self.cycle):
+                    if event.kind == 'int':
+                        self.external_int = 1
+                        pulse_end = self.cycle + event.value
+                    elif event.kind == 'in':
+                        self.input_port = event.value & MASK32
+                    elif event.kind == 'rst':
+                        # The clock keeps running while rst is held, as in the do script
+                        self.reset(event.value)
+                        self.cycle += event.value
+            if self.halted and (queue is None or not queue):
+                break
+            self.step()
+        self.external_int = 0
+        return self.cycle - start
+
+    # ---------------------------------------------------------------- checkpoints
+
+    def image_digest(self) -> str:
+        if self._digest is None:
+            self._digest = image_digest(self.image)
+        return self._digest
+
+    def checkpoint_config(self) -> dict:
+        """Configuration a checkpoint must be restored into (it changes the timing)"""
+        return {
+            'policy': asdict(self.policy),
+            'split': self.split,
+            'icache': self.icache.config() if self.icache else None,
+            'dcache': self.dcache.config() if self.dcache else None,
+        }
+
+    def snapshot(self) -> Checkpoint:
+        return Checkpoint.capture(self, 'pipeline')
+
+    def restore(self, checkpoint: Checkpoint):
+        checkpoint.restore(self, 'pipeline')
+
+    def state(self) -> dict:
+        """Architectural state summary"""
+        return {
+            'pc': self.pc,
+            'sp': self.sp,
+            'flags': self.flags,
+            'regs': list(self.regs),
+            'cycle': self.cycle,
+        }
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Cycle-accurate model of the pipelined processor")
+    parser.add_argument('image', help=".mem or .bin memory image")
+    parser.add_argument('--cycles', type=int, default=10000, help="maximum cycles (default 10000)")
+    parser.add_argument('--stimulus', help="stimulus schedule (.stim) driving external_INT / input_port")
+    parser.add_argument('--restore', help="start from a checkpoint instead of reset")
+    parser.add_argument('--save-checkpoint', help="write a checkpoint when the run stops")
+    parser.add_argument('--trace', help="append OUT values to a trace log (.otr) instead of printing them")
+    parser.add_argument('--policy', default='hardware', choices=list(POLICIES),
+                        help="forwarding / hazard policy (default: hardware)")
+    args = parser.parse_args()
+
+    sim = PipelineSimulator.from_image(args.image, POLICIES[args.policy])
+    stimulus = None
+    if args.stimulus:
+        from stimulus import StimulusSchedule
+        stimulus = StimulusSchedule.load(args.stimulus)
+
+    if args.restore:
+        sim.restore(Checkpoint.load(args.restore))
+    else:
+        sim.reset()
+    if args.trace:
+        from outtrace import TraceWriter
+        sim.output_trace = TraceWriter(args.trace)
+    cycles = sim.run(args.cycles, stimulus)
+    if args.save_checkpoint:
+        sim.snapshot().save(args.save_checkpoint)
+    if args.trace:
+        sim.output_trace.close()
+
+    print(f"\n{'='*60}")
+    print(f"Pipeline simulation: {args.image}")
+    print(f"{'='*60}")
+    print(f"Cycles:        {cycles}{' (halted)' if sim.halted else ''}")
+    print(f"Instructions:  {sim.instructions}"
+          + (f" (CPI {sim.cycle / sim.instructions:.3f})" if sim.instructions else ""))
+    print(f"Stall cycles:  {sim.stall_cycles} ("
+          + ', '.join(f"{cause} {count}" for cause, count in sim.stall_causes.items()) + ")")
+    print(f"PC:            0x{sim.pc:05X}")
+    print(f"SP:            0x{sim.sp:05X}")
+    print(f"Flags (NZC):   {sim.flags:03b}")
+    for i, value in enumerate(sim.regs):
+        print(f"R{i}:            0x{value:08X}")
+    if args.trace:
+        print(f"\nOutput port:  {len(sim.output_trace)} value(s) appended to {args.trace}")
+    elif sim.output_trace:
+        print("\nOutput port:")
+        for cycle, value in sim.output_trace:
+            print(f"  cycle {cycle:6d}: 0x{value:X}")
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
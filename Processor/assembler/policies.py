@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Forwarding / Hazard Policy Comparison
+Runs programs on the pipeline model under each Policy and compares cycles
+
+Policies (pipeline.POLICIES):
+  hardware       forward_unit.vhd / Hazard.vhd as built
+  no-forwarding  no forwarding paths; decode waits for write back
+  load-to-store  a STD/PUSH of a just-loaded register takes the value in
+                 MEM instead of a load-use bubble
+  swap-dual      SWAP in one pass writing both registers (no SWAP stall)
+  combined       load-to-store + swap-dual
+
+A run ends at HLT, at --max-cycles, or when decode has seen more than
+MAX_NOP_RUN zero words in a row: most testcases have no HLT and would
+otherwise spend the cycle budget running through the NOP fill after the
+program. For every program the table lists CPI under each policy and the
+speedup over the hardware (hardware CPI / policy CPI); the summary gives
+the geometric-mean speedup and the stall cycles by cause for the suite.
+
+--split runs every policy with the split instruction / data ports of
+cache.py. On the shared port the mem_conflict stall of a load already
+covers its load-use bubble, so load-to-store only pays off together with
+split memory.
+
+OUT values are checked against the hardware run; a difference means the
+policy changed the program's results (e.g. the XOR-based SWAP clears a
+register in SWAP Rx, Rx, the dual-write SWAP does not).
+"""
+
+import argparse
+import math
+import os
+import sys
+from typing import Dict, List
+
+from analyze import collect
+from pipeline import POLICIES, PipelineSimulator
+from runner import load_image
+
+# Same limit as analyze.ImageAnalyzer: more zero words than this is the end of the program
+MAX_NOP_RUN = 8
+
+
+def run_policy(memory: List[int], policy: str, max_cycles: int, split: bool = False) -> Dict:
+    """Run one program under one policy"""
+    sim = PipelineSimulator(memory, split=split, policy=POLICIES[policy])
+    sim.reset()
+    nops = 0
+    while sim.cycle < max_cycles and not sim.halted and nops <= MAX_NOP_RUN:
+        sim.step()
+        if sim.if_id.valid:
+            nops = nops + 1 if sim.if_id.instr == 0 else 0
+    return {
+        'cycles': sim.cycle,
+        'instructions': sim.instructions,
+        'cpi': sim.cycle / sim.instructions if sim.instructions else None,
+        'finished': sim.cycle < max_cycles,
+        'stalls': dict(sim.stall_causes),
+        'output': [value for _, value in sim.output_trace],
+    }
+
+
+def compare_policies(programs: List[str], policies: List[str], max_cycles: int,
+                     variant: str = 'assembler', split: bool = False) -> Dict[str, Dict[str, Dict]]:
+    """{program: {policy: result}}; programs that cannot be loaded are reported and skipped"""
+    results = {}
+    for program in programs:
+        try:
+            memory = load_image(program, variant)
+        except (OSError, ValueError) as e:
+            print(f"  skipped {program}: {e}")
+            continue
+        results[program] = {policy: run_policy(memory, policy, max_cycles, split) for policy in policies}
+    return results
+
+
+def print_report(results: Dict[str, Dict[str, Dict]], policies: List[str]):
+    """Per-program CPI and speedup, suite summary"""
+    base = 'hardware'
+    print(f"\n{'='*60}")
+    print(f"{'program':24s}" + ''.join(f"{p:>20s}" for p in policies))
+    speedups: Dict[str, List[float]] = {p: [] for p in policies}
+    differences = []
+    for program, runs in results.items():
+        cells = []
+        for policy in policies:
+            run, reference = runs[policy], runs[base]
+            if run['cpi'] is None or reference['cpi'] is None:
+                cells.append(f"{'-':>20s}")
+                continue
+            speedup = reference['cpi'] / run['cpi']
+            speedups[policy].append(speedup)
+            mark = '' if run['finished'] else '*'
+            cells.append(f"{run['cpi']:.3f}{mark} ({speedup:.3f}x)".rjust(20))
+            shared = min(len(run['output']), len(reference['output']))
+            if run['output'][:shared] != reference['output'][:shared] or (
+                    run['finished'] and reference['finished'] and len(run['output']) != len(reference['output'])):
+                differences.append((program, policy))
+        print(f"{os.path.basename(program):24s}" + ''.join(cells))
+    print(f"{'='*60}")
+    print("CPI (speedup over hardware); * = still running at --max-cycles\n")
+
+    print(f"{'policy':16s} {'speedup':>8s}  stall cycles by cause (whole suite)")
+    for policy in policies:
+        values = speedups[policy]
+        mean = math.exp(sum(math.log(v) for v in values) / len(values)) if values else float('nan')
+        stalls: Dict[str, int] = {}
+        for runs in results.values():
+            for cause, count in runs[policy]['stalls'].items():
+                stalls[cause] = stalls.get(cause, 0) + count
+        print(f"{policy:16s} {mean:7.3f}x  " + ', '.join(f"{c} {n}" for c, n in stalls.items()))
+
+    for program, policy in differences:
+        print(f"  NOTE: {os.path.basename(program)}: OUT values under {policy} differ from the hardware run")
+    print()
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Compare forwarding / hazard policies on the pipeline model")
+    parser.add_argument('programs', nargs='*', default=[os.path.join(os.path.dirname(__file__) or '.', 'testcases')],
+                        help=".asm sources, .mem/.bin images or directories (default: testcases/)")
+    parser.add_argument('--policies', default=','.join(POLICIES),
+                        help=f"comma separated (default: {','.join(POLICIES)})")
+    parser.add_argument('--max-cycles', type=int, default=20000, help="cycle limit per run (default 20000)")
+    parser.add_argument('--variant', default='assembler', help="assembler module for .asm sources")
+    parser.add_argument('--split', action='store_true', help="split instruction / data ports (cache.py)")
+    args = parser.parse_args()
+
+    policies = [p.strip() for p in args.policies.split(',') if p.strip()]
+    for policy in policies:
+        if policy not in POLICIES:
+            print(f"ERROR: unknown policy '{policy}' (expected {', '.join(POLICIES)})")
+            sys.exit(1)
+    if 'hardware' not in policies:
+        policies.insert(0, 'hardware')
+
+    programs = collect(args.programs)
+    if not programs:
+        print("ERROR: no programs found")
+        sys.exit(1)
+    print_report(compare_policies(programs, policies, args.max_cycles, args.variant, args.split), policies)
+
+
+if __name__ == "__main__":
+    main()
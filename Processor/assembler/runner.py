@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Simulation Job Runner
+Runs a matrix of programs x configurations on a local process pool
+
+A job is one (program, ISA variant, model, stimulus) combination:
+  program   .asm source (assembled once per variant) or .mem/.bin image
+  variant   assembler module used for sources (assembler / assembler2)
+  model     pipeline (cycle-accurate) or functional
+  stimulus  optional .stim schedule
+
+Every distinct image is assembled once and placed in shared memory; the
+workers attach to it instead of receiving a copy. Jobs are handed out one
+at a time from the pool's shared queue, so an idle worker always picks up
+the next pending job and long programs do not hold up short ones.
+
+A job passes when the program reaches HLT; 'limit' means it was still
+running at --max-cycles, 'error' that it could not be assembled or run.
+The programs in testcases/ have no HLT (they run on into the zero-filled
+memory, which decodes as NOP), so they always end as 'limit'.
+Sources with '# expect:' lines (outtrace.py) also have their OUT values
+checked: any differing value is a 'fail', and so is a different number
+of values once the program has halted.
+
+Each finished job is appended to a JSON-lines results file and flushed
+immediately. Running the same matrix again skips the jobs already in the
+file, so an interrupted sweep resumes where it stopped. A job's key also
+holds the SHA-1 of its program and stimulus files and --max-cycles, so
+results from an older version of a source or another cycle limit are
+not reused. The consolidated table covers every job of the matrix, old
+and new.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from array import array
+from dataclasses import asdict, dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+from analyze import collect
+from outtrace import compare_streams, parse_expectations
+
+MODELS = ('pipeline', 'functional')
+VARIANTS = ('assembler', 'assembler2')
+
+
+@dataclass(frozen=True)
+class Job:
+    program: str
+    variant: str
+    model: str
+    stimulus: str = ''
+    digest: str = ''      # SHA-1 of the program and stimulus files
+    max_cycles: int = 0
+
+    @property
+    def key(self) -> str:
+        return '|'.join((self.program, self.variant, self.model, self.stimulus, self.digest,
+                         str(self.max_cycles)))
+
+
+def file_digest(paths: List[str]) -> str:
+    """SHA-1 over the contents of the given files ('' entries are skipped)"""
+    sha = hashlib.sha1()
+    for path in paths:
+        if path:
+            try:
+                with open(path, 'rb') as f:
+                    sha.update(f.read())
+            except OSError:
+                sha.update(b'missing:' + path.encode())
+    return sha.hexdigest()[:16]
+
+
+def load_image(path: str, variant: str) -> List[int]:
+    """Assemble a source with the given variant, or read an image"""
+    if path.lower().endswith('.asm'):
+        asm = __import__(variant).RISCAssembler()
+        with open(path, 'r') as f:
+            lines = f.readlines()
+        encoded, errors = asm.second_pass(asm.first_pass(lines))
+        if errors:
+            line_num, line, message = errors[0]
+            raise ValueError(f"line {line_num}: {line}: {message}")
+        words = [0] * asm.memory_size
+        for address, item in encoded:
+            for i, word in enumerate(item):
+                if address + i < len(words):
+                    words[address + i] = int(word, 2)
+        return words
+
+    from memimage import open_image
+    with open_image(path) as image:
+        return list(image.as_array())
+
+
+# -------------------------------------------------------------------- workers
+
+_images: Dict[str, memoryview] = {}
+_blocks: List[shared_memory.SharedMemory] = []  # keep the attachments open
+_stimuli: Dict[str, object] = {}
+
+
+def attach(name: str) -> memoryview:
+    """Read-only view of a shared image's words (the attachment is cached per worker);
+    the models copy it with one memcpy instead of building a Python list"""
+    if name not in _images:
+        block = shared_memory.SharedMemory(name=name)
+        _images[name] = block.buf.cast('I').toreadonly()
+        _blocks.append(block)
+    return _images[name]
+
+
+def schedule(path: str):
+    if path not in _stimuli:
+        from stimulus import StimulusSchedule
+        _stimuli[path] = StimulusSchedule.load(path)
+    return _stimuli[path]
+
+
+def run_job(task: Tuple[Job, Optional[str], Optional[str], int, Optional[List[int]]]) -> Dict:
+    """Worker: simulate one job and return its result row"""
+    job, image_name, error, max_cycles, expected = task
+    result = {'key': job.key, **asdict(job)}
+    if error:
+        result.update(status='error', error=error)
+        return result
+
+    start = time.perf_counter()
+    try:
+        memory = attach(image_name)
+        stimulus = schedule(job.stimulus) if job.stimulus else None
+        if job.model == 'pipeline':
+            from pipeline import PipelineSimulator
+            sim = PipelineSimulator(memory)
+            sim.reset()
+            cycles = sim.run(max_cycles, stimulus)
+            result.update(cycles=cycles, stall_cycles=sim.stall_cycles)
+        else:
+            from simulator import FunctionalSimulator
+            sim = FunctionalSimulator(memory, __import__(job.variant).RISCAssembler)
+            sim.reset()
+            sim.run(max_cycles, stimulus)
+            result.update(cycles=None)
+    except Exception as e:
+        result.update(status='error', error=f"{type(e).__name__}: {e}")
+        return result
+
+    instructions = sim.instructions
+    result.update(
+        instructions=instructions,
+        cpi=result['cycles'] / instructions if result['cycles'] and instructions else None,
+        halted=bool(sim.halted),
+        output=[[stamp, value] for stamp, value in sim.output_trace],
+        status='pass' if sim.halted else 'limit',
+        seconds=round(time.perf_counter() - start, 4),
+    )
+    if expected is not None:
+        check = compare_streams(expected, (value for _, value in sim.output_trace))
+        matches = check.ok if sim.halted else check.prefix_ok
+        result['expect'] = 'match' if matches else 'mismatch'
+        if not matches:
+            result['status'] = 'fail'
+            index, want, got = check.mismatches[0]
+            result['error'] = (f"OUT #{index}: expected {'-' if want is None else f'{want:X}'}, "
+                               f"got {'-' if got is None else f'{got:X}'}")
+    return result
+
+
+# -------------------------------------------------------------------- runner
+
+class JobRunner:
+    def __init__(self, results_path: str, workers: Optional[int] = None, max_cycles: int = 100000):
+        self.results_path = results_path
+        self.workers = workers or os.cpu_count()
+        self.max_cycles = max_cycles
+
+    def matrix(self, programs: List[str], variants: List[str], models: List[str],
+               stimuli: List[str]) -> List[Job]:
+        """Every combination; images ignore the variant axis"""
+        jobs = []
+        keys = set()
+        digests: Dict[Tuple[str, str], str] = {}
+        for program, variant, model, stim in itertools.product(programs, variants, models, stimuli):
+            if not program.lower().endswith('.asm'):
+                variant = '-'
+            if (program, stim) not in digests:
+                digests[(program, stim)] = file_digest([program, stim])
+            job = Job(program, variant, model, stim, digests[(program, stim)], self.max_cycles)
+            if job.key not in keys:
+                keys.add(job.key)
+                jobs.append(job)
+        return jobs
+
+    def load_results(self) -> Dict[str, Dict]:
+        """Results already recorded (the last line for a key wins)"""
+        results = {}
+        if not os.path.exists(self.results_path):
+            return results
+        with open(self.results_path, 'r') as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # partial line from an interrupted write
+                results[row['key']] = row
+        return results
+
+    def run(self, jobs: List[Job]) -> Dict[str, Dict]:
+        """Run the jobs not yet in the results file; returns all results of the matrix"""
+        results = self.load_results()
+        pending = [job for job in jobs if job.key not in results]
+        if not pending:
+            return {job.key: results[job.key] for job in jobs}
+
+        # One shared-memory image per (program, variant)
+        shared: Dict[Tuple[str, str], shared_memory.SharedMemory] = {}
+        errors: Dict[Tuple[str, str], str] = {}
+        try:
+            for job in pending:
+                image_key = (job.program, job.variant)
+                if image_key in shared or image_key in errors:
+                    continue
+                try:
+                    words = array('I', load_image(job.program, job.variant))
+                except (OSError, ValueError) as e:
+                    errors[image_key] = str(e)
+                    continue
+                block = shared_memory.SharedMemory(create=True, size=len(words) * 4)
+                block.buf[:len(words) * 4] = words.tobytes()
+                shared[image_key] = block
+
+            expectations = {program: parse_expectations(program) for program in {job.program for job in pending}
+                            if program.lower().endswith('.asm')}
+            tasks = []
+            for job in pending:
+                image_key = (job.program, job.variant)
+                block = shared.get(image_key)
+                tasks.append((job, block.name if block else None, errors.get(image_key), self.max_cycles,
+                              expectations.get(job.program)))
+
+            done = 0
+            with open(self.results_path, 'a') as out, \
+                    multiprocessing.Pool(min(self.workers, len(tasks))) as pool:
+                for row in pool.imap_unordered(run_job, tasks, chunksize=1):
+                    out.write(json.dumps(row) + '\n')
+                    out.flush()
+                    results[row['key']] = row
+                    done += 1
+                    print(f"  [{done}/{len(tasks)}] {row['status']:7s} {row['key']}")
+        finally:
+            for block in shared.values():
+                block.close()
+                block.unlink()
+
+        return {job.key: results[job.key] for job in jobs}
+
+
+def format_output(output: List[List[int]], limit: int = 6) -> str:
+    values = [f"{value:X}" for _, value in output[:limit]]
+    if len(output) > limit:
+        values.append(f"... ({len(output)})")
+    return ', '.join(values)
+
+
+def print_table(jobs: List[Job], results: Dict[str, Dict]):
+    """Consolidated results table"""
+    print(f"\n{'='*60}")
+    print(f"{'program':24s} {'variant':10s} {'model':10s} {'stimulus':12s} "
+          f"{'cycles':>8s} {'instr':>8s} {'CPI':>6s}  {'status':7s} output")
+    counts: Dict[str, int] = {}
+    for job in jobs:
+        row = results[job.key]
+        counts[row['status']] = counts.get(row['status'], 0) + 1
+        cycles = '' if row.get('cycles') is None else str(row['cycles'])
+        instructions = '' if row.get('instructions') is None else str(row['instructions'])
+        cpi = '' if row.get('cpi') is None else f"{row['cpi']:.3f}"
+        detail = row['error'] if row['status'] in ('error', 'fail') else format_output(row.get('output', []))
+        print(f"{os.path.basename(job.program):24s} {job.variant:10s} {job.model:10s} "
+              f"{os.path.basename(job.stimulus) or '-':12s} {cycles:>8s} {instructions:>8s} {cpi:>6s}  "
+              f"{row['status']:7s} {detail}")
+    print(f"{'='*60}")
+    print("  " + ', '.join(f"{status}: {count}" for status, count in sorted(counts.items())))
+
+
+def write_csv(path: str, jobs: List[Job], results: Dict[str, Dict]):
+    import csv
+    fields = ['program', 'variant', 'model', 'stimulus', 'cycles', 'instructions', 'cpi',
+              'status', 'output', 'error']
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        for job in jobs:
+            row = results[job.key]
+            output = ' '.join(f"{cycle}:{value:X}" for cycle, value in row.get('output', []))
+            writer.writerow([row.get(field, '') if field != 'output' else output for field in fields])
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Run programs x configurations on a process pool")
+    parser.add_argument('programs', nargs='+', help=".asm sources, .mem/.bin images or directories")
+    parser.add_argument('--variants', default='assembler', help="comma separated (assembler,assembler2)")
+    parser.add_argument('--models', default='pipeline', help="comma separated (pipeline,functional)")
+    parser.add_argument('--stimulus', action='append', default=[],
+                        help="stimulus schedule; repeat for several ('none' for no schedule)")
+    parser.add_argument('--results', default='results.jsonl', help="append-only results file")
+    parser.add_argument('--csv', help="also write the consolidated table as CSV")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--max-cycles', type=int, default=100000,
+                        help="cycle (pipeline) / instruction (functional) limit per job")
+    parser.add_argument('--fresh', action='store_true', help="discard earlier results")
+    args = parser.parse_args()
+
+    models = [m.strip() for m in args.models.split(',') if m.strip()]
+    for model in models:
+        if model not in MODELS:
+            print(f"ERROR: unknown model '{model}' (expected {', '.join(MODELS)})")
+            sys.exit(1)
+    variants = [v.strip() for v in args.variants.split(',') if v.strip()]
+    for variant in variants:
+        if variant not in VARIANTS:
+            print(f"ERROR: unknown variant '{variant}' (expected {', '.join(VARIANTS)})")
+            sys.exit(1)
+    stimuli = ['' if s == 'none' else s for s in args.stimulus] or ['']
+    programs = collect(args.programs)
+
+    if args.fresh and os.path.exists(args.results):
+        os.remove(args.results)
+
+    runner = JobRunner(args.results, args.jobs, args.max_cycles)
+    jobs = runner.matrix(programs, variants, models, stimuli)
+    print(f"\n{'='*60}")
+    print(f"{len(jobs)} job(s): {len(programs)} program(s) x {len(variants)} variant(s) x "
+          f"{len(models)} model(s) x {len(stimuli)} stimulus schedule(s)")
+    print(f"{'='*60}")
+
+    start = time.perf_counter()
+    try:
+        results = runner.run(jobs)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; finished jobs are kept in {args.results} (run again to resume)")
+        sys.exit(130)
+    print(f"Finished in {time.perf_counter() - start:.1f} s")
+
+    print_table(jobs, results)
+    if args.csv:
+        write_csv(args.csv, jobs, results)
+        print(f"Wrote {args.csv}")
+    sys.exit(0 if all(results[job.key]['status'] in ('pass', 'limit') for job in jobs) else 1)
+
+
+if __name__ == "__main__":
+    main()
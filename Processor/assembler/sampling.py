@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Sampled Simulation
+Functional fast-forward with periodic cycle-accurate measurement windows
+
+The functional model executes the whole program. Every `interval`
+instructions the pipeline model is started from the functional state
+(PC, SP, flags, registers, input port and a copy of memory) with an
+empty pipeline; it runs `warmup` instructions to fill the pipeline and
+then measures cycles and stall causes over the next `window`
+instructions. The functional model itself then continues, so the
+architectural results never depend on the pipeline model.
+
+CPI and stalls per instruction are estimated as the mean over all
+windows, with a normal-approximation confidence interval
+(mean +/- z * s / sqrt(n)); total cycles are extrapolated from the exact
+functional instruction count.
+
+Pipeline windows run without stimulus events; a stimulus schedule only
+drives the functional model (its cycles count instructions).
+"""
+
+import argparse
+import math
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from assembler import RISCAssembler
+from pipeline import PipelineSimulator
+from simulator import FunctionalSimulator
+
+# A window gives up after this many cycles per instruction (e.g. a stuck pipeline)
+MAX_WINDOW_CPI = 20
+
+
+@dataclass
+class SampleWindow:
+    start: int          # functional instruction count where the window starts
+    instructions: int
+    cycles: int
+    stalls: Dict[str, int]
+
+    @property
+    def cpi(self) -> float:
+        return self.cycles / self.instructions
+
+
+def estimate(values: List[float], confidence: float) -> Tuple[float, float]:
+    """Mean and half-width of its confidence interval"""
+    mean = statistics.fmean(values)
+    if len(values) < 2:
+        return mean, math.inf
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    return mean, z * statistics.stdev(values) / math.sqrt(len(values))
+
+
+class SampledSimulation:
+    def __init__(self, memory, interval: int = 100000, window: int = 2000, warmup: int = 500,
+                 assembler_class=RISCAssembler):
+        if warmup + window > interval:
+            raise ValueError("interval must be at least warmup + window instructions")
+        self.functional = FunctionalSimulator(memory, assembler_class)
+        self.interval = interval
+        self.window = window
+        self.warmup = warmup
+        self.windows: List[SampleWindow] = []
+        self.elapsed = 0.0
+        self.detailed_time = 0.0
+
+    @classmethod
+    def from_image(cls, path: str, **kwargs) -> 'SampledSimulation':
+        """Create a sampled simulation from a .mem/.bin image"""
+        from memimage import open_image
+        with open_image(path) as image:
+            return cls(image.as_array(), **kwargs)
+
+    # ---------------------------------------------------------------- windows
+
+    def warm_pipeline(self) -> PipelineSimulator:
+        """Pipeline model holding the functional state, with an empty pipeline"""
+        func = self.functional
+        pipe = PipelineSimulator(func.memory)
+        pipe.pc = func.pc
+        pipe.sp = func.sp
+        pipe.flags = func.flags
+        pipe.regs = list(func.regs)
+        pipe.input_port = func.input_port
+        return pipe
+
+    def measure(self) -> Optional[SampleWindow]:
+        """Run one warm-up + measurement window on the pipeline model"""
+        start = time.perf_counter()
+        pipe = self.warm_pipeline()
+        limit = (self.warmup + self.window) * MAX_WINDOW_CPI
+
+        while pipe.instructions < self.warmup and not pipe.halted and pipe.cycle < limit:
+            pipe.step()
+        cycles, instructions, stalls = pipe.cycle, pipe.instructions, dict(pipe.stall_causes)
+
+        target = self.warmup + self.window
+        while pipe.instructions < target and not pipe.halted and pipe.cycle < limit:
+            pipe.step()
+
+        self.detailed_time += time.perf_counter() - start
+        if pipe.instructions == instructions:
+            return None
+        return SampleWindow(
+            start=self.functional.instructions + instructions,
+            instructions=pipe.instructions - instructions,
+            cycles=pipe.cycle - cycles,
+            stalls={cause: count - stalls[cause] for cause, count in pipe.stall_causes.items()},
+        )
+
+    # ---------------------------------------------------------------- driving
+
+    def run(self, max_instructions: int, stimulus=None) -> int:
+        """Run the program (functionally) up to max_instructions, sampling as it goes
+        Returns: number of instructions executed
+        """
+        func = self.functional
+        start = time.perf_counter()
+        func.reset()
+        fast_forward = self.interval - self.warmup - self.window
+        # One queue for the whole run: each stretch only pops the events that fall due in it
+        queue = stimulus.queue() if stimulus is not None else None
+
+        while func.instructions < max_instructions and not func.halted:
+            func.run(min(fast_forward, max_instructions - func.instructions), queue)
+            if func.halted or func.instructions >= max_instructions:
+                break
+            sample = self.measure()
+            if sample is not None:
+                self.windows.append(sample)
+            func.run(min(self.warmup + self.window, max_instructions - func.instructions), queue)
+
+        self.elapsed = time.perf_counter() - start
+        return func.instructions
+
+    def report(self, confidence: float = 0.95) -> Dict:
+        """CPI / stall estimates over all windows"""
+        instructions = self.functional.instructions
+        result = {
+            'instructions': instructions,
+            'windows': len(self.windows),
+            'measured_instructions': sum(w.instructions for w in self.windows),
+            'elapsed': self.elapsed,
+            'detailed_time': self.detailed_time,
+            'confidence': confidence,
+        }
+        if not self.windows:
+            return result
+
+        cpi, cpi_error = estimate([w.cpi for w in self.windows], confidence)
+        result['cpi'] = cpi
+        result['cpi_error'] = cpi_error
+        result['cycles'] = cpi * instructions
+        result['cycles_error'] = cpi_error * instructions
+        result['stalls'] = {}
+        for cause in self.windows[0].stalls:
+            mean, error = estimate([w.stalls[cause] / w.instructions for w in self.windows], confidence)
+            result['stalls'][cause] = (mean, error)
+        return result
+
+
+def full_run(memory, max_cycles: int) -> Tuple[int, int, Dict[str, int]]:
+    """Reference: the whole program on the pipeline model (cycles, instructions, stalls)"""
+    pipe = PipelineSimulator(memory)
+    pipe.reset()
+    pipe.run(max_cycles)
+    return pipe.cycle, pipe.instructions, pipe.stall_causes
+
+
+def print_report(title: str, report: Dict):
+    """Human readable estimate"""
+    interval = f"{report['confidence'] * 100:.0f}% CI"
+    print(f"\n{'='*60}")
+    print(f"Sampled simulation: {title}")
+    print(f"{'='*60}")
+    print(f"Instructions:  {report['instructions']} (functional, exact)")
+    print(f"Windows:       {report['windows']} ({report['measured_instructions']} instructions measured)")
+    rate = report['instructions'] / report['elapsed'] if report['elapsed'] else 0
+    print(f"Time:          {report['elapsed']:.2f} s ({rate / 1e6:.2f} M instructions/s, "
+          f"{report['detailed_time']:.2f} s in pipeline windows)")
+    if 'cpi' not in report:
+        print("No complete measurement window (program too short for the interval)")
+    else:
+        print(f"CPI:           {report['cpi']:.4f} +/- {report['cpi_error']:.4f} ({interval})")
+        print(f"Cycles:        {report['cycles']:.0f} +/- {report['cycles_error']:.0f}")
+        print("Stalls per instruction:")
+        for cause, (mean, error) in report['stalls'].items():
+            print(f"  {cause:13s}{mean:.4f} +/- {error:.4f}")
+    print(f"{'='*60}\n")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Sampled CPI estimation (functional fast-forward "
+                                                 "with cycle-accurate windows)")
+    parser.add_argument('image', help=".mem or .bin memory image")
+    parser.add_argument('--max', type=int, default=10**9, help="maximum instructions")
+    parser.add_argument('--interval', type=int, default=100000, help="instructions between windows")
+    parser.add_argument('--window', type=int, default=2000, help="measured instructions per window")
+    parser.add_argument('--warmup', type=int, default=500, help="pipeline warm-up instructions per window")
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--stimulus', help="stimulus schedule for the functional model (cycles = instructions)")
+    parser.add_argument('--validate', action='store_true',
+                        help="also run the whole program on the pipeline model and compare")
+    args = parser.parse_args()
+
+    try:
+        sampled = SampledSimulation.from_image(args.image, interval=args.interval,
+                                               window=args.window, warmup=args.warmup)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    stimulus = None
+    if args.stimulus:
+        from stimulus import StimulusSchedule
+        stimulus = StimulusSchedule.load(args.stimulus)
+
+    sampled.run(args.max, stimulus)
+    report = sampled.report(args.confidence)
+    print_report(args.image, report)
+
+    if args.validate:
+        start = time.perf_counter()
+        cycles, instructions, stalls = full_run(sampled.functional.image, args.max * MAX_WINDOW_CPI)
+        elapsed = time.perf_counter() - start
+        print(f"Full pipeline run: {cycles} cycles, {instructions} instructions in {elapsed:.2f} s")
+        if instructions:
+            cpi = cycles / instructions
+            print(f"  CPI {cpi:.4f}" + (f" (estimate error {(report['cpi'] - cpi) / cpi * 100:+.2f}%)"
+                                        if 'cpi' in report else ""))
+            for cause, count in stalls.items():
+                print(f"  {cause:13s}{count / instructions:.4f}")
+
+
+if __name__ == "__main__":
+    main()
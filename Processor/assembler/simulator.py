@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Functional Model
+Instruction-level interpreter of the ISA (no pipeline timing)
+
+Executes one instruction per step exactly as the ISA specification
+describes it, which makes it the reference the pipeline model is checked
+against. Machine state follows the hardware layout: 18-bit PC/SP, SP
+starting at 2^18-1, flags N,Z,C in bits 2..0 and the PC/flags word pushed
+by interrupts as [flags(20:18), PC(17:0)].
+
+Stimulus schedules (stimulus.py) are applied at instruction boundaries.
+Their cycles count `clock` steps: one per instruction, one per step spent
+halted waiting for the next event and one per cycle rst is held.
+`instructions` only counts retired instructions.
+
+enable_profile() turns on per-address execution counts (exec_counts,
+one array('Q') entry per memory word), used by hotspot.py.
+"""
+
+import argparse
+from array import array
+from typing import List, Optional, Tuple
+
+from assembler import RISCAssembler
+from checkpoint import Checkpoint, image_digest, working_copy
+
+MASK32 = 0xFFFFFFFF
+MASK18 = 0x3FFFF
+
+# Flag register bit positions (N, Z, C)
+FLAG_N = 4
+FLAG_Z = 2
+FLAG_C = 1
+
+
+class FunctionalSimulator:
+    # State saved in checkpoints (besides memory)
+    CHECKPOINT_FIELDS = ('pc', 'sp', 'flags', 'regs', 'input_port', 'halted',
+                         'instructions', 'clock', 'output_trace')
+    CHECKPOINT_REGISTERS = {}
+
+    def __init__(self, memory, assembler_class=RISCAssembler):
+        # The loaded image is kept (not copied) as the base of checkpoint diffs
+        self.image = memory
+        self.memory = working_copy(memory)
+        self.memory_size = len(self.memory)
+        self.dirty = set()
+        self._digest: Optional[str] = None
+
+        asm = assembler_class()
+        self.op = {name: int(code, 2) for name, code in asm.opcodes.items()}
+        self.mnemonics = {code: name for name, code in self.op.items()}
+        two_word = asm.type2_imm + asm.type3_imm + asm.type3_offset + asm.type4_imm + asm.type4_index
+        self.two_word = {self.op[name] for name in two_word}
+
+        self.pc = 0
+        self.sp = MASK18
+        self.flags = 0
+        self.regs = [0] * 8
+        self.input_port = 0
+        self.halted = False
+
+        self.instructions = 0
+        # Time base of stimulus schedules: one step per instruction, plus the
+        # steps spent halted waiting for an event or held in reset
+        self.clock = 0
+        self.output_trace: List[Tuple[int, int]] = []
+        self.exec_counts: Optional[array] = None
+
+    @classmethod
+    def from_image(cls, path: str) -> 'FunctionalSimulator':
+        """Create a simulator from a .mem/.bin image"""
+        from memimage import open_image
+        with open_image(path) as image:
+            return cls(image.as_array())
+
+    def enable_profile(self):
+        """Count executions per instruction address from now on"""
+        self.exec_counts = array('Q', bytes(8 * self.memory_size))
+
+    # ---------------------------------------------------------------- helpers
+
+    def read(self, address: int) -> int:
+        address &= MASK18
+        return self.memory[address] if address < self.memory_size else 0
+
+    def write(self, address: int, value: int):
+        address &= MASK18
+        if address < self.memory_size:
+            self.memory[address] = value & MASK32
+            self.dirty.add(address)
+
+    def push(self, value: int):
+        self.write(self.sp, value)
+        self.sp = (self.sp - 1) & MASK18
+
+    def pop(self) -> int:
+        self.sp = (self.sp + 1) & MASK18
+        return self.read(self.sp)
+
+    def set_flags(self, result: int, carry: Optional[int] = None):
+        """Update Z and N from a result, and C when carry is given"""
+        flags = self.flags & ~(FLAG_Z | FLAG_N)
+        if result == 0:
+            flags |= FLAG_Z
+        if result >> 31:
+            flags |= FLAG_N
+        if carry is not None:
+            flags = (flags & ~FLAG_C) | (FLAG_C if carry else 0)
+        self.flags = flags
+
+    # ---------------------------------------------------------------- execution
+
+    def reset(self):
+        """PC <- M[0], SP <- 2^18-1"""
+        self.pc = self.read(0) & MASK18
+        self.sp = MASK18
+        self.halted = False
+
+    def interrupt(self):
+        """External interrupt: X[SP] <- flags & PC; SP -= 1; PC <- M[1]"""
+        self.push((self.flags << 18) | self.pc)
+        self.pc = self.read(1) & MASK18
+        self.halted = False
+
+    def step(self):
+        """Execute one instruction"""
+        if self.halted:
+            return
+        if self.exec_counts is not None and self.pc < self.memory_size:
+            self.exec_counts[self.pc] += 1
+        word = self.read(self.pc)
+        opcode = word >> 27
+        rd = (word >> 24) & 7
+        rs1 = (word >> 21) & 7
+        rs2 = (word >> 18) & 7
+        if opcode in self.two_word:
+            imm = self.read(self.pc + 1) & 0xFFFF
+            next_pc = (self.pc + 2) & MASK18
+        else:
+            imm = 0
+            next_pc = (self.pc + 1) & MASK18
+
+        regs = self.regs
+        name = self.mnemonics.get(opcode)
+
+        if name is None or name == 'NOP':
+            pass
+        elif name == 'HLT':
+            # HLT freezes the PC in decode; like the pipeline, it is not counted
+            self.halted = True
+            return
+        elif name == 'SETC':
+            self.flags |= FLAG_C
+        elif name == 'NOT':
+            regs[rd] = ~regs[rd] & MASK32
+            self.set_flags(regs[rd])
+        elif name == 'INC':
+            total = regs[rd] + 1
+            regs[rd] = total & MASK32
+            self.set_flags(regs[rd], total >> 32)
+        elif name == 'OUT':
+            self.output_trace.append((self.instructions, regs[rs1]))
+        elif name == 'IN':
+            regs[rd] = self.input_port & MASK32
+        elif name == 'MOV':
+            regs[rd] = regs[rs1]
+        elif name == 'SWAP':
+            regs[rd], regs[rs1] = regs[rs1], regs[rd]
+        elif name == 'ADD' or name == 'IADD':
+            # IADD Rd, Rs, Imm encodes Rs in the Rs2 field
+            total = regs[rs2] + imm if name == 'IADD' else regs[rs1] + regs[rs2]
+            regs[rd] = total & MASK32
+            self.set_flags(regs[rd], total >> 32)
+        elif name == 'SUB':
+            borrow = int(regs[rs1] < regs[rs2])
+            regs[rd] = (regs[rs1] - regs[rs2]) & MASK32
+            self.set_flags(regs[rd], borrow)
+        elif name == 'AND':
+            regs[rd] = regs[rs1] & regs[rs2]
+            self.set_flags(regs[rd])
+        elif name == 'PUSH':
+            self.push(regs[rs1])
+        elif name == 'POP':
+            regs[rd] = self.pop()
+        elif name == 'LDM':
+            regs[rd] = imm
+        elif name == 'LDD':
+            regs[rd] = self.read(regs[rs2] + imm)
+        elif name == 'STD':
+            self.write(regs[rs2] + imm, regs[rs1])
+        elif name in ('JZ', 'JN', 'JC'):
+            flag = {'JZ': FLAG_Z, 'JN': FLAG_N, 'JC': FLAG_C}[name]
+            if self.flags & flag:
+                next_pc = imm
+            self.flags &= ~flag
+        elif name == 'JMP':
+            next_pc = imm
+        elif name == 'CALL':
+            self.push(next_pc)
+            next_pc = imm
+        elif name == 'RET':
+            next_pc = self.pop() & MASK18
+        elif name == 'INT':
+            # Index in bit 0 of either word (assembler.py / assembler2.py encodings)
+            index = (word | self.read(self.pc + 1)) & 1
+            self.push((self.flags << 18) | next_pc)
+            next_pc = self.read(2 + index) & MASK18
+        elif name == 'RTI':
+            value = self.pop()
+            next_pc = value & MASK18
+            self.flags = (value >> 18) & 7
+
+        self.pc = next_pc
+        self.instructions += 1
+        self.clock += 1
+
+    def run(self, max_instructions: int, stimulus=None) -> int:
+        """Run until HLT or for max_instructions clock steps, applying a StimulusSchedule if given
+        (or continuing an EventQueue from an earlier run, which keeps its position)
+        Returns: number of instructions executed
+        """
+        from stimulus import EventQueue
+        queue = stimulus if isinstance(stimulus, EventQueue) or stimulus is None else stimulus.queue()
+        if queue is not None:
+            # Events before the current point (e.g. a restored checkpoint) already happened
+            for _ in queue.pop_due(self.clock - 1):
+                pass
+        start, retired = self.clock, self.instructions
+        while self.clock - start < max_instructions:
+            if queue is not None:
+                for event in queue.pop_due(self.clock):
+                    if event.kind == 'int':
+                        self.interrupt()
+                    elif event.kind == 'in':
+                        self.input_port = event.value & MASK32
+                    elif event.kind == 'rst':
+                        self.reset()
+                        self.clock += event.value
+            if self.halted and (queue is None or not queue):
+                break
+            if self.halted:
+                # Idle until the next event can wake the processor
+                self.clock = min(max(self.clock + 1, queue.next_cycle()), start + max_instructions)
+                continue
+            self.step()
+        return self.instructions - retired
+
+    # ---------------------------------------------------------------- checkpoints
+
+    def image_digest(self) -> str:
+        if self._digest is None:
+            self._digest = image_digest(self.image)
+        return self._digest
+
+    def checkpoint_config(self) -> dict:
+        return {}
+
+    def snapshot(self) -> Checkpoint:
+        return Checkpoint.capture(self, 'functional')
+
+    def restore(self, checkpoint: Checkpoint):
+        checkpoint.restore(self, 'functional')
+        if 'clock' not in checkpoint.state:
+            self.clock = self.instructions  # taken before the clock was kept separately
+
+    def state(self) -> dict:
+        """Architectural state summary"""
+        return {
+            'pc': self.pc,
+            'sp': self.sp,
+            'flags': self.flags,
+            'regs': list(self.regs),
+            'instructions': self.instructions,
+        }
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Functional (instruction-level) model of the processor")
+    parser.add_argument('image', help=".mem or .bin memory image")
+    parser.add_argument('--max', type=int, default=100000, help="maximum instructions (default 100000)")
+    parser.add_argument('--stimulus', help="stimulus schedule (.stim); cycles count instructions")
+    parser.add_argument('--restore', help="start from a checkpoint instead of reset")
+    parser.add_argument('--save-checkpoint', help="write a checkpoint when the run stops")
+    parser.add_argument('--trace', help="append OUT values to a trace log (.otr) instead of printing them")
+    args = parser.parse_args()
+
+    sim = FunctionalSimulator.from_image(args.image)
+    stimulus = None
+    if args.stimulus:
+        from stimulus import StimulusSchedule
+        stimulus = StimulusSchedule.load(args.stimulus)
+
+    if args.restore:
+        sim.restore(Checkpoint.load(args.restore))
+    else:
+        sim.reset()
+    if args.trace:
+        from outtrace import TraceWriter
+        sim.output_trace = TraceWriter(args.trace)
+    count = sim.run(args.max, stimulus)
+    if args.save_checkpoint:
+        sim.snapshot().save(args.save_checkpoint)
+    if args.trace:
+        sim.output_trace.close()
+    print_state(args.image, sim, count)
+
+
+def print_state(title: str, sim: FunctionalSimulator, count: int):
+    """Print registers and output trace"""
+    print(f"\n{'='*60}")
+    print(f"Functional simulation: {title}")
+    print(f"{'='*60}")
+    print(f"Instructions:  {count}{' (halted)' if sim.halted else ''}")
+    print(f"PC:            0x{sim.pc:05X}")
+    print(f"SP:            0x{sim.sp:05X}")
+    print(f"Flags (NZC):   {sim.flags:03b}")
+    for i, value in enumerate(sim.regs):
+        print(f"R{i}:            0x{value:08X}")
+    if not isinstance(sim.output_trace, list):
+        print(f"\nOutput port:  {len(sim.output_trace)} value(s) appended to {sim.output_trace.path}")
+    elif sim.output_trace:
+        print("\nOutput port:")
+        for index, value in sim.output_trace:
+            print(f"  instr {index:6d}: 0x{value:X}")
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
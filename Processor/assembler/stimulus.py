@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Stimulus Schedules
+Cycle-stamped external interrupts and input-port values for the simulators
+
+Schedule file format (.stim), one event per line, '#' or ';' comments:
+
+    # cycle   event   [value]
+    0         in      30          # input_port <- 0x30
+    25        int                 # pulse external_INT for 1 cycle
+    90        int     2           # pulse external_INT for 2 cycles
+    400       rst                 # reset for 1 cycle
+
+Cycles are decimal and count clock periods after reset is released;
+values are hexadecimal like everything in the assembly sources (0x / 0b
+prefixes are accepted too).
+
+The simulators consume a schedule through EventQueue, a binary heap, so
+each event costs O(log n) no matter how many thousands are scheduled. The
+same schedule can be exported as a ModelSim do script that forces the
+same pins at the same clock cycles.
+"""
+
+import argparse
+import heapq
+import random
+import sys
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+# Clock used by the do files: period 200 ns, rising edges at 200, 400, ...
+CLOCK_PERIOD_NS = 200
+# Inputs are forced 50 ns after the rising edge that starts their cycle
+FORCE_OFFSET_NS = 50
+
+
+@dataclass(order=True)
+class StimulusEvent:
+    cycle: int
+    sequence: int
+    kind: str = ''
+    value: int = 0
+
+
+class EventQueue:
+    """Min-heap of pending events ordered by cycle (then file order)"""
+
+    def __init__(self, events: List[StimulusEvent]):
+        self.heap = list(events)
+        heapq.heapify(self.heap)
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def push(self, event: StimulusEvent):
+        heapq.heappush(self.heap, event)
+
+    def pop_due(self, cycle: int) -> Iterator[StimulusEvent]:
+        """Pop every event scheduled at or before `cycle`"""
+        while self.heap and self.heap[0].cycle <= cycle:
+            yield heapq.heappop(self.heap)
+
+    def next_cycle(self) -> Optional[int]:
+        return self.heap[0].cycle if self.heap else None
+
+
+class StimulusSchedule:
+    KINDS = ('int', 'in', 'rst')
+
+    def __init__(self, events: Optional[List[StimulusEvent]] = None):
+        self.events: List[StimulusEvent] = events or []
+
+    def add(self, cycle: int, kind: str, value: Optional[int] = None):
+        """Append an event; 'int' and 'rst' default to a 1-cycle pulse"""
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown stimulus event '{kind}'")
+        if cycle < 0:
+            raise ValueError(f"Negative cycle {cycle}")
+        if value is None:
+            value = 1 if kind in ('int', 'rst') else 0
+        self.events.append(StimulusEvent(cycle, len(self.events), kind, value))
+
+    def queue(self) -> EventQueue:
+        return EventQueue(self.events)
+
+    # ---------------------------------------------------------------- file format
+
+    @staticmethod
+    def parse_value(token: str) -> int:
+        """Hexadecimal by default, 0x / 0b prefixes accepted"""
+        if token.upper().startswith('0B'):
+            return int(token, 2)
+        return int(token, 16)
+
+    @classmethod
+    def parse(cls, lines: List[str]) -> 'StimulusSchedule':
+        schedule = cls()
+        for line_num, line in enumerate(lines, 1):
+            for comment_char in ['#', ';']:
+                if comment_char in line:
+                    line = line[:line.index(comment_char)]
+            parts = line.split()
+            if not parts:
+                continue
+            if len(parts) not in (2, 3):
+                raise ValueError(f"Line {line_num}: expected '<cycle> <event> [value]'")
+            try:
+                cycle = int(parts[0], 10)
+                value = cls.parse_value(parts[2]) if len(parts) == 3 else None
+                schedule.add(cycle, parts[1].lower(), value)
+            except ValueError as e:
+                raise ValueError(f"Line {line_num}: {e}")
+        return schedule
+
+    @classmethod
+    def load(cls, path: str) -> 'StimulusSchedule':
+        with open(path, 'r') as f:
+            return cls.parse(f.readlines())
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            f.write("# cycle  event  value\n")
+            for event in sorted(self.events):
+                value = f"{event.value:X}" if event.kind == 'in' else str(event.value)
+                f.write(f"{event.cycle:<8d} {event.kind:<5s} {value}\n")
+
+    # ---------------------------------------------------------------- generation
+
+    @classmethod
+    def random(cls, cycles: int, interrupts: int, min_gap: int = 30, inputs: int = 0,
+               seed: Optional[int] = None) -> 'StimulusSchedule':
+        """Random interrupts more than `min_gap` cycles apart, plus random input values,
+        all within the first `cycles` cycles"""
+        rng = random.Random(seed)
+        schedule = cls()
+        if interrupts:
+            # Event i is at points[i] + i * min_gap, so the last one is below `cycles`
+            slots = cycles - min_gap * (interrupts - 1)
+            if slots < interrupts:
+                raise ValueError(f"{interrupts} interrupts at least {min_gap} cycles apart "
+                                 f"do not fit in {cycles} cycles")
+            points = sorted(rng.sample(range(slots), interrupts))
+            for i, point in enumerate(points):
+                schedule.add(point + i * min_gap, 'int')
+        for _ in range(inputs):
+            schedule.add(rng.randrange(cycles), 'in', rng.getrandbits(32))
+        schedule.events.sort()
+        for i, event in enumerate(schedule.events):
+            event.sequence = i
+        return schedule
+
+    # ---------------------------------------------------------------- ModelSim export
+
+    def to_do_script(self, mem_file: str, cycles: int) -> str:
+        """Equivalent ModelSim do script (reset for one cycle, then the schedule)"""
+        lines = [
+            "vsim -gui work.processor",
+            "add wave -position insertpoint sim:/processor/*",
+            f"mem load -i {{{mem_file}}} /processor/MEM_Fetch_Stage_inst/memory_inst/ram",
+            "",
+            "force -freeze sim:/processor/clk 1 0, 0 {100000 ps} -r 200ns",
+            "force -freeze sim:/processor/rst 1 0",
+            "force -freeze sim:/processor/external_INT 0 0",
+            "force -freeze sim:/processor/input_port " + '0' * 32 + " 0",
+        ]
+
+        # Cycle k spans the rising edges at 200*(k+1) and 200*(k+2) ns
+        def force_time(cycle: int) -> int:
+            return CLOCK_PERIOD_NS * (cycle + 1) + FORCE_OFFSET_NS
+
+        actions = []  # (time_ns, order, command)
+        actions.append((force_time(0), 0, "force -freeze sim:/processor/rst 0 0"))
+        for event in sorted(self.events):
+            if event.cycle >= cycles:
+                continue
+            t = force_time(event.cycle)
+            if event.kind == 'in':
+                bits = format(event.value & 0xFFFFFFFF, '032b')
+                actions.append((t, 1, f"force -freeze sim:/processor/input_port {bits} 0"))
+            else:
+                pin = 'external_INT' if event.kind == 'int' else 'rst'
+                actions.append((t, 2, f"force -freeze sim:/processor/{pin} 1 0"))
+                actions.append((force_time(event.cycle + event.value), 0,
+                                f"force -freeze sim:/processor/{pin} 0 0"))
+
+        now = 0
+        for t, _, command in sorted(actions):
+            if t > now:
+                lines.append(f"run {t - now} ns")
+                now = t
+            lines.append(command)
+        end = force_time(cycles)
+        if end > now:
+            lines.append(f"run {end - now} ns")
+        return '\n'.join(lines) + '\n'
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Create, inspect and export stimulus schedules")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    gen = sub.add_parser('random', help="generate a random schedule")
+    gen.add_argument('output', help="schedule file to write (.stim)")
+    gen.add_argument('--cycles', type=int, required=True)
+    gen.add_argument('--interrupts', type=int, default=0)
+    gen.add_argument('--inputs', type=int, default=0, help="number of random input-port changes")
+    gen.add_argument('--min-gap', type=int, default=30, help="minimum cycles between interrupts")
+    gen.add_argument('--seed', type=int)
+
+    export = sub.add_parser('export', help="write the equivalent ModelSim do script")
+    export.add_argument('schedule', help="schedule file (.stim)")
+    export.add_argument('mem_file', help="memory image loaded by the script")
+    export.add_argument('output', help="do script to write")
+    export.add_argument('--cycles', type=int, required=True, help="cycles to run after reset")
+
+    args = parser.parse_args()
+    try:
+        if args.command == 'random':
+            schedule = StimulusSchedule.random(args.cycles, args.interrupts, args.min_gap,
+                                               args.inputs, args.seed)
+            schedule.save(args.output)
+            print(f"Wrote {len(schedule.events)} event(s) to {args.output}")
+        else:
+            schedule = StimulusSchedule.load(args.schedule)
+            with open(args.output, 'w') as f:
+                f.write(schedule.to_do_script(args.mem_file, args.cycles))
+            print(f"Wrote {args.output}")
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,10 @@
 
 #you should ignore empty lines
 
+# Values the OUT port must show, in order (checked by outtrace.py / runner.py)
+# expect: 4, 8, 10, 20, 40, 80, 100, 200, 400, 800
+# expect: 6, C, 18, 30, 60, C0, 180, 300, 301
+
 .ORG 0
 200
 
@@ -0,0 +1,58 @@
+"""
+Shared fixtures for the assembler tool tests
+
+The tools are flat modules in the directory above this one and import each
+other by name, so that directory is put on sys.path.
+"""
+
+import os
+import sys
+
+import pytest
+
+ASSEMBLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ASSEMBLER_DIR)
+
+from assembler import RISCAssembler  # noqa: E402
+
+
+@pytest.fixture
+def testcase():
+    """Path of a program in testcases/"""
+    def path(name: str) -> str:
+        return os.path.join(ASSEMBLER_DIR, 'testcases', name)
+    return path
+
+
+@pytest.fixture
+def assemble(tmp_path):
+    """Assemble a program to an image in tmp_path: returns the image path"""
+    def run(source: str, output: str, assembler_class=RISCAssembler) -> str:
+        output_file = str(tmp_path / output)
+        assembler_class().assemble(source, output_file)
+        return output_file
+    return run
+
+
+@pytest.fixture
+def write_source(tmp_path):
+    """Write assembly text to tmp_path: returns its path"""
+    def write(name: str, text: str) -> str:
+        path = tmp_path / name
+        path.write_text(text)
+        return str(path)
+    return write
+
+
+def build_object(text: str):
+    """Object of one module, as `assembler.py -c` writes it"""
+    asm = RISCAssembler()
+    obj, errors = asm.build_object(asm.first_pass(text.splitlines(keepends=True)))
+    assert not errors, errors
+    return obj
+
+
+def read_words(path: str):
+    from memimage import open_image
+    with open_image(path) as image:
+        return image.as_array()
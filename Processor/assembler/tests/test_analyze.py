@@ -0,0 +1,41 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from analyze import ImageAnalyzer  # noqa: E402
+
+PROGRAM = """\
+.ORG 0
+10
+.ORG 10
+LDM R1, 30
+LDD R2, 31(R0)
+OUT R2
+HLT
+.ORG 30
+5
+.ORG 31
+6
+.ORG 32
+7
+.ORG 40
+INC R1
+"""
+
+
+def test_code_data_and_dead_words(write_source):
+    analyzer = ImageAnalyzer()
+    report = analyzer.analyze(analyzer.load(write_source('program.asm', PROGRAM)))
+
+    assert report['roots'] == [{'name': 'reset', 'address': 0x10}]
+    assert report['mix'] == {'LDM': 1, 'LDD': 1, 'OUT': 1, 'HLT': 1}
+    assert report['code_ranges'] == [(0x10, 0x16)]
+    assert report['data_ranges'] == [(0x30, 0x33)]   # LDM 30 starts the table
+    assert report['dead_ranges'] == [(0x40, 0x41)]   # INC is never reached
+
+
+def test_mem_image_and_source_agree(write_source, assemble):
+    source = write_source('program.asm', PROGRAM)
+    analyzer = ImageAnalyzer()
+    assert analyzer.analyze(analyzer.load(assemble(source, 'program.bin'))) \
+        == analyzer.analyze(analyzer.load(source))
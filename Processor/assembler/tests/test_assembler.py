@@ -0,0 +1,52 @@
+import hashlib
+
+import pytest
+
+import assembler2
+from assembler import RISCAssembler
+from conftest import read_words
+
+# SHA-1 of the .mem images written by the baseline assemblers (before the
+# object format, watch mode and daemon were added)
+GOLDEN = {
+    ('assembler', 'Branch.asm'): '8bdedc3545aaf13c084c2cbc94d079754685f8af',
+    ('assembler', 'BranchPrediction.asm'): '75cb78a1d3325de260ef25e1059f4955a4d3cfb9',
+    ('assembler', 'Memory.asm'): '83692b02a2df8402cc0323ff93f924f27aa5a4fb',
+    ('assembler', 'OneOperand.asm'): 'cf5df6e4f7b3a328d850d4b0eca98af8e7225949',
+    ('assembler', 'TwoOperand.asm'): '6fa3a431cc8d8e08a7a624b8a4aa0a6b3fce1d96',
+    ('assembler', 'test.asm'): 'eb57ee9e5d5364c744a68733a045980aab56b63e',
+    ('assembler2', 'Branch.asm'): '8d44bdf249e9c4586057722fb0d85717a570206f',
+    ('assembler2', 'BranchPrediction.asm'): '75cb78a1d3325de260ef25e1059f4955a4d3cfb9',
+    ('assembler2', 'Memory.asm'): '83692b02a2df8402cc0323ff93f924f27aa5a4fb',
+    ('assembler2', 'OneOperand.asm'): 'cf5df6e4f7b3a328d850d4b0eca98af8e7225949',
+    ('assembler2', 'TwoOperand.asm'): '6fa3a431cc8d8e08a7a624b8a4aa0a6b3fce1d96',
+    ('assembler2', 'test.asm'): 'eb57ee9e5d5364c744a68733a045980aab56b63e',
+}
+VARIANTS = {'assembler': RISCAssembler, 'assembler2': assembler2.RISCAssembler}
+
+
+@pytest.mark.parametrize('variant,name', sorted(GOLDEN))
+def test_testcase_image_unchanged(variant, name, testcase, assemble):
+    image = assemble(testcase(name), 'program.mem', VARIANTS[variant])
+    with open(image, 'rb') as f:
+        assert hashlib.sha1(f.read()).hexdigest() == GOLDEN[(variant, name)]
+
+
+def test_binary_image_matches_text_image(testcase, assemble):
+    text = assemble(testcase('Memory.asm'), 'program.mem')
+    binary = assemble(testcase('Memory.asm'), 'program.bin')
+    assert read_words(binary) == read_words(text)
+
+
+def test_hex_named_label_is_the_label(write_source, assemble):
+    source = write_source('labels.asm', ".ORG 0\n10\n.ORG 10\nJMP BEEF\nLDM R1, ADD1\n"
+                                        ".ORG 20\nBEEF: HLT\n")
+    words = read_words(assemble(source, 'labels.mem'))
+    assert words[0x11] == 0x20      # JMP BEEF: the label, not 0xBEEF
+    assert words[0x13] == 0xADD1    # no label ADD1: a hex number
+
+
+def test_extern_needs_linking(write_source, assemble):
+    source = write_source('main.asm', ".EXTERN BEEF\n.ORG 0\n10\n.ORG 10\nCALL BEEF\nHLT\n")
+    with pytest.raises(SystemExit):
+        assemble(source, 'main.mem')
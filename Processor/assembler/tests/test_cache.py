@@ -0,0 +1,93 @@
+import pytest
+
+from assembler import RISCAssembler
+from cache import Cache
+from checkpoint import Checkpoint
+from conftest import read_words
+from fuzz import ProgramGenerator, assemble as assemble_program
+from pipeline import PipelineSimulator
+
+
+def cached_pipeline(words):
+    return PipelineSimulator(words, icache=Cache.parse('16,1,4'), dcache=Cache.parse('8,1,2'))
+
+
+def state(sim):
+    return (sim.regs, sim.flags, sim.sp, list(sim.memory), sim.output_trace, sim.instructions,
+            sim.cycle, sim.stall_causes, sim.icache.stats(), sim.dcache.stats())
+
+
+def test_replacement_policies():
+    lru, fifo = Cache(8, 2, 1, 'lru'), Cache(8, 2, 1, 'fifo')
+    assert lru.hit_rate is None
+    for cache in (lru, fifo):
+        # Blocks 0, 4 and 8 share set 0 of two ways; 0 is used again before 8 arrives
+        hits = [cache.access(address) for address in (0, 4, 0, 8, 0)]
+        assert hits[:3] == [False, False, True]
+    assert lru.sets[0] == [8, 0] and lru.evictions == 1
+    assert fifo.sets[0] == [8, 0] and fifo.evictions == 2
+    assert lru.hit_rate == 2 / 5
+
+    with pytest.raises(ValueError, match="unknown replacement policy"):
+        Cache.parse('8,2,1,random')
+
+
+def test_resumed_cached_run_matches_uninterrupted_run(tmp_path, testcase, assemble):
+    words = read_words(assemble(testcase('Memory.asm'), 'program.mem'))
+    whole = cached_pipeline(words)
+    whole.reset()
+    whole.run(20000)
+
+    first = cached_pipeline(words)
+    first.reset()
+    first.run(333)
+    path = str(tmp_path / 'run.ckpt')
+    first.snapshot().save(path)
+
+    resumed = cached_pipeline(words)
+    resumed.restore(Checkpoint.load(path))
+    resumed.run(20000 - resumed.cycle)
+    assert state(resumed) == state(whole)
+
+
+def test_checkpoint_during_a_cache_miss_resumes_it(testcase, assemble):
+    words = read_words(assemble(testcase('Memory.asm'), 'program.mem'))
+    whole = cached_pipeline(words)
+    whole.reset()
+    whole.run(5000)
+
+    first = cached_pipeline(words)
+    first.reset()
+    while not first.freeze:
+        first.step()
+    first.step()
+    resumed = cached_pipeline(words)
+    resumed.restore(first.snapshot())
+    assert resumed.freeze == first.freeze
+    resumed.run(5000 - resumed.cycle)
+    assert state(resumed) == state(whole)
+    assert resumed.cycle == whole.cycle == 5000
+
+
+def test_cache_misses_stay_inside_max_cycles(testcase, assemble):
+    sim = cached_pipeline(read_words(assemble(testcase('Memory.asm'), 'program.mem')))
+    sim.reset()
+    assert sim.run(5003) == 5003
+    assert sim.cycle == 5003
+
+
+@pytest.mark.parametrize('split', [False, True])
+def test_instructions_are_tagged_with_their_address(split):
+    programs = ProgramGenerator()
+    for seed in range(20):
+        program, input_value = programs.generate(seed)
+        lines = [text + '\n' for text, _ in program]
+        starts = {address for address, _, _, is_data in RISCAssembler().first_pass(lines) if not is_data}
+
+        sim = PipelineSimulator(assemble_program(program), split=split)
+        sim.input_port = input_value
+        sim.enable_profile()
+        sim.reset()
+        sim.run(5000)
+        issued = {address for address, n in enumerate(sim.exec_counts) if n}
+        assert sim.halted and issued <= starts, f"seed {seed}: {sorted(issued - starts)}"
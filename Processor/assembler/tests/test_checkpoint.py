@@ -0,0 +1,70 @@
+import pytest
+
+from cache import Cache
+from checkpoint import Checkpoint
+from conftest import read_words
+from pipeline import PipelineSimulator, Policy
+from simulator import FunctionalSimulator
+
+
+def pipeline(words, **options):
+    return PipelineSimulator(words, **options)
+
+
+def cached_pipeline(words):
+    return PipelineSimulator(words, icache=Cache.parse('16,1,4'), dcache=Cache.parse('8,1,2'))
+
+
+def state(sim):
+    return (sim.regs, sim.flags, sim.sp, list(sim.memory), sim.output_trace, sim.instructions)
+
+
+def progress(sim) -> int:
+    """What run() counts: cycles for the pipeline, instructions for the functional model"""
+    return sim.cycle if isinstance(sim, PipelineSimulator) else sim.instructions
+
+
+@pytest.mark.parametrize('make,split_at,total', [
+    (pipeline, 150, 2000),
+    (FunctionalSimulator, 40, 2000),
+])
+def test_resumed_run_matches_uninterrupted_run(make, split_at, total, tmp_path, testcase, assemble):
+    words = read_words(assemble(testcase('Memory.asm'), 'program.mem'))
+    whole = make(words)
+    whole.reset()
+    whole.run(total)
+
+    first = make(words)
+    first.reset()
+    first.run(split_at)
+    path = str(tmp_path / 'run.ckpt')
+    first.snapshot().save(path)
+
+    resumed = make(words)
+    resumed.restore(Checkpoint.load(path))
+    resumed.run(total - progress(resumed))
+    assert state(resumed) == state(whole)
+    if isinstance(whole, PipelineSimulator):
+        assert (resumed.cycle, resumed.stall_causes) == (whole.cycle, whole.stall_causes)
+
+
+def test_restore_into_a_different_configuration_is_refused(testcase, assemble):
+    words = read_words(assemble(testcase('Memory.asm'), 'program.mem'))
+    sim = cached_pipeline(words)
+    sim.reset()
+    sim.run(100)
+    checkpoint = sim.snapshot()
+
+    for other in (pipeline(words), pipeline(words, split=True),
+                  pipeline(words, policy=Policy(forwarding='none'))):
+        with pytest.raises(ValueError, match="different configuration"):
+            other.restore(checkpoint)
+
+
+def test_restore_from_another_image_is_refused(testcase, assemble):
+    sim = FunctionalSimulator(read_words(assemble(testcase('Memory.asm'), 'program.mem')))
+    sim.reset()
+    checkpoint = sim.snapshot()
+    other = FunctionalSimulator(read_words(assemble(testcase('Branch.asm'), 'other.mem')))
+    with pytest.raises(ValueError, match="different memory image"):
+        other.restore(checkpoint)
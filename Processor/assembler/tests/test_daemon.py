@@ -0,0 +1,68 @@
+import os
+import socket
+import threading
+
+import pytest
+
+import assembler
+from assembler import RISCAssembler
+from daemon import AssemblerDaemon, request
+
+PROGRAM = ".ORG 0\n10\n.ORG 10\nLDM R1, 5\nOUT R1\nHLT\n"
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    """Socket path of a daemon served from a thread (stopped afterwards)"""
+    path = str(tmp_path / 'asm.sock')
+    server = AssemblerDaemon(path, RISCAssembler, assembler.main)
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    while not os.path.exists(path):
+        thread.join(0.01)
+    yield path
+    request(path, ['--stop'])
+    thread.join(5)
+
+
+def send(path: str, cwd: str, args):
+    """Raw request with an explicit client directory: (status, output)"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+        client.sendall('\t'.join([cwd] + args).encode() + b'\n')
+        reply = b''.join(iter(lambda: client.recv(65536), b''))
+    status, _, output = reply.partition(b'\n')
+    return status.decode(), output.decode()
+
+
+def read(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_round_trip_matches_a_direct_assemble(tmp_path, daemon, write_source, assemble):
+    source = write_source('program.asm', PROGRAM)
+    output = str(tmp_path / 'served.mem')
+    for text in (PROGRAM, PROGRAM.replace('LDM R1, 5', 'LDM R1, 7')):
+        write_source('program.asm', text)
+        status, reply = request(daemon, [source, output])
+        assert status == '0' and b'Assembly Successful!' in reply
+        assert read(output) == read(assemble(source, 'direct.mem'))
+
+
+def test_relative_paths_follow_the_client_directory(tmp_path, daemon):
+    client_dir = tmp_path / 'client'
+    client_dir.mkdir()
+    (client_dir / 'program.asm').write_text(PROGRAM)
+    before = os.getcwd()
+
+    status, output = send(daemon, str(client_dir), ['program.asm', 'program.bin'])
+    assert status == '0', output
+    assert os.path.exists(client_dir / 'program.bin')
+    assert os.getcwd() == before
+
+
+def test_failure_status_is_passed_on(tmp_path, daemon):
+    status, output = send(daemon, str(tmp_path), ['missing.asm'])
+    assert status == '1'
+    assert "ERROR: Input file" in output
@@ -0,0 +1,39 @@
+import os
+
+from assembler import RISCAssembler
+from hotspot import SourceMap, find_loops, fold, run_profile
+
+# Count R1 down from 3; the loop body is lines 6-7
+PROGRAM = """\
+.ORG 0
+10
+.ORG 10
+LDM R1, 3
+LDM R2, 1
+LOOP: SUB R1, R1, R2
+JZ DONE
+JMP LOOP
+DONE: HLT
+"""
+
+
+def test_map_is_written_next_to_an_extensionless_image(tmp_path, write_source):
+    source = write_source('loop.asm', PROGRAM)
+    os.makedirs(tmp_path / 'out.d')
+    RISCAssembler().assemble(source, str(tmp_path / 'out.d' / 'prog'))
+
+    assert sorted(os.listdir(tmp_path / 'out.d')) == ['prog', 'prog.lst', 'prog.map']
+    loaded = SourceMap.load(str(tmp_path / 'out.d' / 'prog.map'))
+    assert loaded.lines == SourceMap.assemble(source)[0].lines
+
+
+def test_line_counts_and_loops(write_source):
+    source_map, memory = SourceMap.assemble(write_source('loop.asm', PROGRAM))
+    for model in ('functional', 'pipeline'):
+        sim, exec_counts, cycle_counts = run_profile(memory, model, 1000)
+        assert sim.halted
+        counts = {p.line_num: p.executions for p in fold(source_map, exec_counts, cycle_counts)}
+        assert {line: counts[line] for line in range(4, 9)} == {4: 1, 5: 1, 6: 3, 7: 3, 8: 2}
+
+        loop, = find_loops(source_map, memory, fold(source_map, exec_counts, cycle_counts))
+        assert (loop['first_line'], loop['last_line'], loop['iterations']) == (6, 8, 3)
@@ -0,0 +1,64 @@
+import pytest
+
+from conftest import build_object, read_words
+from linker import RISCLinker
+from simulator import FunctionalSimulator
+
+MAIN = """\
+.EXTERN DOUBLE
+.ORG 0
+10
+.ORG 10
+LDM R1, 5
+CALL DOUBLE
+OUT R1
+HLT
+"""
+
+LIB = """\
+.SECTION lib
+.GLOBAL DOUBLE
+DOUBLE: ADD R1, R1, R1
+RET
+"""
+
+
+def link(*objects):
+    linker = RISCLinker()
+    for i, obj in enumerate(objects):
+        linker.add_object(f"module{i}", obj)
+    words = [int(word, 2) for word in linker.link()]
+    return linker, words
+
+
+def test_absolute_module_links_to_the_assembled_image(testcase, assemble):
+    with open(testcase('Memory.asm')) as f:
+        obj = build_object(f.read())
+    _, words = link(obj)
+    assert words == list(read_words(assemble(testcase('Memory.asm'), 'program.mem')))
+
+
+def test_relocated_call_runs():
+    linker, words = link(build_object(MAIN), build_object(LIB))
+    assert linker.global_symbols['DOUBLE'] >= linker.base_address
+    sim = FunctionalSimulator(words)
+    sim.reset()
+    sim.run(100)
+    assert sim.halted
+    assert [value for _, value in sim.output_trace] == [10]
+
+
+def test_hex_literal_spelled_like_a_global_symbol_is_rejected():
+    main = MAIN.replace('.EXTERN DOUBLE\n', '').replace('DOUBLE', 'ADD1')
+    lib = LIB.replace('DOUBLE', 'ADD1')
+    with pytest.raises(ValueError, match="ADD1"):
+        link(build_object(main), build_object(lib))
+
+
+def test_global_org_label_without_words_in_its_module():
+    # ENTRY is placed with .ORG but the module only emits a relocatable section
+    lib = ".GLOBAL ENTRY\n.ORG 40\nENTRY:\n.SECTION lib\nNOP\n"
+    main = ".EXTERN ENTRY\n.ORG 0\n10\n.ORG 10\nJMP ENTRY\n"
+    linker, words = link(build_object(main), build_object(lib))
+    assert linker.global_symbols['ENTRY'] == 0x40
+    assert words[0x11] == 0x40
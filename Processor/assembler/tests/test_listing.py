@@ -0,0 +1,47 @@
+from conftest import read_words
+
+PROGRAM = """\
+# comment
+.ORG 0
+10
+.ORG 10
+START: LDM R1, 5
+PUSH R1
+SWAP R1, R2
+JMP START
+"""
+
+
+def listing_rows(path: str):
+    """(address, word, cycles, line number) of every listed word, from the fixed columns"""
+    rows = []
+    with open(path) as f:
+        for text in f:
+            if text.startswith(';') or not text[2:7].strip():
+                continue
+            cycles, line_num = text[19:22].strip(), text[24:29].strip()
+            rows.append((int(text[2:7], 16), int(text[9:17], 16),
+                         int(cycles) if cycles else None, int(line_num) if line_num else None))
+    return rows
+
+
+def test_listing_matches_the_image(write_source, assemble):
+    image = assemble(write_source('program.asm', PROGRAM), 'program.mem')
+    words = read_words(image)
+    rows = listing_rows(image[:-len('.mem')] + '.lst')
+
+    assert [address for address, *_ in rows] == [0x0, 0x10, 0x11, 0x12, 0x13, 0x14, 0x15]
+    assert all(word == words[address] for address, word, *_ in rows)
+    # Two words for LDM/JMP, a memory bubble for PUSH, two extra passes for SWAP
+    assert [(cycles, line) for _, _, cycles, line in rows if line] == \
+        [(None, 3), (2, 5), (2, 6), (3, 7), (2, 8)]
+
+
+def test_listing_keeps_every_source_line(write_source, assemble):
+    image = assemble(write_source('program.asm', PROGRAM), 'program.mem')
+    with open(image[:-len('.mem')] + '.lst') as f:
+        text = f.read()
+    for line_num, line in enumerate(PROGRAM.splitlines(), 1):
+        assert f"{line_num:5d}  {line}\n" in text
+    assert "; Estimated cycles with every instruction executed once: 9\n" in text
+    assert ";   START                = 0x00010\n" in text
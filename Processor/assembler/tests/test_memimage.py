@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from conftest import read_words
+from memimage import convert, open_image
+
+
+def test_mem_bin_round_trip(tmp_path, testcase, assemble):
+    text = assemble(testcase('Branch.asm'), 'program.mem')
+    binary, back = str(tmp_path / 'converted.bin'), str(tmp_path / 'back.mem')
+    convert(text, binary)
+    convert(binary, back)
+
+    assert read_words(binary) == read_words(text)
+    with open(text, 'rb') as a, open(back, 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_random_access_matches_full_read(testcase, assemble):
+    for image_file in (assemble(testcase('Memory.asm'), 'program.mem'),
+                       assemble(testcase('Memory.asm'), 'program.bin')):
+        words = read_words(image_file)
+        with open_image(image_file) as image:
+            for address in (0, 0x200, 0x201, 0x215, len(words) - 1):
+                assert image[address] == words[address]
+
+
+def test_free_form_mem_is_read_by_address(tmp_path):
+    path = tmp_path / 'saved.mem'
+    path.write_text("// format=mti addressradix=h dataradix=s version 1.0 wordsperline=1\n"
+                    f"10: {5:032b}\n"
+                    f" 2: {7:032b}\n"
+                    f"1f: {0xFFFF:032b}\n")
+    for _ in range(2):  # built, then read back from the .idx sidecar
+        with open_image(str(path)) as image:
+            assert len(image) == 0x20
+            assert (image[2], image[0x10], image[0x1F]) == (7, 5, 0xFFFF)
+            assert image[0] == image[3] == image[0x11] == 0
+            assert list(image.as_array()[:4]) == [0, 0, 7, 0]
+
+
+def test_stale_line_index_sidecar_is_rebuilt(tmp_path):
+    path = tmp_path / 'saved.mem'
+    path.write_text(f"3: {9:032b}\n")
+    sidecar = tmp_path / 'saved.mem.idx'
+    sidecar.write_bytes(bytes(8))  # line-order index from an older version
+    os.utime(sidecar, (os.path.getmtime(path) + 1,) * 2)
+    with open_image(str(path)) as image:
+        assert image[3] == 9 and image[0] == 0
+
+
+@pytest.mark.parametrize('name', ['empty.mem', 'empty.bin'])
+def test_empty_image(tmp_path, name):
+    (tmp_path / name).write_bytes(b'')
+    with open_image(str(tmp_path / name)) as image:
+        assert len(image) == 0
+        assert list(image.as_array()) == []
+
+
+def test_truncated_binary_image_is_rejected(tmp_path):
+    (tmp_path / 'short.bin').write_bytes(b'\x01\x02\x03')
+    with pytest.raises(ValueError, match="multiple of 4"):
+        open_image(str(tmp_path / 'short.bin'))
+
+
+def test_truncated_text_image_is_rejected(tmp_path, testcase, assemble):
+    with open(assemble(testcase('Memory.asm'), 'program.mem'), 'rb') as f:
+        text = f.read()
+    (tmp_path / 'short.mem').write_bytes(text[:len(text) // 2])
+    with pytest.raises(ValueError, match="truncated"):
+        open_image(str(tmp_path / 'short.mem'))
@@ -0,0 +1,77 @@
+import pytest
+
+import fuzz
+from fuzz import ProgramGenerator, assemble, compare, explain, known_differences
+
+SEEDS = range(100)
+
+# Wrong on every execution, so the default generator still produces them
+EVERY_EXECUTION = {'setc', 'int'}
+
+
+def body(lines: str):
+    """Program lines for a straight-line body, routines s0 and h0/h1 included"""
+    program = [(".ORG 0", True), ("100", True), (".ORG 2", True), ("300", True),
+               (".ORG 3", True), ("340", True), (".ORG 100", True)]
+    program += [(line.strip(), False) for line in lines.split(';')] + [("HLT", True)]
+    program += [(".ORG 200", True), ("s0:", True), ("RET", True),
+                (".ORG 300", True), ("h0:", True), ("INC R4", True), ("RTI", True),
+                (".ORG 340", True), ("h1:", True), ("INC R5", True), ("RTI", True)]
+    return program
+
+
+def test_default_programs_avoid_the_adjacency_patterns():
+    programs = ProgramGenerator()
+    for seed in SEEDS:
+        program, _ = programs.generate(seed)
+        assert set(known_differences(program)) <= EVERY_EXECUTION, f"seed {seed}"
+
+
+def test_default_mismatches_come_from_setc_and_int():
+    programs = ProgramGenerator()
+    for seed in SEEDS:
+        program, input_value = programs.generate(seed)
+        diffs, _ = compare(assemble(program), input_value, 5000)
+        if diffs:
+            known = explain(program, input_value, 5000)
+            assert known and set(known) <= EVERY_EXECUTION, f"seed {seed}: {diffs}"
+
+
+def test_every_mismatch_is_a_known_difference():
+    programs = ProgramGenerator(include_known=True)
+    for seed in SEEDS:
+        program, input_value = programs.generate(seed)
+        diffs, _ = compare(assemble(program), input_value, 5000)
+        if diffs:
+            assert explain(program, input_value, 5000), f"seed {seed}: {diffs}"
+
+
+@pytest.mark.parametrize('lines, expected', [
+    ("SWAP R1, R2; SWAP R2, R0", {'swap-swap'}),
+    ("SWAP R1, R2; NOP; SWAP R3, R4", {'swap-swap'}),
+    ("SWAP R1, R2; NOP; NOP; SWAP R2, R0", set()),
+    ("SWAP R3, R3", {'swap-self'}),
+    ("MOV R1, R0; NOP; IN R2", {'in'}),
+    ("MOV R0, R1; IN R2", set()),
+    ("MOV R1, R0; NOP; NOP; IN R2", set()),
+    ("STD R1, 2(R7); INT 0", {'std-int', 'int'}),
+    ("STD R1, 2(R7); NOP; INT 0", {'int'}),
+    ("CALL s0", {'call-ret'}),
+    ("SETC; NOP; NOP; NOP; SWAP R1, R2", {'setc'}),
+])
+def test_patterns_are_matched_by_adjacency(lines, expected):
+    assert set(known_differences(body(lines))) == expected
+
+
+def test_mismatch_is_explained_only_by_a_pattern_that_causes_it():
+    program = body("LDM R1, 22; LDM R2, 33; SWAP R1, R2; SWAP R2, R0")
+    diffs, _ = compare(assemble(program), 0, 5000)
+    assert diffs and explain(program, 0, 5000) == ['swap-swap']
+
+
+def test_unrelated_pattern_does_not_explain_a_mismatch(monkeypatch):
+    program = body("SETC; LDM R1, 22; LDM R2, 33; SWAP R1, R2; SWAP R2, R0; INC R1")
+    setc = {name: lines for name, lines in known_differences(program).items() if name == 'setc'}
+    monkeypatch.setattr(fuzz, 'known_differences', lambda _: setc)
+    assert compare(assemble(program), 0, 5000)[0]
+    assert explain(program, 0, 5000) == []
@@ -0,0 +1,62 @@
+from conftest import read_words
+from outtrace import (RECORD, TraceWriter, compare_streams, expected_stream, parse_expectations,
+                      read_trace)
+from pipeline import PipelineSimulator
+
+PROGRAM = """\
+# expect: 5, 6
+# expect: 7*2
+.ORG 0
+10
+.ORG 10
+LDM R1, 5
+OUT R1
+INC R1
+OUT R1
+INC R1
+OUT R1
+OUT R1
+HLT
+"""
+
+
+def test_expect_lines_are_concatenated_with_repeats(write_source):
+    assert parse_expectations(write_source('program.asm', PROGRAM)) == [5, 6, 7, 7]
+    assert parse_expectations(write_source('plain.asm', ".ORG 0\nHLT\n")) is None
+
+
+def test_streamed_trace_matches_the_expected_values(tmp_path, write_source, assemble):
+    source = write_source('program.asm', PROGRAM)
+    sim = PipelineSimulator(read_words(assemble(source, 'program.mem')))
+    path = str(tmp_path / 'out.otr')
+    with TraceWriter(path, buffer_records=1) as trace:
+        sim.output_trace = trace
+        sim.reset()
+        sim.run(1000)
+    assert sim.halted and len(trace) == 4
+
+    records = list(read_trace(path))
+    assert [value for _, value in records] == [5, 6, 7, 7]
+    assert [cycle for cycle, _ in records] == sorted(cycle for cycle, _ in records)
+    assert compare_streams(expected_stream(source), (value for _, value in records)).ok
+
+
+def test_partial_record_at_the_end_is_ignored(tmp_path):
+    path = str(tmp_path / 'out.otr')
+    with TraceWriter(path) as trace:
+        trace.append((3, 0x10))
+        trace.append((9, 0x20))
+    with open(path, 'ab') as f:
+        f.write(RECORD.pack(12, 0x30)[:5])
+    assert list(read_trace(path)) == [(3, 0x10), (9, 0x20)]
+
+
+def test_mismatches_and_prefixes():
+    result = compare_streams([1, 2, 3], [1, 9, 3, 4])
+    assert not result.ok and not result.prefix_ok
+    assert result.mismatches == [(1, 2, 9), (3, None, 4)]
+    assert (result.expected_count, result.actual_count, result.matched) == (3, 4, 2)
+
+    shorter = compare_streams([1, 2, 3], [1, 2])
+    assert not shorter.ok and shorter.prefix_ok
+    assert shorter.mismatches == [(2, 3, None)]
@@ -0,0 +1,46 @@
+import pytest
+
+from conftest import read_words
+from fuzz import ProgramGenerator, assemble as assemble_program
+from pipeline import POLICIES, PipelineSimulator
+from policies import run_policy
+
+
+def final_state(memory, policy: str, split: bool, input_value: int):
+    sim = PipelineSimulator(memory, split=split, policy=POLICIES[policy])
+    sim.input_port = input_value
+    sim.reset()
+    sim.run(5000)
+    return sim.halted, sim.regs, sim.flags, sim.sp, sim.memory, [v for _, v in sim.output_trace]
+
+
+@pytest.mark.parametrize('split', [False, True])
+def test_policies_only_change_timing(split):
+    # The default generator avoids SWAP Rx, Rx and back-to-back SWAPs, the
+    # only programs whose results depend on the SWAP implementation
+    programs = ProgramGenerator()
+    for seed in range(30):
+        program, input_value = programs.generate(seed)
+        memory = assemble_program(program)
+        hardware = final_state(memory, 'hardware', split, input_value)
+        for policy in POLICIES:
+            assert final_state(memory, policy, split, input_value) == hardware, f"seed {seed}: {policy}"
+
+
+def test_stall_causes_follow_the_policy(write_source, assemble):
+    source = write_source('hazards.asm', ".ORG 0\n10\n.ORG 10\nLDM R1, 5\nLDM R2, 6\n"
+                                         "SWAP R1, R2\nADD R3, R1, R2\nOUT R3\nSWAP R3, R1\nOUT R1\nHLT\n")
+    memory = read_words(assemble(source, 'hazards.mem'))
+    runs = {policy: run_policy(memory, policy, 1000) for policy in POLICIES}
+    assert all(run['finished'] and run['output'] == runs['hardware']['output'] for run in runs.values())
+
+    assert runs['hardware']['stalls']['swap'] > 0
+    assert runs['swap-dual']['stalls']['swap'] == 0
+    assert runs['swap-dual']['cycles'] < runs['hardware']['cycles']
+    assert runs['no-forwarding']['cycles'] > runs['hardware']['cycles']
+
+
+def test_run_ends_in_the_nop_fill(testcase, assemble):
+    memory = read_words(assemble(testcase('Branch.asm'), 'program.mem'))
+    run = run_policy(memory, 'hardware', 100000)
+    assert run['finished'] and run['cycles'] < 1000
@@ -0,0 +1,50 @@
+import json
+import sys
+
+import pytest
+
+import runner
+from runner import JobRunner
+
+HALTS = ".ORG 0\n10\n.ORG 10\nLDM R1, 5\nOUT R1\nHLT\n"
+SPINS = ".ORG 0\n10\n.ORG 10\nLOOP: JMP LOOP\n"
+
+
+def rows(path: str):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_rerun_skips_finished_jobs(tmp_path, write_source, capsys):
+    programs = [write_source('halts.asm', HALTS), write_source('spins.asm', SPINS)]
+    results = str(tmp_path / 'results.jsonl')
+    sweep = JobRunner(results, workers=2, max_cycles=200)
+    jobs = sweep.matrix(programs, ['assembler'], ['pipeline', 'functional'], [''])
+
+    first = sweep.run(jobs)
+    assert sorted(row['status'] for row in first.values()) == ['limit', 'limit', 'pass', 'pass']
+    capsys.readouterr()
+
+    assert sweep.run(jobs) == first
+    assert capsys.readouterr().out == ''
+    assert len(rows(results)) == len(jobs)
+
+
+def test_changed_source_is_run_again(tmp_path, write_source):
+    source = write_source('halts.asm', HALTS)
+    results = str(tmp_path / 'results.jsonl')
+    sweep = JobRunner(results, workers=1, max_cycles=200)
+    sweep.run(sweep.matrix([source], ['assembler'], ['functional'], ['']))
+
+    write_source('halts.asm', HALTS.replace('LDM R1, 5', 'LDM R1, 6'))
+    result, = sweep.run(sweep.matrix([source], ['assembler'], ['functional'], [''])).values()
+    assert result['output'][0][1] == 6
+    assert len(rows(results)) == 2
+
+
+def test_unknown_variant_is_an_error(write_source, monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['runner.py', write_source('halts.asm', HALTS), '--variants', 'assembler3'])
+    with pytest.raises(SystemExit) as exit_info:
+        runner.main()
+    assert exit_info.value.code == 1
+    assert "ERROR: unknown variant 'assembler3'" in capsys.readouterr().out
@@ -0,0 +1,51 @@
+from conftest import read_words
+from sampling import SampledSimulation
+from simulator import FunctionalSimulator
+from stimulus import StimulusSchedule
+
+# Echo the input port forever; the external interrupt counts in R2
+PROGRAM = """\
+.ORG 0
+10
+.ORG 1
+20
+.ORG 10
+LOOP: IN R1
+OUT R1
+JMP LOOP
+.ORG 20
+INC R2
+RTI
+"""
+
+
+def schedule() -> StimulusSchedule:
+    events = StimulusSchedule()
+    for cycle in range(0, 3000, 170):
+        events.add(cycle, 'in', cycle)
+        events.add(cycle + 85, 'int')
+    return events
+
+
+def test_windows_do_not_change_the_functional_run(write_source, assemble):
+    words = read_words(assemble(write_source('echo.asm', PROGRAM), 'echo.mem'))
+    reference = FunctionalSimulator(words)
+    reference.reset()
+    reference.run(3000, schedule())
+
+    sampled = SampledSimulation(words, interval=300, window=100, warmup=20)
+    sampled.run(reference.instructions, schedule())
+    func = sampled.functional
+    assert (func.regs, func.output_trace, func.instructions) == \
+        (reference.regs, reference.output_trace, reference.instructions)
+    assert sampled.report()['windows'] == len(sampled.windows) > 0
+
+
+def test_stimulus_queue_is_built_once(write_source, assemble, monkeypatch):
+    words = read_words(assemble(write_source('echo.asm', PROGRAM), 'echo.mem'))
+    built = []
+    original = StimulusSchedule.queue
+    monkeypatch.setattr(StimulusSchedule, 'queue', lambda self: built.append(1) or original(self))
+
+    SampledSimulation(words, interval=300, window=100, warmup=20).run(3000, schedule())
+    assert len(built) == 1
@@ -0,0 +1,95 @@
+import pytest
+
+from conftest import read_words
+from pipeline import PipelineSimulator
+from simulator import FunctionalSimulator
+from stimulus import CLOCK_PERIOD_NS, FORCE_OFFSET_NS, StimulusSchedule
+
+# Reset vector -> 0x10 (spin on a jump), external interrupt vector -> 0x20
+PROGRAM = """\
+.ORG 0
+10
+.ORG 1
+20
+.ORG 10
+LOOP: JMP LOOP
+.ORG 20
+LDM R1, 7
+OUT R1
+HLT
+"""
+
+
+def do_script_times(script: str):
+    """(absolute time in ns, command) of every force after the initial ones"""
+    now, forces = 0, []
+    for line in script.splitlines():
+        if line.startswith('run '):
+            now += int(line.split()[1])
+        elif line.startswith('force') and now:
+            forces.append((now, line))
+    return forces
+
+
+def test_parse_save_round_trip(tmp_path):
+    schedule = StimulusSchedule.parse(["# cycle event value\n", "0 in 30\n", "25 int\n",
+                                       "90 int 2 ; two cycles\n", "400 rst\n"])
+    path = str(tmp_path / 'events.stim')
+    schedule.save(path)
+    assert StimulusSchedule.load(path).events == schedule.events
+    assert [(e.cycle, e.kind, e.value) for e in schedule.events] == \
+        [(0, 'in', 0x30), (25, 'int', 1), (90, 'int', 2), (400, 'rst', 1)]
+
+
+def test_random_schedule_fits_the_cycles():
+    schedule = StimulusSchedule.random(200, 5, min_gap=30, seed=1)
+    cycles = [e.cycle for e in schedule.events]
+    assert max(cycles) < 200
+    assert all(b - a >= 30 for a, b in zip(cycles, cycles[1:]))
+    with pytest.raises(ValueError):
+        StimulusSchedule.random(100, 5, min_gap=30)
+
+
+def test_do_script_forces_at_the_scheduled_cycles():
+    schedule = StimulusSchedule.parse(["3 in 1F\n", "10 int 2\n"])
+    forces = do_script_times(schedule.to_do_script('program.mem', 50))
+
+    def at(cycle):
+        return CLOCK_PERIOD_NS * (cycle + 1) + FORCE_OFFSET_NS
+    assert (at(0), "force -freeze sim:/processor/rst 0 0") in forces
+    assert (at(3), "force -freeze sim:/processor/input_port " + format(0x1F, '032b') + " 0") in forces
+    assert (at(10), "force -freeze sim:/processor/external_INT 1 0") in forces
+    assert (at(12), "force -freeze sim:/processor/external_INT 0 0") in forces
+
+
+def test_reset_in_the_middle_of_a_run_keeps_later_events_on_time(write_source, assemble):
+    schedule = StimulusSchedule.parse(["20 rst 3\n", "60 int\n"])
+    sim = PipelineSimulator(read_words(assemble(write_source('spin.asm', PROGRAM), 'spin.mem')))
+    sim.reset()
+
+    clocks = []
+    step = sim.step
+
+    def counted_step():
+        clocks.append(sim.external_int)
+        step()
+    sim.step = counted_step
+    sim.run(200, schedule)
+
+    # The do script raises external_INT in the 61st clock after reset is released
+    forces = do_script_times(schedule.to_do_script('spin.mem', 200))
+    int_time = next(t for t, command in forces if 'external_INT 1' in command)
+    assert clocks.index(1) == (int_time - FORCE_OFFSET_NS) // CLOCK_PERIOD_NS - 1 == 60
+    assert sim.cycle == len(clocks)
+    assert [value for _, value in sim.output_trace] == [7]
+
+
+def test_idle_time_is_not_counted_as_instructions(write_source, assemble):
+    words = read_words(assemble(write_source('idle.asm', PROGRAM.replace('LOOP: JMP LOOP', 'HLT')), 'idle.mem'))
+    sim = FunctionalSimulator(words)
+    sim.reset()
+    retired = sim.run(1000, StimulusSchedule.parse(["50 int\n"]))
+
+    assert retired == sim.instructions == 2   # LDM and OUT in the handler (HLT is not counted)
+    assert sim.clock == 52
+    assert [value for _, value in sim.output_trace] == [7]
@@ -0,0 +1,60 @@
+import os
+
+from watch import AssemblyWatcher
+
+PROGRAM = ".ORG 0\n10\n.ORG 10\nLDM R1, 5\nOUT R1\nHLT\n"
+
+
+def read(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def rebuild(watcher: AssemblyWatcher, source: str, text: str):
+    with open(source, 'w') as f:
+        f.write(text)
+    watcher.rebuild([source])
+
+
+def test_patched_image_equals_a_full_assemble(tmp_path, write_source, assemble):
+    source = write_source('program.asm', PROGRAM)
+    output = str(tmp_path / 'watched.mem')
+    watcher = AssemblyWatcher([source], output)
+    watcher.rebuild([source])
+
+    edited = PROGRAM.replace('LDM R1, 5', 'LDM R1, 7')
+    rebuild(watcher, source, edited)
+    expected = assemble(source, 'expected.mem')
+
+    assert read(output) == read(expected)
+    for extension in ('.map', '.lst'):
+        assert read(str(tmp_path / ('watched' + extension))) == read(str(tmp_path / ('expected' + extension)))
+
+
+def test_patch_writes_only_changed_words(tmp_path, write_source, capsys):
+    source = write_source('program.asm', PROGRAM)
+    output = str(tmp_path / 'watched.bin')
+    watcher = AssemblyWatcher([source], output)
+    watcher.rebuild([source])
+    capsys.readouterr()
+
+    rebuild(watcher, source, PROGRAM.replace('LDM R1, 5', 'LDM R1, 7'))
+    assert '1 word(s) written' in capsys.readouterr().out
+
+
+def test_image_rewritten_by_someone_else_is_written_in_full(tmp_path, write_source, capsys):
+    source = write_source('program.asm', PROGRAM)
+    output = str(tmp_path / 'watched.bin')
+    watcher = AssemblyWatcher([source], output)
+    watcher.rebuild([source])
+
+    # Same size, different contents, mtime moved
+    with open(output, 'r+b') as f:
+        f.write(b'\xff' * 64)
+    stat = os.stat(output)
+    os.utime(output, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    capsys.readouterr()
+
+    rebuild(watcher, source, PROGRAM.replace('LDM R1, 5', 'LDM R1, 7'))
+    assert f"{watcher.assembler.memory_size} word(s) written" in capsys.readouterr().out
+    assert read(output)[:64] != b'\xff' * 64
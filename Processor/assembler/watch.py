@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+RISC Processor Assembler - Watch Mode
+Polls the source files and rebuilds the memory image whenever one changes
+
+Only the modules whose contents changed are run through the two passes
+again; every other module reuses its cached object and the image is
+relinked. When the image on disk was written by this watcher, only the
+words that actually changed are rewritten in place (.mem lines are fixed
+width, .bin words are 4 bytes), so a one-instruction edit touches a few
+bytes instead of the full 2^18-word image. The image is only patched
+while its size and mtime are the ones recorded after our last write;
+anything else rewriting it (a full assemble, the linker, a checkout)
+forces a full write.
+
+A single module without relocatable sections also gets its line map
+(.map) and listing (.lst) rewritten on every rebuild, as a normal
+assemble would. For linked multi-module images there is no line map, so
+any old .map/.lst next to the image is removed instead of going stale.
+"""
+
+import hashlib
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from assembler import RISCAssembler
+from linker import RISCLinker
+
+
+def image_file_size(assembler, path: str) -> int:
+    """Size of a full image written by assembler.write_output (.mem lines are fixed width)"""
+    if path.lower().endswith('.bin'):
+        return assembler.memory_size * 4
+    return len(assembler.MEM_HEADER) + assembler.memory_size * assembler.MEM_LINE_LENGTH
+
+
+def patch_image(assembler, path: str, changes: Dict[int, int]):
+    """Rewrite single words of an image file in place"""
+    binary = path.lower().endswith('.bin')
+    header = len(assembler.MEM_HEADER)
+    with open(path, 'r+b') as f:
+        for address in sorted(changes):
+            if binary:
+                f.seek(address * 4)
+                f.write(changes[address].to_bytes(4, 'little'))
+            else:
+                # Skip the right-aligned address and ': ' to reach the data field
+                f.seek(header + address * assembler.MEM_LINE_LENGTH + 10)
+                f.write(format(changes[address], '032b').encode())
+
+
+class AssemblyWatcher:
+    def __init__(self, sources: List[str], output_file: str, command: Optional[str] = None,
+                 interval: float = 0.05, assembler_class=RISCAssembler):
+        self.sources = sources
+        self.output_file = output_file
+        self.command = command
+        self.interval = interval
+        self.assembler = assembler_class()
+
+        self.stats: Dict[str, Tuple[int, int]] = {}      # path -> (mtime_ns, size)
+        self.digests: Dict[str, str] = {}                # path -> sha1 of contents
+        self.objects: Dict[str, Dict] = {}               # path -> cached object
+        self.words: Optional[Dict[int, int]] = None      # image currently on disk
+        self.image_stat: Optional[Tuple[int, int]] = None  # (mtime_ns, size) after our last write
+        self.listing: Optional[Tuple] = None             # (processed_lines, encoded, lines) of a single module
+        self.nop_word = int(self.assembler.opcodes['NOP'] + '0' * 27, 2)
+
+    def poll(self) -> List[str]:
+        """Return the sources whose stat signature changed since the last poll"""
+        changed = []
+        for path in self.sources:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature = (st.st_mtime_ns, st.st_size)
+            if self.stats.get(path) != signature:
+                self.stats[path] = signature
+                changed.append(path)
+        return changed
+
+    def assemble_module(self, path: str) -> bool:
+        """Re-run both passes on one module if its contents changed
+        Returns: True if the cached object was replaced
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()
+        if self.digests.get(path) == digest and path in self.objects:
+            return False
+
+        lines = data.decode().splitlines(keepends=True)
+        try:
+            processed_lines = self.assembler.first_pass(lines)
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}")
+        obj, errors = self.assembler.build_object(processed_lines)
+        if errors:
+            line_num, line, message = errors[0]
+            raise ValueError(f"{path}: line {line_num}: {line}: {message}"
+                             + (f" (+{len(errors) - 1} more)" if len(errors) > 1 else ""))
+
+        self.objects[path] = obj
+        self.digests[path] = digest
+        self.listing = None
+        if len(self.sources) == 1 and set(self.assembler.line_sections) <= {self.assembler.ABS_SECTION} \
+                and not self.assembler.extern_symbols:
+            encoded, _ = self.assembler.second_pass(processed_lines)
+            self.listing = (processed_lines, encoded, lines)
+        return True
+
+    def link(self) -> Dict[int, int]:
+        """Link the cached objects of every module"""
+        linker = RISCLinker()
+        for path in self.sources:
+            linker.add_object(path, self.objects[path])
+        return linker.link_words()
+
+    def can_patch(self) -> bool:
+        """The on-disk image is one we wrote and still has the fixed-width layout"""
+        if self.words is None:
+            return False
+        try:
+            st = os.stat(self.output_file)
+        except OSError:
+            return False
+        return (st.st_mtime_ns, st.st_size) == self.image_stat \
+            and st.st_size == image_file_size(self.assembler, self.output_file)
+
+    def record_image(self):
+        st = os.stat(self.output_file)
+        self.image_stat = (st.st_mtime_ns, st.st_size)
+
+    def write_side_files(self):
+        """Rewrite the .map/.lst of a single absolute module, remove them otherwise"""
+        base = os.path.splitext(self.output_file)[0]
+        map_file, list_file = base + '.map', base + '.lst'
+        if self.listing is not None:
+            processed_lines, encoded, lines = self.listing
+            source = self.sources[0]
+            self.assembler.write_line_map(self.assembler.line_map(processed_lines, encoded), source, map_file)
+            self.assembler.write_listing(processed_lines, encoded, lines, source, list_file)
+            return
+        for path in (map_file, list_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def write(self, words: Dict[int, int]) -> int:
+        """Bring the image file up to date
+        Returns: number of words written
+        """
+        if not self.can_patch():
+            memory = [format(self.nop_word, '032b')] * self.assembler.memory_size
+            for address, word in words.items():
+                memory[address] = format(word, '032b')
+            self.assembler.write_output(memory, self.output_file)
+            self.record_image()
+            return self.assembler.memory_size
+
+        changed = {
+            address: words.get(address, self.nop_word) for address in set(self.words) | set(words)
+            if self.words.get(address, self.nop_word) != words.get(address, self.nop_word)
+        }
+        patch_image(self.assembler, self.output_file, changed)
+        self.record_image()
+        return len(changed)
+
+    def rebuild(self, changed: List[str]):
+        """Reassemble changed modules, relink and update the image"""
+        start = time.perf_counter()
+        try:
+            reassembled = [path for path in changed if self.assemble_module(path)]
+            if not reassembled and self.words is not None:
+                return
+            missing = [path for path in self.sources if path not in self.objects]
+            if missing:
+                raise ValueError(f"not assembled yet: {', '.join(missing)}")
+            words = self.link()
+            written = self.write(words)
+            self.words = words
+            self.write_side_files()
+        except Exception as e:
+            print(f"[{time.strftime('%H:%M:%S')}] ERROR: {e}")
+            return
+
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"[{time.strftime('%H:%M:%S')}] {', '.join(reassembled) or 'initial build'}: "
+              f"{written} word(s) written in {elapsed:.1f} ms")
+
+        if self.command:
+            subprocess.run(self.command, shell=True)
+
+    def run(self):
+        """Poll forever (Ctrl+C to stop)"""
+        print(f"Watching {', '.join(self.sources)} -> {self.output_file} (Ctrl+C to stop)")
+        try:
+            while True:
+                changed = self.poll()
+                if changed:
+                    self.rebuild(changed)
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("\nStopped watching")
+
+
+def main(assembler_class=RISCAssembler, args: Optional[List[str]] = None):
+    """Main entry point (args: command line without the program name, default sys.argv)"""
+    args = sys.argv[1:] if args is None else args
+    command = None
+    sources = []
+    output_file = None
+
+    i = 0
+    while i < len(args):
+        if args[i] == '--watch':
+            i += 1
+        elif args[i] == '--exec' and i + 1 < len(args):
+            command = args[i + 1]
+            i += 2
+        elif args[i].lower().endswith(('.mem', '.bin')):
+            output_file = args[i]
+            i += 1
+        else:
+            sources.append(args[i])
+            i += 1
+
+    if not sources:
+        print("\nUsage: python assembler.py --watch <input.asm> [more.asm ...] [output.mem|output.bin] [--exec <command>]")
+        print("\nExample:")
+        print("  python assembler.py --watch program.asm program.mem --exec \"vsim -c -do simulate.do\"")
+        sys.exit(1)
+
+    if output_file is None:
+        output_file = os.path.splitext(sources[0])[0] + '.mem'
+
+    AssemblyWatcher(sources, output_file, command, assembler_class=assembler_class).run()
+
+
+if __name__ == "__main__":
+    main()